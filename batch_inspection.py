@@ -0,0 +1,672 @@
+# -*- coding: utf-8 -*-
+"""フォルダ内の図面をまとめて検図するコマンドラインツール.
+
+SimpleViewer.process_doc と同じ処理(読み込み, 枠線抽出, 検図, 結果の集約)を
+Tk を使わずにプロセスプールで並列に実行し, 図面ごとに結果ファイルを書き出す.
+DWGファイルは検図の前に DwgConverter でまとめてDXFに変換する.
+変換結果は ConversionCache に保存し, 変更のないファイルは再変換しない.
+
+使用例::
+
+    python batch_inspection.py 提出フォルダ -o 結果フォルダ -j 8
+    python batch_inspection.py 提出フォルダ -i CheckTitleBlock CheckOuterObject
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import traceback
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterable
+
+import ezdxf
+from ezdxf.addons import odafc as oda
+from ezdxf.document import Drawing
+
+from inspector import *
+from inspector.check_base import CheckBase
+from inspector.check_result import CheckResult
+from inspector.result_set import ResultSet
+from inspector.result_cache import ResultCache
+from inspector.frame_extractor import Frame_extractor_result
+from inspector.summarize_drawer import SummarizeDrawer
+from inspector.draw_tool import DrawTool
+from inspector.geometry_snapshot import GeometrySnapshot
+from frames.dwg_converter import DwgConverter, DXF_VERSION
+from frames.conversion_cache import ConversionCache
+
+
+# 対象とする拡張子
+DRAWING_EXTS = ('.dxf', '.dwg')
+
+# 結果ファイルの接尾辞
+RESULT_SUFFIX = '_result'
+
+# 検図結果を保存するファイルの既定の名前
+RESULT_CACHE = 'inspection_cache.sqlite3'
+
+
+def is_result_name(base: str) -> bool:
+    """拡張子を除いたファイル名が result_path の結果ファイルの名前か."""
+    return base.lower().endswith(tuple(ext + RESULT_SUFFIX
+                                       for ext in DRAWING_EXTS))
+
+
+def find_drawings(dirpath: str, recursive: bool = False) -> list[str]:
+    """フォルダ内の図面ファイル(DXF/DWG)のパスを名前順で返す."""
+    paths = []
+    for root, dirs, files in os.walk(dirpath):
+        for name in files:
+            base, ext = os.path.splitext(name)
+            if ext.lower() not in DRAWING_EXTS:
+                continue
+            # 以前の実行で書き出した結果ファイル(<図面名>.dxf_result.dxf 等)
+            # は除く
+            if is_result_name(base):
+                continue
+            paths.append(os.path.join(root, name))
+        if not recursive:
+            break
+    return sorted(paths)
+
+
+def inspector_classes() -> dict[str, type]:
+    """選択可能な検図クラスをクラス名をキーとして返す.
+
+    AlgorithmSelector と同じく CheckBase の直接のサブクラスを対象とする.
+    """
+    subclasses = CheckBase.__subclasses__()
+    if len(subclasses) == 0:
+        subclasses.append(CheckBase)
+    return {sub.__name__: sub for sub in subclasses}
+
+
+def find_inspectors(names: list[str] | None) -> list[type]:
+    """クラス名または検図項目名から検図クラスのリストを返す.
+
+    names が None の場合は全ての検図クラスを返す.
+    """
+    classes = inspector_classes()
+    if names is None:
+        return list(classes.values())
+
+    inspectors = []
+    for name in names:
+        for cls in classes.values():
+            if name in (cls.__name__, cls.inspect_name):
+                inspectors.append(cls)
+                break
+        else:
+            raise ValueError('存在しない検図項目です: {}'.format(name))
+    return inspectors
+
+
+def read_drawing(filepath: str) -> Drawing:
+    """DXF/DWGファイルを読み込む.
+
+    DWGの場合は oda.win_exec_path に設定された ODA File Converter を使う.
+    """
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext == '.dxf':
+        return ezdxf.readfile(filepath)
+    elif ext == '.dwg':
+        if not oda.is_installed():
+            raise RuntimeError('ODA File Converterが設定されていないため，'
+                               'dwgファイルを読み込むことはできません．')
+        return oda.readfile(filepath, DXF_VERSION)
+    raise ValueError('このアプリケーションでは利用できないパスです: {}'
+                     .format(filepath))
+
+
+def cached_result(cache: ResultCache, file_hash: str, inspector: type):
+    """保存された結果を返す.
+
+    読み込めない場合(壊れたファイル等)は保存されていない場合と同じく
+    None を返し, 検図をやり直す.
+    """
+    try:
+        return cache.get(file_hash, inspector)
+    except Exception:
+        print('保存された検図結果を読み込めません: {}'.format(
+            inspector.__name__), file=sys.stderr)
+        traceback.print_exc()
+        return None
+
+
+def inspect_drawing(doc: Drawing, inspectors: list[type],
+                    max_items: int = -1,
+                    records: list[dict] | None = None,
+                    cache: ResultCache | None = None,
+                    file_hash: str | None = None) -> tuple[Drawing, ResultSet]:
+    """読み込んだ図面に検図を行い, 結果を描画した重ね合わせ用の図面と
+    結果のリストを返す.
+
+    SimpleViewer.process_doc の表示以外の処理と同じ内容.
+    records を指定した場合は検図ごとに inspector(クラス名), time(秒),
+    cached(保存された結果か), error(例外), results(ResultSet) の辞書を
+    追加する(例外の場合も追加してから送出する).
+    cache と図面ファイルのハッシュ値 file_hash を指定した場合は保存された
+    結果を使い, 新たに検図した結果は保存する.
+    """
+    # 枠線抽出と図形の配列は保存された結果がない検図がある場合だけ求める
+    option = {}
+
+    def options():
+        if len(option) == 0:
+            # 枠線抽出(図面は変更しない)
+            option['frameresult'] = Frame_extractor_result(doc)
+
+            # 図形の配列(全ての検図で共有する)
+            option['geometry'] = GeometrySnapshot.from_doc(doc)
+        return option
+
+    use_cache = cache is not None and file_hash is not None
+
+    # 検図(結果は列形式で保持する)
+    draw_doc = DrawTool.OverlayDoc(doc)
+    results = ResultSet()
+    for inspector in inspectors:
+        start = time.perf_counter()
+        cached = None
+        try:
+            if use_cache:
+                cached = cached_result(cache, file_hash, inspector)
+            if cached is not None:
+                res, overlay, _ = cached
+                DrawTool.MergeOverlay(draw_doc, overlay)
+            elif use_cache:
+                # 保存するため検図ごとに別の重ね合わせ用図面に描画する
+                overlay, res = inspector.inspect_doc(
+                    doc, DrawTool.OverlayDoc(doc), **options())
+                cache.put(file_hash, inspector, res, overlay,
+                          time.perf_counter() - start)
+                DrawTool.MergeOverlay(draw_doc, overlay)
+            else:
+                draw_doc, res = inspector.inspect_doc(doc, draw_doc,
+                                                      **options())
+        except Exception:
+            if records is not None:
+                records.append({'inspector': inspector.__name__,
+                                'time': time.perf_counter() - start,
+                                'cached': False,
+                                'error': traceback.format_exc(),
+                                'results': ResultSet()})
+            raise
+        results.extend(res)
+        if records is not None:
+            records.append({'inspector': inspector.__name__,
+                            'time': time.perf_counter() - start,
+                            'cached': cached is not None,
+                            'error': '', 'results': ResultSet(res)})
+
+    # キャプション等描画
+    SummarizeDrawer.summarize(draw_doc, results, max_items=max_items,
+                              base_doc=doc)
+
+    return draw_doc, results
+
+
+def result_path(filepath: str, outdir: str,
+                root: str | None = None) -> str:
+    """結果ファイルのパス(拡張子を除く)を返す.
+
+    root からの相対パスを outdir の下に再現し, 同じ名前のDXFとDWGを区別する
+    ため元の拡張子も残す(例: root/sub/a.dwg -> outdir/sub/a.dwg_result).
+    root を省略した場合は図面のフォルダを root とする.
+    """
+    root = os.path.dirname(filepath) if root is None else root
+    return os.path.join(outdir, os.path.relpath(filepath, root)
+                        + RESULT_SUFFIX)
+
+
+def write_results(path: str, results: Iterable[CheckResult]):
+    """検図結果を CSV として書き出す(Excelで開けるようにBOM付き)."""
+    with open(path, 'w', encoding='utf_8_sig', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(CheckResult.columns)
+        for r in results:
+            data = r.toColumnData()
+            writer.writerow([data[col] for col in CheckResult.columns])
+
+
+def process_file(filepath: str, inspector_names: list[str], outdir: str,
+                 max_items: int = -1, verbose: bool = False,
+                 readpath: str | None = None, report: bool = False,
+                 cache_path: str | None = None,
+                 root: str | None = None) -> dict:
+    """図面1つを処理する(プロセスプールの各ワーカーで実行される).
+
+    readpath を指定した場合は filepath の代わりにそのファイル(変換済みのDXF)
+    を読み込む. 結果ファイルの名前は filepath と root から決める(result_path).
+    cache_path を指定した場合は ResultCache に保存された検図結果を使う
+    (キーは filepath の内容のハッシュ値).
+
+    Returns
+    -------
+    dict
+        file, results(結果数), errors(エラー結果数), time(秒), error(例外).
+        report が True の場合は inspectors (inspect_drawing の records) も持つ.
+    """
+    start = time.perf_counter()
+    summary = {'file': filepath, 'results': 0, 'errors': 0,
+               'time': 0.0, 'error': ''}
+    records = [] if report else None
+    if report:
+        summary['inspectors'] = records
+
+    # 検図処理内の print を抑制する
+    stdout = sys.stdout if verbose else io.StringIO()
+    try:
+        with contextlib.redirect_stdout(stdout), \
+                contextlib.ExitStack() as stack:
+            inspectors = find_inspectors(inspector_names)
+            cache, file_hash = None, None
+            if cache_path:
+                cache = stack.enter_context(ResultCache(cache_path))
+                file_hash = ResultCache.file_hash(filepath)
+            doc = read_drawing(readpath or filepath)
+            draw_doc, results = inspect_drawing(doc, inspectors, max_items,
+                                                records, cache, file_hash)
+
+            # 結果ファイルは元の図面に検図結果を取り込んで書き出す
+            draw_doc = DrawTool.MergeOverlay(doc, draw_doc)
+            draw_doc = DrawTool.ResolveFont(draw_doc)
+
+        # 結果の書き出し
+        base = result_path(filepath, outdir, root)
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        draw_doc.saveas(base + '.dxf')
+        write_results(base + '.csv', results)
+
+        summary['results'] = len(results)
+        summary['errors'] = int(results.column('error').sum())
+
+    except Exception:
+        summary['error'] = traceback.format_exc()
+
+    summary['time'] = time.perf_counter() - start
+    return summary
+
+
+class ReportWriter:
+    """図面ごとの検図結果をレポートファイルに追記するベースクラス.
+
+    図面の処理が終わるたびに write で書き出すため, 一括検図の全ての結果を
+    メモリに溜めない. 結果1件を1行とし, 結果がない検図と読み込みや検図に
+    失敗した図面も1行(結果の列は空)書き出す.
+
+    Parameters
+    ----------
+    path : str
+        出力するファイルのパス
+    append : bool
+        既存のファイルに追記する(False の場合は作り直す)
+    """
+
+    # 列名
+    FIELDS = ('file', 'file_time', 'inspector', 'time', 'error', 'num',
+              'checkType', 'result_error', 'x', 'y', 'caption', 'desc',
+              'color', 'cached')
+
+    def __init__(self, path: str, append: bool = False):
+        """イニシャライザ."""
+        self.path = path
+        self.is_new = not (append and os.path.exists(path)
+                           and os.path.getsize(path) > 0)
+        self.file = self.open(path, 'w' if self.is_new else 'a')
+
+    def open(self, path: str, mode: str):
+        """ファイルを開く."""
+        return open(path, mode, encoding='utf-8', newline='')
+
+    def __enter__(self):
+        """with 文で使う."""
+        return self
+
+    def __exit__(self, *exc):
+        """with 文の終了でファイルを閉じる."""
+        self.close()
+
+    def close(self):
+        """ファイルを閉じる."""
+        self.file.close()
+
+    def write(self, summary: dict):
+        """図面1つの結果を追記する."""
+        for record in self.records(summary):
+            self.write_record(record)
+        self.file.flush()
+
+    def write_record(self, record: dict):
+        """1行を書き出す."""
+        raise NotImplementedError
+
+    @staticmethod
+    def error_message(error: str) -> str:
+        """トレースバックの最後の行(例外の内容)."""
+        lines = error.strip().splitlines()
+        return lines[-1] if len(lines) > 0 else ''
+
+    @classmethod
+    def records(cls, summary: dict):
+        """図面1つの結果から各行の辞書を返す."""
+        empty = {field: None for field in cls.FIELDS}
+        empty.update(file=summary['file'], file_time=summary['time'])
+        inspectors = summary.get('inspectors') or []
+        if len(inspectors) == 0:
+            # 検図の前に失敗した図面
+            yield dict(empty, inspector='', time=summary['time'],
+                       error=cls.error_message(summary['error']))
+            return
+
+        # 検図の後の書き出し等で失敗した場合は図面の例外を表示する
+        for record in inspectors:
+            error = record['error'] or summary['error']
+            head = dict(empty, inspector=record['inspector'],
+                        time=record['time'], cached=record['cached'],
+                        error=cls.error_message(error))
+            results = record['results']
+            if len(results) == 0:
+                yield head
+                continue
+            for r in results:
+                pos = (None, None) if r.pos is None else r.pos[:2]
+                yield dict(head, num=r.num, checkType=r.checkType,
+                           result_error=r.error, x=pos[0], y=pos[1],
+                           caption=r.caption, desc=r.desc, color=r.color)
+
+
+class JsonlReportWriter(ReportWriter):
+    """JSON Lines(1行に1つのJSON)のレポート."""
+
+    def write_record(self, record: dict):
+        """1行を書き出す."""
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+class CsvReportWriter(ReportWriter):
+    """CSVのレポート(Excelで開けるようにBOM付き)."""
+
+    def __init__(self, path: str, append: bool = False):
+        """イニシャライザ(追記するファイルの列名が異なる場合は ValueError)."""
+        if append and os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, encoding='utf_8_sig', newline='') as file:
+                header = next(csv.reader(file), [])
+            if tuple(header) != self.FIELDS:
+                raise ValueError('列名が異なるレポートには追記できません: '
+                                 '{}'.format(path))
+        super().__init__(path, append)
+        self.writer = csv.writer(self.file)
+        if self.is_new:
+            self.writer.writerow(self.FIELDS)
+
+    def open(self, path: str, mode: str):
+        """ファイルを開く(追記する場合はBOMを付けない)."""
+        encoding = 'utf_8_sig' if mode == 'w' else 'utf-8'
+        return open(path, mode, encoding=encoding, newline='')
+
+    def write_record(self, record: dict):
+        """1行を書き出す."""
+        self.writer.writerow(['' if record[f] is None else record[f]
+                              for f in self.FIELDS])
+
+
+# レポートの拡張子と書き出すクラス
+REPORT_WRITERS = {'.jsonl': JsonlReportWriter, '.csv': CsvReportWriter}
+
+
+def open_report(path: str, append: bool = False) -> ReportWriter:
+    """拡張子に合わせたレポートを開く."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in REPORT_WRITERS:
+        raise ValueError('レポートの拡張子は {} のいずれかです: {}'.format(
+            ', '.join(REPORT_WRITERS), path))
+    return REPORT_WRITERS[ext](path, append)
+
+
+def init_worker(oda_path: str | None):
+    """ワーカープロセスの初期化(ODAのパスを設定する)."""
+    if oda_path:
+        oda.win_exec_path = oda_path
+        oda.unix_exec_path = oda_path
+
+
+def run_batch(paths: list[str], inspector_names: list[str] | None,
+              outdir: str, jobs: int | None = None,
+              oda_path: str | None = None, max_items: int = -1,
+              verbose: bool = False,
+              readpaths: dict[str, str] | None = None,
+              reports: list[ReportWriter] | None = None,
+              cache_path: str | None = None,
+              root: str | None = None) -> list[dict]:
+    """図面のリストをプロセスプールで検図し, 各図面の概要を返す.
+
+    readpaths には図面のパスをキーとして, 代わりに読み込むファイルを指定する.
+    結果ファイルは root (入力フォルダ)からの相対パスで outdir の下に書き出す.
+    reports を指定した場合は図面の処理が終わるたびに結果を追記する.
+    cache_path を指定した場合は検図結果を保存し, 内容と検図のコードが
+    変わっていない図面は保存した結果を使う(中断した一括検図も続きから実行される).
+    """
+    reports = [] if reports is None else reports
+    if cache_path:
+        # コードが変わった検図の古い結果を削除する
+        with ResultCache(cache_path) as cache:
+            removed = cache.prune(find_inspectors(inspector_names))
+        if removed > 0:
+            print('検図のコードが変わったため保存された結果を{}件削除しました'
+                  .format(removed))
+    os.makedirs(outdir, exist_ok=True)
+    readpaths = {} if readpaths is None else readpaths
+
+    summaries = []
+    with ProcessPoolExecutor(max_workers=jobs,
+                             initializer=init_worker,
+                             initargs=(oda_path,)) as executor:
+        futures = [executor.submit(process_file, path, inspector_names,
+                                   outdir, max_items, verbose,
+                                   readpaths.get(path), len(reports) > 0,
+                                   cache_path, root)
+                   for path in paths]
+        for i, future in enumerate(as_completed(futures)):
+            summary = future.result()
+            for report in reports:
+                report.write(summary)
+
+            # 結果はレポートに書き出したら保持しない
+            summary.pop('inspectors', None)
+            summaries.append(summary)
+            print_summary(summary, i + 1, len(paths))
+
+    return summaries
+
+
+def print_summary(summary: dict, i: int, n: int):
+    """図面1つの処理結果を表示する."""
+    state = 'NG' if summary['error'] else 'OK'
+    print('[{}/{}] {} {} ({:.1f}s, {}件)'.format(
+        i, n, state, os.path.basename(summary['file']),
+        summary['time'], summary['results']))
+    if summary['error']:
+        print(summary['error'], file=sys.stderr)
+
+
+def convert_drawings(paths: list[str], converter: DwgConverter, outdir: str,
+                     cache: ConversionCache | None = None
+                     ) -> tuple[dict, list[dict]]:
+    """DWGファイルをまとめてDXFに変換する.
+
+    cache を指定した場合は変換済みのファイルを再利用し,
+    新たに変換したファイルを保存する. 検図に使う変換結果が削除されないように
+    保存時には容量を整理しないため, 検図が終わってから cache.evict を呼ぶ.
+
+    Returns
+    -------
+    tuple[dict, list[dict]]
+        DWGのパスをキーとした変換後のDXFのパスと, 変換に失敗した図面の概要.
+        新たに変換した図面は outdir に書き出したDXFのパス.
+    """
+    start = time.perf_counter()
+
+    cached = {}
+    if cache is not None:
+        for path in paths:
+            dxf = cache.get(path)
+            if dxf is not None:
+                cached[path] = dxf
+        paths = [p for p in paths if p not in cached]
+
+    converted, errors = {}, {}
+    if len(paths) > 0:
+        converted, errors = converter.convert(paths, outdir)
+    if cache is not None:
+        for path, dxf in converted.items():
+            cache.put(path, dxf, evict=False)
+    print('{}件のdwgファイルを変換しました (変換済み {}件, 失敗 {}件), '
+          '{:.1f}s'.format(len(converted), len(cached), len(errors),
+                           time.perf_counter() - start))
+    converted.update(cached)
+
+    failed = [{'file': path, 'results': 0, 'errors': 0, 'time': 0.0,
+               'error': error} for path, error in errors.items()]
+    return converted, failed
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """コマンドライン引数の解析."""
+    names = ', '.join(inspector_classes())
+    parser = argparse.ArgumentParser(
+        description='フォルダ内のDXF/DWG図面をまとめて検図します.')
+    parser.add_argument('input', help='図面の入ったフォルダ')
+    parser.add_argument('-o', '--output', default=None,
+                        help='結果の出力先フォルダ (既定: 入力フォルダ)')
+    parser.add_argument('-i', '--inspector', nargs='+', default=None,
+                        help='実行する検図のクラス名または検図項目名 '
+                        '(既定: すべて). 選択肢: ' + names)
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='並列に実行するプロセス数 (既定: CPUのコア数)')
+    parser.add_argument('-r', '--recursive', action='store_true',
+                        help='サブフォルダの図面も対象にする')
+    parser.add_argument('--oda', default=None,
+                        help='ODAFileConverterのパス (既定: 環境設定の値)')
+    parser.add_argument('--shards', type=int, default=2,
+                        help='dwgファイルの変換を同時に実行する数')
+    parser.add_argument('--convert-timeout', type=float, default=600,
+                        help='dwgファイルの変換1回あたりの制限時間(秒)')
+    parser.add_argument('--cache', default=None,
+                        help='dwgファイルの変換結果を保存するフォルダ '
+                        '(既定: 環境設定のフォルダ)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='dwgファイルの変換結果を保存・再利用しない')
+    parser.add_argument('--max-items', type=int, default=-1,
+                        help='図面に矢印で表示する結果の最大数 '
+                        '(既定: 制限なし)')
+    parser.add_argument('--result-cache', default=None,
+                        help='検図結果を保存するSQLiteファイル '
+                        '(既定: 環境設定のフォルダの ' + RESULT_CACHE + ')')
+    parser.add_argument('--no-result-cache', action='store_true',
+                        help='検図結果を保存・再利用しない')
+    parser.add_argument('--report', nargs='+', default=[],
+                        help='全図面の結果を書き出すレポートファイル '
+                        '(拡張子 .jsonl または .csv)')
+    parser.add_argument('--report-append', action='store_true',
+                        help='既存のレポートファイルに追記する')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='検図処理中の出力を表示する')
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """エントリポイント."""
+    args = parse_args(argv)
+
+    paths = find_drawings(args.input, args.recursive)
+    if len(paths) == 0:
+        print('図面が見つかりませんでした: {}'.format(args.input))
+        return 1
+
+    # 検図項目の確認
+    try:
+        inspectors = find_inspectors(args.inspector)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    names = [cls.__name__ for cls in inspectors]
+
+    # DWGがある場合はODAのパスを, 検図結果の保存先は指定がなければ
+    # 環境設定から取得
+    oda_path = args.oda
+    cachedir = None if args.no_cache else args.cache
+    cache_path = None if args.no_result_cache else args.result_cache
+    has_dwg = any(p.lower().endswith('.dwg') for p in paths)
+    dwg_conf = has_dwg and (oda_path is None
+                            or (cachedir is None and not args.no_cache))
+    result_conf = not args.no_result_cache and cache_path is None
+    if dwg_conf or result_conf:
+        from frames.viewer_conf import ViewerConf
+        vconf = ViewerConf()
+        if has_dwg and oda_path is None:
+            oda_path = vconf.get_odapath()
+        if has_dwg and cachedir is None and not args.no_cache:
+            cachedir = vconf.cache_dirpath
+        if result_conf:
+            cache_path = os.path.join(vconf.cache_dirpath, RESULT_CACHE)
+    if cache_path is not None:
+        os.makedirs(os.path.dirname(os.path.abspath(cache_path)),
+                    exist_ok=True)
+
+    outdir = args.output if args.output is not None else args.input
+
+    print('{}件の図面を検図します: {}'.format(len(paths), ', '.join(names)))
+    start = time.perf_counter()
+    with contextlib.ExitStack() as stack:
+        try:
+            reports = [stack.enter_context(open_report(path, args.report_append))
+                       for path in args.report]
+        except (ValueError, OSError) as e:
+            print(e, file=sys.stderr)
+            return 2
+        tmp_dir = stack.enter_context(
+            tempfile.TemporaryDirectory(prefix='batch_'))
+
+        # dwgファイルはまとめて変換し, 変換できたものだけ検図する
+        converted, summaries = {}, []
+        conversions = None
+        dwgs = [p for p in paths if p.lower().endswith('.dwg')]
+        if len(dwgs) > 0 and oda_path:
+            converter = DwgConverter(oda_path, shards=args.shards,
+                                     timeout=args.convert_timeout,
+                                     version=DXF_VERSION)
+            if cachedir is not None:
+                conversions = ConversionCache(cachedir, oda_path,
+                                              DXF_VERSION)
+            converted, summaries = convert_drawings(dwgs, converter, tmp_dir,
+                                                    conversions)
+            for i, summary in enumerate(summaries):
+                print_summary(summary, i + 1, len(summaries))
+                for report in reports:
+                    report.write(summary)
+            failed = {s['file'] for s in summaries}
+            paths = [p for p in paths if p not in failed]
+
+        summaries += run_batch(paths, names, outdir, args.jobs, oda_path,
+                               args.max_items, args.verbose, converted,
+                               reports, cache_path, args.input)
+
+        # 検図に使った変換結果は全ての図面が終わってから整理する
+        if conversions is not None:
+            conversions.evict()
+    failed = [s for s in summaries if s['error']]
+    print('完了: {}件 (失敗 {}件), {:.1f}s'.format(
+        len(summaries), len(failed), time.perf_counter() - start))
+
+    return 0 if len(failed) == 0 else 3
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -11,10 +11,20 @@ import tkinter.ttk as ttk
 from frames.frame_constants import Fontsize
 
 class AlgorithmSelector(tk.Frame):
-    """検図アルゴリズムを選択するためのクラス."""
+    """検図アルゴリズムを選択するためのクラス.
+
+    個別の検図に加えて, すべての検図または選択した検図をまとめて実行する
+    項目を選択できる.
+    """
 
     __current_index = 0
 
+    # まとめて実行する項目の名前と説明
+    ALL_NAME = 'すべての検図'
+    ALL_DETAIL = 'すべての検図をまとめて実行します.'
+    SELECTED_NAME = '選択した検図'
+    SELECTED_DETAIL = '[選択]で選んだ検図をまとめて実行します.'
+
     def __init__(self, baseclass, master: tk.Tk | None = None):
         """イニシャライザ."""
         super().__init__(master)
@@ -25,13 +35,21 @@ class AlgorithmSelector(tk.Frame):
         # プルダウンメニュー
         # style = ttk.Style()
         # style.configure('pulldown.TCombobox', font=Fontsize.HEAD)
-        self.pulldown = ttk.Combobox(self, values=self.names,
-                                     font=('', Fontsize.HEAD))
+        self.pulldown = ttk.Combobox(self, values=self.names + [
+            self.ALL_NAME, self.SELECTED_NAME], font=('', Fontsize.HEAD))
         self.pulldown.current(self.__current_index)
         self.pulldown.config(state="readonly")
         self.pulldown.bind('<<ComboboxSelected>>',
                            lambda e: self.__update_display())
 
+        # まとめて実行する検図の選択メニュー
+        self.checks = [tk.BooleanVar(value=True) for _ in self.values]
+        self.select_button = ttk.Menubutton(self, text='選択')
+        menu = tk.Menu(self.select_button, tearoff=False)
+        for name, var in zip(self.names, self.checks):
+            menu.add_checkbutton(label=name, variable=var)
+        self.select_button['menu'] = menu
+
         # 詳細用ラベル
         self.detail = tk.StringVar()
         self.detail.set(self.details[self.__current_index])
@@ -39,17 +57,41 @@ class AlgorithmSelector(tk.Frame):
                                font=("", Fontsize.HEAD))
 
         self.label.pack(side=tk.RIGHT)
+        self.select_button.pack(side=tk.RIGHT)
         self.pulldown.pack(side=tk.RIGHT)
 
     def __update_display(self):
         """index, detail,の更新を行う."""
         # print('update')
         self.__current_index = self.pulldown.current()
-        self.detail.set(self.details[self.__current_index])
+        if self.__current_index == len(self.values):
+            self.detail.set(self.ALL_DETAIL)
+        elif self.__current_index > len(self.values):
+            self.detail.set(self.SELECTED_DETAIL)
+        else:
+            self.detail.set(self.details[self.__current_index])
 
     def get_val(self):
-        """選択されている値を返す."""
-        return self.values[self.__current_index]
+        """選択されている値を返す.
+
+        まとめて実行する項目が選択されている場合は最初の検図を返す.
+        """
+        vals = self.get_vals()
+        return vals[0] if len(vals) > 0 else self.values[0]
+
+    def get_vals(self) -> list:
+        """選択されている値をリストで返す."""
+        if self.__current_index == len(self.values):
+            return list(self.values)
+        elif self.__current_index > len(self.values):
+            return [val for val, var in zip(self.values, self.checks)
+                    if var.get()]
+        return [self.values[self.__current_index]]
+
+    @property
+    def is_multi(self) -> bool:
+        """まとめて実行する項目が選択されているかを返す."""
+        return self.__current_index >= len(self.values)
 
     def set_baseclass(self, baseclass):
         """指定されたベースクラスから情報を抽出する."""
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""DWGファイルの変換結果(DXF)を保存しておくモジュール.
+
+DWGファイルの内容のハッシュと変換に使ったコンバータをキーとして
+変換後のDXFをフォルダに保存し, 同じファイルは変換せずに再利用する.
+保存容量が上限を超えた場合は最後に使われた日時が古いものから削除する.
+"""
+
+import hashlib
+import os
+import shutil
+
+from ezdxf.document import Drawing
+
+from frames.dwg_converter import DXF_VERSION
+
+
+class ConversionCache:
+    """DWG→DXF変換結果のキャッシュ.
+
+    Parameters
+    ----------
+    cachedir : str
+        変換結果を保存するフォルダ
+    exec_path : str
+        ODAFileConverter の実行ファイルのパス(コンバータの版の判別に使う)
+    version : str
+        出力するDXFのバージョン(変換方法が違う結果は区別する)
+    max_bytes : int
+        保存するDXFの合計サイズの上限
+    """
+
+    suffix = '.dxf'
+
+    def __init__(self, cachedir: str, exec_path: str, version: str = DXF_VERSION,
+                 max_bytes: int = 1024 ** 3):
+        """イニシャライザ."""
+        self.cachedir = cachedir
+        self.max_bytes = max_bytes
+        self.converter = self.converter_version(exec_path) + ':' + version
+        os.makedirs(self.cachedir, exist_ok=True)
+
+    @staticmethod
+    def converter_version(exec_path: str) -> str:
+        """コンバータを区別する文字列を返す.
+
+        ODAFileConverter は版を出力しないため, 実行ファイルのサイズと
+        更新日時で区別する(入れ替えると別のコンバータとして扱う).
+        """
+        try:
+            st = os.stat(exec_path)
+        except (OSError, ValueError):
+            return os.path.basename(exec_path)
+        return '{}:{}:{}'.format(os.path.basename(exec_path), st.st_size,
+                                 int(st.st_mtime))
+
+    @staticmethod
+    def file_hash(path: str) -> str:
+        """ファイルの内容のハッシュ値を返す."""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def key(self, path: str) -> str:
+        """ファイルの内容とコンバータから保存先のファイル名を決める."""
+        converter = hashlib.sha256(self.converter.encode('utf_8')).hexdigest()
+        return self.file_hash(path) + '-' + converter[:16]
+
+    def cache_path(self, key: str) -> str:
+        """キーに対応する保存先のパスを返す."""
+        return os.path.join(self.cachedir, key + self.suffix)
+
+    def get(self, path: str) -> str | None:
+        """変換済みのDXFのパスを返す(存在しない場合はNone)."""
+        cached = self.cache_path(self.key(path))
+        if not os.path.isfile(cached):
+            return None
+
+        # 最後に使われた日時として更新日時を更新する
+        os.utime(cached)
+        return cached
+
+    def put(self, path: str, dxfpath: str, evict: bool = True) -> str:
+        """変換したDXFを保存し, 保存先のパスを返す.
+
+        evict が False の場合は上限を超えても削除しない(まとめて変換する
+        場合に使い, 使い終わってから evict を呼ぶ).
+        """
+        cached = self.cache_path(self.key(path))
+        tmp = cached + '.tmp'
+        shutil.copyfile(dxfpath, tmp)
+        os.replace(tmp, cached)
+
+        if evict:
+            self.evict(keep=cached)
+        return cached
+
+    def put_doc(self, path: str, doc: Drawing) -> str:
+        """読み込んだ図面をDXFとして保存し, 保存先のパスを返す."""
+        cached = self.cache_path(self.key(path))
+        filename = doc.filename
+        tmp = cached + '.tmp'
+        doc.saveas(tmp)
+        doc.filename = filename
+        os.replace(tmp, cached)
+
+        self.evict(keep=cached)
+        return cached
+
+    def evict(self, keep: str | None = None):
+        """合計サイズが上限以下になるまで古いものから削除する."""
+        entries = []
+        for entry in os.scandir(self.cachedir):
+            if entry.is_file() and entry.name.endswith(self.suffix):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                # 使用中のファイルは残す
+                continue
+            total -= size
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""DWGファイルをまとめてDXFに変換するモジュール.
+
+odafc.readfile は1ファイルごとに ODA File Converter を起動するため,
+フォルダ内の図面を複数のシャード(グループ)に分け, シャードごとに1回の
+起動でまとめて変換する. シャードは並列に実行する.
+"""
+
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# 出力するDXFのバージョン(ビューアと一括検図で変換結果のキャッシュを共有するため,
+# 変換はすべてこのバージョンで行う)
+DXF_VERSION = 'ACAD2018'
+
+
+class DwgConverter:
+    """ODA File Converter でDWGをまとめて変換するクラス.
+
+    Parameters
+    ----------
+    exec_path : str
+        ODAFileConverter の実行ファイルのパス
+    shards : int
+        同時に実行する変換の数(図面をこの数のグループに分ける)
+    timeout : float | None
+        1シャードあたりの制限時間(秒)
+    version : str
+        出力するDXFのバージョン
+    audit : bool
+        変換時に監査を行うか
+    """
+
+    def __init__(self, exec_path: str, shards: int = 2,
+                 timeout: float | None = 600, version: str = DXF_VERSION,
+                 audit: bool = False):
+        """イニシャライザ."""
+        self.exec_path = exec_path
+        self.shards = max(1, shards)
+        self.timeout = timeout
+        self.version = version
+        self.audit = audit
+
+    def convert(self, paths: list[str],
+                outdir: str) -> tuple[dict[str, str], dict[str, str]]:
+        """DWGファイルをDXFに変換して outdir に書き出す.
+
+        Returns
+        -------
+        tuple[dict[str, str], dict[str, str]]
+            変換元のパスをキーとした, 変換後のDXFのパスとエラーメッセージ
+        """
+        os.makedirs(outdir, exist_ok=True)
+
+        # 同じ名前のファイルがあっても区別できるように番号を付ける
+        names = ['{:04d}_{}'.format(i, os.path.basename(path))
+                 for i, path in enumerate(paths)]
+        items = list(zip(paths, names))
+        shards = [items[i::self.shards] for i in range(self.shards)]
+        shards = [shard for shard in shards if len(shard) > 0]
+
+        converted = {}
+        errors = {}
+        with ThreadPoolExecutor(max_workers=len(shards) or 1) as executor:
+            for conv, err in executor.map(
+                    lambda shard: self.convert_shard(shard, outdir), shards):
+                converted.update(conv)
+                errors.update(err)
+
+        return converted, errors
+
+    def convert_shard(self, items: list[tuple[str, str]],
+                      outdir: str) -> tuple[dict[str, str], dict[str, str]]:
+        """1つのシャードを1回の ODA File Converter の起動で変換する."""
+        converted = {}
+        errors = {}
+
+        with tempfile.TemporaryDirectory(prefix='odafc_') as tmp_dir:
+            in_dir = os.path.join(tmp_dir, 'in')
+            out_dir = os.path.join(tmp_dir, 'out')
+            os.makedirs(in_dir)
+            os.makedirs(out_dir)
+
+            for path, name in items:
+                self.link_file(path, os.path.join(in_dir, name))
+
+            message = ''
+            try:
+                proc = self.run(in_dir, out_dir)
+                message = proc.stderr.decode('utf-8', errors='replace')
+            except subprocess.TimeoutExpired:
+                message = '変換が制限時間({}秒)を超えました．'.format(self.timeout)
+            except OSError as e:
+                message = str(e)
+
+            # 変換の成否は出力ファイルの有無で判断する
+            # (Linux版は成功時も異常終了することがあるため)
+            for path, name in items:
+                dxfname = os.path.splitext(name)[0] + '.dxf'
+                out_file = os.path.join(out_dir, dxfname)
+                if os.path.isfile(out_file):
+                    dest = os.path.join(outdir, dxfname)
+                    shutil.move(out_file, dest)
+                    converted[path] = dest
+                else:
+                    errors[path] = message or 'dwgファイルを変換できませんでした．'
+
+        return converted, errors
+
+    def run(self, in_dir: str, out_dir: str) -> subprocess.CompletedProcess:
+        """ODA File Converter をフォルダ単位で実行する.
+
+        ODAFileConverter "入力フォルダ" "出力フォルダ" version type recurse audit filter
+        """
+        args = [self.exec_path, in_dir, out_dir, self.version, 'DXF', '0',
+                '1' if self.audit else '0', '*.DWG']
+
+        kwargs = {}
+        if platform.system() == 'Windows':
+            # ウィンドウを表示しない
+            startupinfo = subprocess.STARTUPINFO()
+            startupinfo.dwFlags = (subprocess.CREATE_NEW_CONSOLE
+                                   | subprocess.STARTF_USESHOWWINDOW)
+            startupinfo.wShowWindow = subprocess.SW_HIDE
+            kwargs['startupinfo'] = startupinfo
+
+        return subprocess.run(args, stdout=subprocess.PIPE,
+                              stderr=subprocess.PIPE, timeout=self.timeout,
+                              **kwargs)
+
+    @staticmethod
+    def link_file(src: str, dest: str):
+        """ファイルを作業フォルダに置く(可能ならハードリンク, 無理ならコピー)."""
+        try:
+            os.link(src, dest)
+        except OSError:
+            shutil.copyfile(src, dest)
@@ -7,6 +7,7 @@ Created on Wed Sep  6 16:37:41 2023.
 
 import ezdxf
 
+import os
 import re
 import matplotlib.pyplot as plt
 from ezdxf.addons.drawing import RenderContext, Frontend
@@ -16,10 +17,232 @@ from ezdxf.addons.drawing.properties import LayoutProperties
 import tkinter as tk
 import matplotlib.backends.backend_tkagg as tkplt
 
+from frames.viewport_index import ViewportIndex
+
+
+class RenderSession:
+    """1つのaxesに図面と重ねる図面を描画し, 描画したartistを管理するクラス.
+
+    元の図面のartistは図面ごとに保持し, 同じ図面を再表示する場合は
+    重ねる図面のartistだけを入れ替える. 別の図面を表示する場合はaxesを
+    クリアして古いartistを破棄する.
+
+    元の図面は表示範囲の周囲(MARGIN)と重なるエンティティだけを描画し,
+    1ピクセルより小さい文字とハッチングは省略する. 表示範囲が描画した範囲を
+    出た場合や拡大率がLOD_STEP倍以上変わった場合は update_view で描画しなおす.
+    """
+
+    # 表示範囲の外側に描画しておく範囲(表示範囲の幅・高さに対する割合)
+    MARGIN = 0.5
+
+    # 描画しなおす拡大率の変化
+    LOD_STEP = 2.0
+
+    def __init__(self, fig: plt.Figure, on_view_changed=None) -> None:
+        """イニシャライザ.
+
+        Parameters
+        ----------
+        fig : plt.Figure
+            描画先のfigure(axesを1つだけ作成する).
+        on_view_changed : callable, optional
+            axesの表示範囲が変わったときに呼ぶ関数(引数はaxes).
+
+        """
+        self.fig = fig
+        self.ax = fig.add_axes([0, 0, 1, 1])
+        self.on_view_changed = on_view_changed
+        self.base_key = None
+        self.base_doc = None
+        self.base_color = None
+        self.base_backend = None
+        self.base_artists = []
+        self.overlay_artists = []
+        self.overlay_zorders = []
+        self.index = None
+        self.rendered = None
+
+    @staticmethod
+    def doc_key(doc: ezdxf.document.Drawing) -> tuple:
+        """図面を識別するキーを返す.
+
+        ファイルから読み込んだ図面はパス, 更新日時, サイズで識別し,
+        読み込み直した同じファイルでも描画を再利用する.
+        """
+        try:
+            st = os.stat(doc.filename)
+        except (OSError, TypeError, ValueError):
+            return ('id', id(doc))
+        return (os.path.abspath(doc.filename), st.st_mtime_ns, st.st_size)
+
+    def draw(self, doc: ezdxf.document.Drawing,
+             overlay: ezdxf.document.Drawing | None, color: str) -> None:
+        """図面docとoverlayを描画する.
+
+        Parameters
+        ----------
+        doc : ezdxf.document.Drawing
+            元の図面.
+        overlay : ezdxf.document.Drawing | None
+            重ねる図面(検図結果).
+        color : str
+            図面の背景色.
+
+        """
+        # 重ねる図面は毎回描画しなおす
+        self.remove(self.overlay_artists)
+        self.overlay_artists = []
+
+        key = self.doc_key(doc)
+        if key != self.base_key:
+            # 別の図面はaxesをクリアして描画しなおす
+            self.ax.clear()
+            self.base_doc = doc
+            self.base_color = color
+            self.base_key = key
+            self.index = ViewportIndex(doc)
+
+            # 最初は図面全体を表示する
+            view = self.index.extents
+            self.base_backend = MatplotlibBackend(self.ax)
+            self.base_artists = self.render(
+                doc, color, overlay is None, self.base_backend,
+                self.__filter(view))
+            self.__connect()
+        elif overlay is None:
+            self.ax.autoscale(True)
+
+        # 重ねる図面は元の図面より前面に表示する
+        if overlay is not None:
+            self.overlay_artists = self.render(overlay, color, True)
+            self.overlay_zorders = [a.get_zorder()
+                                    for a in self.overlay_artists]
+            self.__lift_overlay()
+
+    def update_view(self) -> bool:
+        """表示範囲に合わせて元の図面を描画しなおす.
+
+        表示範囲が描画済みの範囲に収まり, 拡大率の変化が小さい場合は
+        何もしない.
+
+        Returns
+        -------
+        bool
+            描画しなおした場合は True.
+
+        """
+        if self.index is None or self.base_doc is None:
+            return False
+
+        xlim, ylim = self.ax.get_xlim(), self.ax.get_ylim()
+        view = (min(xlim), min(ylim), max(xlim), max(ylim))
+        if self.__covers(view):
+            return False
+
+        self.remove(self.base_artists)
+        self.base_artists = self.render(
+            self.base_doc, self.base_color, False, self.base_backend,
+            self.__filter(view))
+
+        # 描画でartistを追加しても表示範囲は変えない
+        self.ax.set_xlim(xlim)
+        self.ax.set_ylim(ylim)
+        self.__lift_overlay()
+        return True
+
+    def __filter(self, view):
+        """表示範囲viewの周囲で見えるエンティティを選ぶ関数を返す."""
+        if view is None:
+            self.rendered = None
+            return None
+
+        lft, btm, rgt, top = view
+        mx = (rgt - lft) * self.MARGIN
+        my = (top - btm) * self.MARGIN
+        region = (lft - mx, btm - my, rgt + mx, top + my)
+
+        box = self.ax.get_window_extent()
+        pixel = ViewportIndex.pixel_size(view, box.width, box.height)
+        self.rendered = (region, pixel)
+
+        visible = self.index.query(region, pixel)
+        return lambda entity: entity.dxf.handle in visible
+
+    def __covers(self, view) -> bool:
+        """描画済みの範囲と拡大率で表示範囲viewを表示できるか."""
+        if self.rendered is None:
+            return True
+
+        (lft, btm, rgt, top), pixel = self.rendered
+        box = self.ax.get_window_extent()
+        now = ViewportIndex.pixel_size(view, box.width, box.height)
+        if now <= 0 or not (pixel / self.LOD_STEP < now
+                            < pixel * self.LOD_STEP):
+            return False
+        return lft <= view[0] and btm <= view[1] \
+            and view[2] <= rgt and view[3] <= top
+
+    def __lift_overlay(self) -> None:
+        """重ねる図面のartistを元の図面のartistより前面にする."""
+        top = max((a.get_zorder() for a in self.base_artists), default=0)
+        for artist, z in zip(self.overlay_artists, self.overlay_zorders):
+            artist.set_zorder(z + top)
+
+    def __connect(self) -> None:
+        """表示範囲が変わったときの関数を登録する(axesのクリアで外れる)."""
+        if self.on_view_changed is not None:
+            self.ax.callbacks.connect('xlim_changed', self.on_view_changed)
+            self.ax.callbacks.connect('ylim_changed', self.on_view_changed)
+
+    def render(self, doc: ezdxf.document.Drawing, color: str,
+               finalize: bool, out: MatplotlibBackend | None = None,
+               filter_func=None) -> list:
+        """図面をaxesに描画し, 追加したartistのリストを返す.
+
+        outを指定した場合はそのbackend(文字のキャッシュ)を使いまわす.
+        filter_funcを指定した場合は関数が True を返すエンティティだけを描画する.
+        """
+        before = set(self.ax.get_children())
+
+        msp = doc.modelspace()
+        msp_properties = LayoutProperties.from_layout(msp)
+        msp_properties.set_colors(color)
+        if out is None:
+            out = MatplotlibBackend(self.ax)
+        Frontend(RenderContext(doc), out).draw_layout(
+            msp, finalize=finalize, filter_func=filter_func,
+            layout_properties=msp_properties)
+
+        return [a for a in self.ax.get_children() if a not in before]
+
+    @staticmethod
+    def remove(artists: list) -> None:
+        """artistをaxesから取り除く."""
+        for artist in artists:
+            try:
+                artist.remove()
+            except (ValueError, NotImplementedError):
+                pass
+
+    def clear(self) -> None:
+        """描画したものをすべて破棄する."""
+        self.ax.clear()
+        self.base_key = None
+        self.base_doc = None
+        self.base_backend = None
+        self.base_artists = []
+        self.overlay_artists = []
+        self.overlay_zorders = []
+        self.index = None
+        self.rendered = None
+
 
 class DxfPlotFrame(tk.Frame):
     """DXFをmatplotlibで表示するフレーム."""
 
+    # 表示範囲が変わってから描画しなおすまでの時間(ミリ秒)
+    VIEW_DELAY = 150
+
     def __init__(self,
                  master: tk.Tk | None = None,
                  doc: ezdxf.document.Drawing = ezdxf.new('R2018'),
@@ -43,9 +266,15 @@ class DxfPlotFrame(tk.Frame):
         # メンバの宣言
         super().__init__(master)
         self.doc = doc
+        self.overlay = None
         self.fig = plt.figure()
         self.color = color
 
+        # 描画は1つのaxesを使いまわす
+        # (拡大・移動したら表示範囲に合わせて描画しなおす)
+        self.session = RenderSession(self.fig, self.on_view_changed)
+        self.view_job = None
+
         # plt用canvasの作成
         self.fig_canvas = tkplt.FigureCanvasTkAgg(self.fig, master=self)
         self.plt_toolbar = tkplt.NavigationToolbar2Tk(self.fig_canvas, self)
@@ -56,15 +285,20 @@ class DxfPlotFrame(tk.Frame):
         self.update_plot()
 
     def update_plot(self,
-                    doc: ezdxf.document.Drawing | None = None) -> None:
+                    doc: ezdxf.document.Drawing | None = None,
+                    overlay: ezdxf.document.Drawing | None = None) -> None:
         """self.docの図面をpltに書き出す.
 
         docを指定した場合,表示する図面を差し替える.
+        overlayを指定した場合, 図面の上に重ねて表示する(docのみを指定した
+        場合は重ねる図面を外す).
 
         Parameters
         ----------
         doc : ezdxf.document.Drawing | None, optional
             変更先の図面. The default is None.
+        overlay : ezdxf.document.Drawing | None, optional
+            図面に重ねる図面(検図結果). The default is None.
 
         Returns
         -------
@@ -74,22 +308,43 @@ class DxfPlotFrame(tk.Frame):
         # モデルスペースの取得
         if doc is not None:
             self.doc = doc
+            self.overlay = overlay
+        elif overlay is not None:
+            self.overlay = overlay
 
-        msp = self.doc.modelspace()
-        msp_properties = LayoutProperties.from_layout(msp)
-
-        msp_properties.set_colors(self.color)
         self.fig_canvas.get_tk_widget().configure(bg=self.color)
 
-        ax = self.fig.add_axes([0, 0, 1, 1])
-        ctx = RenderContext(self.doc)
-        out = MatplotlibBackend(ax)
-        Frontend(ctx, out).draw_layout(msp, finalize=True,
-                                       layout_properties=msp_properties)
+        # 同じ図面の場合は重ねる図面だけを描画しなおす
+        self.session.draw(self.doc, self.overlay, self.color)
         self.fig_canvas.draw()
 
         self.refresh_plot()
 
+    def on_view_changed(self, ax) -> None:
+        """表示範囲が変わったときに描画しなおしを予約する.
+
+        拡大・移動中は何度も呼ばれるため, 最後の変更から VIEW_DELAY ミリ秒
+        後に1回だけ描画しなおす.
+        """
+        if self.view_job is not None:
+            self.after_cancel(self.view_job)
+        self.view_job = self.after(self.VIEW_DELAY, self.update_view)
+
+    def update_view(self) -> None:
+        """表示範囲に合わせて図面を描画しなおす."""
+        self.view_job = None
+        if self.session.update_view():
+            self.fig_canvas.draw_idle()
+
+    def destroy(self) -> None:
+        """フレームを破棄する(figureも閉じる)."""
+        if self.view_job is not None:
+            self.after_cancel(self.view_job)
+            self.view_job = None
+        self.session.clear()
+        plt.close(self.fig)
+        super().destroy()
+
     def refresh_plot(self):
         """更新したプロットを表示しなおす.
 
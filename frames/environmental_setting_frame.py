@@ -107,7 +107,8 @@ class EnvironmentalSettingFrame(tk.Frame):
         # print('path:', oda.win_exec_path)
         # print(is_installed)
 
-        if self.vconf.is_oda_path(oda_path):
+        # 以前に失敗したパスも選び直した場合は確認し直す
+        if self.vconf.is_oda_path(oda_path, reprobe=True):
             self.vconf.update_odapath(oda_path)
         self.set_odastatus()
 
@@ -15,6 +15,8 @@ from ezdxf.document import Drawing
 import ezdxf
 
 from frames.viewer_conf import ViewerConf
+from frames.conversion_cache import ConversionCache
+from frames.dwg_converter import DXF_VERSION
 from frames.frame_constants import Fontsize
 
 
@@ -51,16 +53,22 @@ class FileReader(tk.Frame):
     def browse_path(self):
         """パス指定."""
         filetype = [('DXFファイル', '*.dxf')]
-        if self.vconf.is_oda_installed:
+        # 確認中の場合も選択できるようにし, 読み込み時に確認結果を待つ
+        if self.vconf.oda_state is not False:
             filetype = [('図面ファイル', '*.dwg;*.dxf'), ('AutoCADファイル', '*.dwg'),
                         ('DXFファイル', '*.dxf')]
         file_path = filedialog.askopenfile(filetype=filetype)
         if file_path is not None:
             self._filepath.set(file_path.name)
 
-    def read_file(self) -> tuple[Drawing, str]:
-        """ファイルの読み込み."""
-        filepath = self._filepath.get()
+    def read_file(self, filepath: str | None = None) -> tuple[Drawing, str]:
+        """ファイルの読み込み.
+
+        filepathを指定しない場合は入力欄のパスを読み込む
+        (別スレッドから呼ぶ場合はメインスレッドで取得したパスを指定する).
+        """
+        if filepath is None:
+            filepath = self._filepath.get()
         text = ''
 
         # ファイル形式の確認
@@ -73,7 +81,7 @@ class FileReader(tk.Frame):
             # dwgの場合,ODAが入っていれば読み込み
             if self.vconf.is_oda_installed:
                 text = 'dwgファイルを読み込みました．'
-                self.doc = oda.readfile(filepath)
+                self.doc = self.read_dwg(filepath)
 
             else:
                 text = 'ODA File Converterが設定されていないため，\n'\
@@ -90,6 +98,24 @@ class FileReader(tk.Frame):
         # メッセージを返す.
         return self.doc, text
 
+    def read_dwg(self, filepath: str) -> Drawing:
+        """dwgファイルを読み込む.
+
+        変換済みのファイルがあれば ODA File Converter を使わずに読み込む.
+        """
+        cache = ConversionCache(self.vconf.cache_dirpath, oda.win_exec_path,
+                                DXF_VERSION)
+        cached = cache.get(filepath)
+        if cached is not None:
+            doc = ezdxf.readfile(cached)
+        else:
+            doc = oda.readfile(filepath, DXF_VERSION)
+            cache.put_doc(filepath, doc)
+
+        # oda.readfileと同じく元のファイル名を設定
+        doc.filename = os.path.splitext(filepath)[0] + '.dxf'
+        return doc
+
     @property
     def file_path(self):
         """ファイルパスを返す."""
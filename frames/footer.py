@@ -42,10 +42,16 @@ class Footer(tk.Frame):
                                    textvariable=self.algoname,
                                    padding=[10, 0], font=("", Fontsize.HEAD))
 
+        self.progress = tk.StringVar()
+        progress_label = ttk.Label(master=self,
+                                   textvariable=self.progress,
+                                   padding=[10, 0], font=("", Fontsize.HEAD))
+
         # ラベルの初期化
         self.update_footer()
 
         # 配置
+        progress_label.pack(side=tk.LEFT)
         odastate_label.pack(side=tk.RIGHT)
         filename_label.pack(side=tk.RIGHT)
         algoname_label.pack(side=tk.RIGHT)
@@ -78,12 +84,27 @@ class Footer(tk.Frame):
 
         self.algoname.set(form.format(basename))
 
+    def set_progress(self, stage: str = None):
+        """処理中の段階を表示.
+
+        指定がない場合は表示を消す.
+        """
+        form = '処理中: {}'
+        self.progress.set('' if stage is None else form.format(stage))
 
     def set_oda_state(self):
-        """ODAのインストール状況を表示する."""
+        """ODAのインストール状況を表示する.
+
+        確認が終わっていない場合は確認中と表示し, 終了後に表示を更新する.
+        """
         form = 'ODA: {}'
         state = '未設定'
 
-        if self.vconf.is_oda_installed:
+        self.vconf.start_oda_probe()
+        is_installed = self.vconf.oda_state
+        if is_installed is None:
+            state = '確認中'
+            self.after(200, self.set_oda_state)
+        elif is_installed:
             state = '設定済'
         self.odastate.set(form.format(state))
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""検図の処理を別スレッドで実行するモジュール.
+
+図面の読み込みや検図はメインスレッドとは別のスレッドで実行し,
+進捗や結果はキューを通してTkのメインスレッドで受け取る.
+Tkのウィジェットはメインスレッドからしか操作できないため,
+別スレッドの処理は report で通知するだけにする.
+"""
+
+import queue
+import threading
+import traceback
+
+import tkinter as tk
+
+
+class InspectionCancelled(Exception):
+    """処理が中止されたことを表す例外."""
+
+
+class InspectionJob:
+    """別スレッドで実行する1回分の処理の通知と中止の状態."""
+
+    def __init__(self):
+        """イニシャライザ."""
+        self.messages = queue.Queue()
+        self.cancelled = threading.Event()
+
+    def report(self, kind: str, *args) -> None:
+        """メインスレッドに通知する.
+
+        中止された場合は InspectionCancelled を送出して処理を終える.
+        """
+        self.check()
+        self.messages.put((kind, args))
+
+    def check(self) -> None:
+        """中止された場合は InspectionCancelled を送出する."""
+        if self.cancelled.is_set():
+            raise InspectionCancelled()
+
+    def cancel(self) -> None:
+        """処理の中止を要求する(次の report で終了する)."""
+        self.cancelled.set()
+
+
+class InspectionWorker:
+    """処理を別スレッドで実行し, 通知をメインスレッドの handler に渡すクラス.
+
+    handler(kind, *args) は report された通知のほか, 処理が終わった場合に
+    'done', 例外で終わった場合に 'error' (引数はトレースバック) で呼ばれる.
+    中止した処理の通知は捨てる.
+
+    Parameters
+    ----------
+    master : tk.Misc
+        after で通知を確認するウィジェット
+    handler : callable
+        通知を受け取る関数
+    """
+
+    # 通知を確認する間隔(ミリ秒)
+    POLL_INTERVAL = 50
+
+    def __init__(self, master: tk.Misc, handler):
+        """イニシャライザ."""
+        self.master = master
+        self.handler = handler
+        self.job = None
+        self.poll_job = None
+
+        # 中止した処理が終わるまで次の処理は待つ(検図のクラス変数を共有するため)
+        self.lock = threading.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        """処理中かを返す."""
+        return self.job is not None
+
+    def start(self, target) -> InspectionJob:
+        """target(job) を別スレッドで開始する(実行中の処理は中止する)."""
+        self.cancel()
+        job = InspectionJob()
+        self.job = job
+
+        def run():
+            with self.lock:
+                try:
+                    job.check()
+                    target(job)
+                    job.messages.put(('done', ()))
+                except InspectionCancelled:
+                    pass
+                except Exception:
+                    job.messages.put(('error', (traceback.format_exc(),)))
+
+        threading.Thread(target=run, daemon=True).start()
+        if self.poll_job is None:
+            self.poll_job = self.master.after(self.POLL_INTERVAL, self.__poll)
+        return job
+
+    def cancel(self) -> None:
+        """実行中の処理を中止する."""
+        if self.job is not None:
+            self.job.cancel()
+            self.job = None
+
+    def __poll(self) -> None:
+        """通知を handler に渡す."""
+        self.poll_job = None
+        job = self.job
+        while job is not None and self.job is job:
+            try:
+                kind, args = job.messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind in ('done', 'error'):
+                self.job = None
+            self.handler(kind, *args)
+
+        if self.job is not None and self.poll_job is None:
+            self.poll_job = self.master.after(self.POLL_INTERVAL, self.__poll)
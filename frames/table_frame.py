@@ -12,8 +12,53 @@ from tkinter import scrolledtext
 from frames.frame_constants import Fontsize
 
 
+class LazyRows:
+    """表示するときに要素を行の辞書に変換するデータ.
+
+    表の data に渡すと, 全ての行の辞書を先に作らずに済む.
+
+    Parameters
+    ----------
+    items : list
+        要素のリスト
+    convert : callable
+        要素を行の辞書(列名 -> 値)に変換する関数
+    """
+
+    def __init__(self, items: list, convert) -> None:
+        """イニシャライザ."""
+        self.items = items
+        self.convert = convert
+
+    def __len__(self) -> int:
+        """行数."""
+        return len(self.items)
+
+    def __getitem__(self, index: int) -> dict[str, any]:
+        """index行目の辞書."""
+        return self.convert(self.items[index])
+
+    def __iter__(self):
+        """行の辞書を順に返す."""
+        return (self.convert(item) for item in self.items)
+
+    def extend(self, items: list) -> None:
+        """要素を追加する."""
+        self.items.extend(items)
+
+
 class TableFrame(tk.Frame):
-    """表を作成するフレーム."""
+    """表を作成するフレーム.
+
+    データの行数が VIRTUAL_THRESHOLD より多い場合は, 表示される行数だけの
+    レコードを作成し, スクロールに合わせて値を入れ替える(仮想表示).
+    """
+
+    # 仮想表示にする行数
+    VIRTUAL_THRESHOLD = 500
+
+    # マウスホイール1回でスクロールする行数
+    WHEEL_ROWS = 3
 
     def __init__(self, master: tk.Tk | None = None,) -> None:
         """イニシャライザ.
@@ -56,8 +101,13 @@ class TableFrame(tk.Frame):
         self.master.bind("<<TreeviewSelect>>", self.select_record)
 
     def create_table(self, columns: tuple[str] = ('', '', ''),
-                     data: list[dict[str, any]] = None):
-        """列名とデータから表を作成する."""
+                     data: list[dict[str, any]] = None,
+                     virtual: bool | None = None):
+        """列名とデータから表を作成する.
+
+        dataは行の辞書のリスト(len と添字で行を取得できるもの).
+        virtualを指定しない場合は行数から仮想表示にするかを決める.
+        """
         self.tableset.destroy()
         self.tableset = tk.Frame(master=self.treeview_frame)
         self.tableset.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
@@ -73,19 +123,42 @@ class TableFrame(tk.Frame):
         self.table = ttk.Treeview(master=self.tableset,
                                   columns=self.columns,
                                   padding=(0, 0, 0, 0))
+        if virtual is None:
+            virtual = data is not None and len(data) > self.VIRTUAL_THRESHOLD
+        self.virtual = virtual
+        self.offset = 0         # 仮想表示の先頭の行
+        self.slots = 1          # 仮想表示のレコード数
+        self.selected = None    # 仮想表示で選択された行
+
         # スクロールバー作成
         y_sb = ttk.Scrollbar(self.tableset,
                              orient=tk.VERTICAL,
-                             command=self.table.yview)
+                             command=self.yview if self.virtual
+                             else self.table.yview)
         x_sb = ttk.Scrollbar(self.tableset,
                              orient=tk.HORIZONTAL,
                              command=self.table.xview)
-        self.table.configure(yscrollcommand=y_sb.set, xscrollcommand=x_sb.set)
+        self.y_sb = y_sb
+        if self.virtual:
+            # 縦のスクロールは表示する行を入れ替える
+            self.table.configure(xscrollcommand=x_sb.set)
+            self.table.bind('<Configure>', self.fit_rows)
+            self.table.bind('<MouseWheel>', self.on_wheel)
+            self.table.bind('<Button-4>', self.on_wheel)
+            self.table.bind('<Button-5>', self.on_wheel)
+            self.table.bind('<Up>', lambda e: self.move_selection(-1))
+            self.table.bind('<Down>', lambda e: self.move_selection(1))
+            self.table.bind('<Prior>', lambda e: self.move_selection(-self.slots))
+            self.table.bind('<Next>', lambda e: self.move_selection(self.slots))
+        else:
+            self.table.configure(yscrollcommand=y_sb.set,
+                                 xscrollcommand=x_sb.set)
         # 配置
         x_sb.pack(side=tk.BOTTOM, fill=tk.BOTH)
         y_sb.pack(side=tk.RIGHT, fill=tk.BOTH)
         self.table.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
 
+        self.data = []
         if data is not None:
             self.update_table(data)
 
@@ -142,6 +215,14 @@ class TableFrame(tk.Frame):
         for ele in self.table.get_children():
             self.table.delete(ele)
 
+        if self.virtual:
+            # 表示される行だけを作成する
+            self.offset = 0
+            self.selected = None
+            self.show_rows()
+            self.after_idle(self.fit_rows)
+            return
+
         # データの挿入
         for i, val in enumerate(self.data):
             # 値の抽出
@@ -152,6 +233,49 @@ class TableFrame(tk.Frame):
                               values=values,
                               tags=tag[i % 2])  # レコードの色を縞にする
 
+    def append_rows(self, rows: list) -> None:
+        """表の最後に行を追加する.
+
+        rowsは create_table の data と同じ種類の要素(LazyRows の場合は
+        変換前の要素)のリスト. 行数が VIRTUAL_THRESHOLD を超えた場合は
+        仮想表示に切り替える.
+        """
+        start = len(self.data)
+        self.data.extend(rows)
+
+        if self.virtual:
+            self.show_rows()
+            return
+        if len(self.data) > self.VIRTUAL_THRESHOLD:
+            self.switch_to_virtual(start)
+            return
+
+        # データの挿入
+        tag = ['even', 'odd']
+        for i in range(start, len(self.data)):
+            val = self.data[i]
+            values = [val[col] for col in self.columns]
+            self.table.insert(parent='',
+                              index='end',
+                              iid=i,
+                              values=values,
+                              tags=tag[i % 2])
+
+    def switch_to_virtual(self, shown: int) -> None:
+        """表示中の表を仮想表示で作り直す.
+
+        shownは作り直す前に表へ挿入していた行数. スクロール位置(先頭に
+        表示していた行)と選択していた行は仮想表示に引き継ぐ.
+        """
+        offset = int(round(self.table.yview()[0] * shown))
+        selection = self.table.selection()
+        selected = int(selection[0]) if len(selection) > 0 else None
+
+        self.create_table(self.columns, self.data, virtual=True)
+        self.offset = offset
+        self.selected = selected
+        self.show_rows()
+
     def select_record(self, event):
         """レコード選択時に実行される関数.
 
@@ -165,9 +289,20 @@ class TableFrame(tk.Frame):
         None.
 
         """
-        record_id = int(self.table.focus())
-        if record_id == '':
-            return
+        if self.virtual:
+            # 選択されたレコードに表示している行
+            selection = self.table.selection()
+            if len(selection) == 0:
+                return
+            record_id = self.offset + int(selection[0])
+            if record_id >= len(self.data):
+                return
+            self.selected = record_id
+        else:
+            record_id = self.table.focus()
+            if record_id == '':
+                return
+            record_id = int(record_id)
         # text = 'Number: {}\n'.format(record_id+1)
         text = ''
         for key, val in self.data[record_id].items():
@@ -175,6 +310,84 @@ class TableFrame(tk.Frame):
 
         self.print_message(text)
 
+    def show_rows(self) -> None:
+        """仮想表示で offset 行目から slots 行の値を表示する."""
+        count = len(self.data)
+        self.offset = max(0, min(self.offset, count - self.slots))
+        rows = range(self.offset, min(self.offset + self.slots, count))
+
+        # レコードの数を合わせる(iidは表示位置)
+        items = self.table.get_children()
+        for iid in items[len(rows):]:
+            self.table.delete(iid)
+        for slot in range(len(items), len(rows)):
+            self.table.insert(parent='', index='end', iid=slot)
+
+        tag = ['even', 'odd']
+        for slot, i in enumerate(rows):
+            val = self.data[i]
+            self.table.item(slot, values=[val[col] for col in self.columns],
+                            tags=tag[i % 2])
+
+        # 選択された行が表示されていれば選択状態にする
+        if self.selected is not None and self.selected in rows:
+            slot = self.selected - self.offset
+            self.table.selection_set(slot)
+            self.table.focus(slot)
+        elif len(self.table.selection()) > 0:
+            self.table.selection_set(())
+
+        if count == 0:
+            self.y_sb.set(0, 1)
+        else:
+            self.y_sb.set(self.offset / count,
+                          (self.offset + len(rows)) / count)
+
+    def fit_rows(self, event=None) -> None:
+        """仮想表示のレコード数を表の高さに合わせる."""
+        items = self.table.get_children()
+        bbox = self.table.bbox(items[0]) if len(items) > 0 else ''
+        if bbox == '':
+            return
+        top, height = bbox[1], bbox[3]
+        slots = max(1, (self.table.winfo_height() - top) // max(height, 1))
+        if slots != self.slots:
+            self.slots = slots
+            self.show_rows()
+
+    def yview(self, *args) -> None:
+        """仮想表示の縦スクロールバーの操作."""
+        count = len(self.data)
+        if args[0] == 'moveto':
+            self.offset = int(round(float(args[1]) * count))
+        elif args[0] == 'scroll':
+            step = self.slots if args[2] == 'pages' else 1
+            self.offset += int(args[1]) * step
+        self.show_rows()
+
+    def on_wheel(self, event) -> str:
+        """仮想表示のマウスホイールでのスクロール."""
+        if event.num == 4 or event.delta > 0:
+            self.offset -= self.WHEEL_ROWS
+        else:
+            self.offset += self.WHEEL_ROWS
+        self.show_rows()
+        return 'break'
+
+    def move_selection(self, step: int) -> str:
+        """仮想表示で選択する行をキー操作で移動する(表示範囲外ならスクロールする)."""
+        count = len(self.data)
+        if count == 0:
+            return 'break'
+        index = 0 if self.selected is None else self.selected + step
+        self.selected = max(0, min(index, count - 1))
+        if self.selected < self.offset:
+            self.offset = self.selected
+        elif self.selected >= self.offset + self.slots:
+            self.offset = self.selected - self.slots + 1
+        self.show_rows()
+        return 'break'
+
     def print_message(self, message):
         """テキストボックス内を消してから文字列を表示する."""
         self.text_box.config(state='normal')
@@ -7,6 +7,7 @@ Created on Mon Sep 18 16:27:33 2023.
 
 import configparser as conf
 import os
+import threading
 
 import ezdxf
 from ezdxf.addons import odafc as oda
@@ -20,6 +21,7 @@ class ViewerConf:
     confpath = dirpath + r'\conf.ini'
     test_dxfpath = dirpath + r'\test_drawing.dxf'
     oda_section = 'odapath'
+    probe_section = 'odaprobe'
 
     def __init__(self, confdir: str = None, initialize_conf: bool = False):
         """イニシャライザ."""
@@ -36,6 +38,13 @@ class ViewerConf:
         self.conf_file = conf.ConfigParser()
         self.conf_file.read(self.confpath, encoding='utf_8')
 
+        # ODAの確認処理(別スレッド)
+        self.probe_lock = threading.Lock()
+        self.probe_thread = None
+
+        # 利用できなかったパスと更新日時(保存せず, このセッションだけ覚える)
+        self.failed_probes = set()
+
     def create_conf(self):
         """初期設定のconfファイルを作成する."""
         # 設定ファイルの存在確認
@@ -77,6 +86,11 @@ class ViewerConf:
                 print()
                 print(e)
 
+    @property
+    def cache_dirpath(self) -> str:
+        """dwgファイルの変換結果を保存するフォルダ."""
+        return os.path.join(self.dirpath, 'dxf_cache')
+
     def save_conf(self):
         """設定の保存."""
         with open(self.confpath, 'w', encoding='utf_8') as file:
@@ -98,8 +112,43 @@ class ViewerConf:
         self.conf_file.set(self.oda_section, 'opt0', path)
         self.save_conf()
 
-    def is_oda_path(self, oda_path: str) -> bool:
-        """odaconverterのパスか確認する."""
+    def is_oda_path(self, oda_path: str, reprobe: bool = False) -> bool:
+        """odaconverterのパスか確認する.
+
+        利用できた結果はパスとファイルの更新日時をキーとしてconf.iniに保存し,
+        同じ実行ファイルであれば変換を行わずに利用可能とする.
+        失敗は一時的な場合があるため保存せず, このセッションの間だけ覚える.
+        reprobe が True の場合(パスを選び直した場合)は失敗したパスも確認し直す.
+        """
+        with self.probe_lock:
+            mtime = self.get_mtime(oda_path)
+            known = self.known_probe(oda_path, mtime)
+            if known is not None and not (reprobe and not known):
+                oda.win_exec_path = oda_path if known else ''
+                return known
+
+            is_installed = self.probe_oda_path(oda_path)
+
+            # 実行ファイルが存在し, 利用できた場合のみ結果を保存
+            self.failed_probes.discard((oda_path, mtime))
+            if not is_installed:
+                self.failed_probes.add((oda_path, mtime))
+            elif mtime is not None:
+                self.set_probe_cache(oda_path, mtime, is_installed)
+
+        return is_installed
+
+    def known_probe(self, oda_path: str, mtime: float | None) -> bool | None:
+        """保存された結果とこのセッションで失敗した結果を返す.
+
+        確認していない場合はNoneを返す.
+        """
+        if (oda_path, mtime) in self.failed_probes:
+            return False
+        return self.get_probe_cache(oda_path, mtime)
+
+    def probe_oda_path(self, oda_path: str) -> bool:
+        """テスト用ファイルを変換してodaconverterのパスか確認する."""
         oda.win_exec_path = oda_path
         is_installed = oda.is_installed()
 
@@ -119,8 +168,85 @@ class ViewerConf:
 
         return is_installed
 
+    @staticmethod
+    def get_mtime(path: str) -> float | None:
+        """ファイルの更新日時を返す(存在しない場合はNone)."""
+        try:
+            return os.path.getmtime(path)
+        except (OSError, ValueError):
+            return None
+
+    def get_probe_cache(self, oda_path: str, mtime: float | None) -> bool | None:
+        """保存された確認結果を返す.
+
+        パスまたは更新日時が異なる場合と, 利用できなかった結果(以前の版で
+        保存されたもの)はNoneを返す.
+        """
+        if mtime is None or not self.conf_file.has_section(self.probe_section):
+            return None
+
+        section = self.conf_file[self.probe_section]
+        if section.get('path') != oda_path:
+            return None
+        if section.get('mtime') != repr(mtime):
+            return None
+
+        if not section.getboolean('installed', fallback=False):
+            return None
+        return True
+
+    def set_probe_cache(self, oda_path: str, mtime: float, is_installed: bool):
+        """確認結果を保存する."""
+        if not self.conf_file.has_section(self.probe_section):
+            self.conf_file.add_section(self.probe_section)
+
+        self.conf_file.set(self.probe_section, 'path', oda_path)
+        self.conf_file.set(self.probe_section, 'mtime', repr(mtime))
+        self.conf_file.set(self.probe_section, 'installed', str(is_installed))
+        self.save_conf()
+
+    def start_oda_probe(self):
+        """設定されたodapathの確認を別スレッドで開始する.
+
+        確認済みの場合は何もしない.
+        """
+        if self.is_probing:
+            return
+
+        # 確認のスレッドが conf_file に書き込む間は読まない
+        odapath = self.get_odapath()
+        with self.probe_lock:
+            known = self.known_probe(odapath, self.get_mtime(odapath))
+        if known is not None:
+            return
+
+        self.probe_thread = threading.Thread(target=self.is_oda_path,
+                                             args=(odapath,), daemon=True)
+        self.probe_thread.start()
+
+    @property
+    def is_probing(self) -> bool:
+        """別スレッドで確認中かを返す."""
+        return self.probe_thread is not None and self.probe_thread.is_alive()
+
+    @property
+    def oda_state(self) -> bool | None:
+        """odaがインストールされているかを待たずに返す.
+
+        確認中の場合はNoneを返す.
+        """
+        if self.is_probing:
+            return None
+        return self.is_oda_installed
+
     @property
     def is_oda_installed(self):
-        """odaがインストールされているかを返す."""
+        """odaがインストールされているかを返す.
+
+        確認中の場合は終了を待つ.
+        """
+        if self.is_probing:
+            self.probe_thread.join()
+
         odapath = self.get_odapath()
         return self.is_oda_path(odapath)
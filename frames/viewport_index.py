@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""表示範囲に入るエンティティを探すモジュール.
+
+図面のエンティティの矩形を格子状の索引に登録しておき, 拡大・移動した
+表示範囲と重なるエンティティだけを描画できるようにする.
+縮小表示では1ピクセルより小さい文字やハッチングを省略する.
+"""
+
+import math
+import numpy as np
+
+from ezdxf.document import Drawing
+from inspector.bounding_box import BoundingBox
+
+
+class ViewportIndex:
+    """エンティティの矩形の格子状の索引.
+
+    Parameters
+    ----------
+    doc : Drawing
+        索引を作る図面
+    cells : int
+        図面の範囲を縦横それぞれいくつの格子に分けるか
+    """
+
+    # 縮小表示で省略する種類(文字は高さ, ハッチングは大きさで判定する)
+    TEXT_TYPES = ('TEXT', 'MTEXT')
+    HATCH_TYPES = ('HATCH',)
+
+    # この大きさ(ピクセル)より小さいものは省略する
+    MIN_PIXELS = 1.0
+
+    # 登録する格子の数の上限(これより大きいエンティティは常に候補にする)
+    MAX_CELLS = 64
+
+    def __init__(self, doc: Drawing, cells: int = 64):
+        """イニシャライザ."""
+        self.cells = cells
+        self.handles: list[str] = []
+        bbs = []
+        kinds = []
+        for entity, bb in BoundingBox.EntityBBs(doc):
+            self.handles.append(entity.dxf.handle)
+            kinds.append(entity.dxftype())
+            # 矩形がないものは常に表示する
+            bbs.append((-math.inf, -math.inf, math.inf, math.inf)
+                       if bb is None else bb)
+
+        self.bbox = np.array(bbs, dtype=float).reshape(len(bbs), 4)
+        self.is_text = np.isin(np.array(kinds, dtype=object),
+                               self.TEXT_TYPES)
+        self.is_hatch = np.isin(np.array(kinds, dtype=object),
+                                self.HATCH_TYPES)
+        self.extents = BoundingBox.DrawingBB(doc)
+        self.__build()
+
+    def __len__(self) -> int:
+        """エンティティの数."""
+        return len(self.handles)
+
+    def __build(self) -> None:
+        """エンティティを重なる格子に登録する."""
+        self.grid: dict[tuple[int, int], np.ndarray] = {}
+        self.large = np.arange(len(self), dtype=np.int64)
+        if self.extents is None:
+            return
+
+        lft, btm, rgt, top = self.extents
+        self.cell_w = max(rgt - lft, 1e-9) / self.cells
+        self.cell_h = max(top - btm, 1e-9) / self.cells
+
+        grid = {}
+        large = []
+        for i, bb in enumerate(self.bbox):
+            if not np.all(np.isfinite(bb)):
+                large.append(i)
+                continue
+            ix0, iy0, ix1, iy1 = self.__cell_range(bb)
+            if (ix1 - ix0 + 1) * (iy1 - iy0 + 1) > self.MAX_CELLS:
+                large.append(i)
+                continue
+            for ix in range(ix0, ix1 + 1):
+                for iy in range(iy0, iy1 + 1):
+                    grid.setdefault((ix, iy), []).append(i)
+
+        self.grid = {k: np.array(v, dtype=np.int64) for k, v in grid.items()}
+        self.large = np.array(large, dtype=np.int64)
+
+    def __cell_range(self, rect) -> tuple[int, int, int, int]:
+        """矩形(Left, Bottom, Right, Top)と重なる格子の範囲."""
+        lft, btm = self.extents[0], self.extents[1]
+        last = self.cells - 1
+
+        def clamp(v):
+            return min(max(int(math.floor(v)), 0), last)
+
+        return (clamp((rect[0] - lft) / self.cell_w),
+                clamp((rect[1] - btm) / self.cell_h),
+                clamp((rect[2] - lft) / self.cell_w),
+                clamp((rect[3] - btm) / self.cell_h))
+
+    def candidates(self, view) -> np.ndarray:
+        """表示範囲viewと重なる可能性があるエンティティの番号."""
+        if self.extents is None or len(self.grid) == 0:
+            return np.arange(len(self), dtype=np.int64)
+
+        ix0, iy0, ix1, iy1 = self.__cell_range(view)
+
+        # 図面の大部分が表示される場合は全てを候補にする
+        if (ix1 - ix0 + 1) * (iy1 - iy0 + 1) * 4 >= self.cells ** 2:
+            return np.arange(len(self), dtype=np.int64)
+
+        found = [self.large]
+        for ix in range(ix0, ix1 + 1):
+            for iy in range(iy0, iy1 + 1):
+                if (ix, iy) in self.grid:
+                    found.append(self.grid[(ix, iy)])
+        return np.unique(np.concatenate(found))
+
+    def query(self, view, pixel: float) -> set[str]:
+        """表示するエンティティのハンドルの集合を返す.
+
+        Parameters
+        ----------
+        view : tuple
+            表示範囲 (Left, Bottom, Right, Top)
+        pixel : float
+            1ピクセルの図面上の大きさ(これより小さい文字等は省略する)
+        """
+        index = self.candidates(view)
+        bb = self.bbox[index]
+        lft, btm, rgt, top = view
+        hit = (bb[:, 0] <= rgt) & (lft <= bb[:, 2]) \
+            & (bb[:, 1] <= top) & (btm <= bb[:, 3])
+
+        # 縮小表示で見えない文字とハッチング
+        with np.errstate(invalid='ignore'):
+            w = bb[:, 2] - bb[:, 0]
+            h = bb[:, 3] - bb[:, 1]
+        small = pixel * self.MIN_PIXELS
+        hidden = (self.is_text[index] & (np.minimum(w, h) < small)) \
+            | (self.is_hatch[index] & (np.maximum(w, h) < small))
+
+        return {self.handles[i] for i in index[hit & ~hidden]}
+
+    @staticmethod
+    def pixel_size(view, width: float, height: float) -> float:
+        """表示範囲viewを width x height ピクセルに表示する場合の1ピクセルの大きさ.
+
+        縦横比を保って表示するため, 縦横で大きい方を返す.
+        """
+        lft, btm, rgt, top = view
+        return max((rgt - lft) / max(width, 1.0),
+                   (top - btm) / max(height, 1.0))
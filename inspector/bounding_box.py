@@ -9,13 +9,74 @@ from ezdxf.entities import Arc, Circle, Dimension, Insert, Leader, Line, LWPolyl
 from ezdxf.entities import MText, Point, Text
 from ezdxf.entities.dxfgfx import DXFGraphic # Entity のベースクラス
 from ezdxf.document import Drawing
+from ezdxf import bbox
+from itertools import islice
 from math import pi, sin, cos
+import threading
+import weakref
+
+
+class DrawingExtents:
+    
+    '''
+    Drawing のモデルスペースの矩形領域を保持するクラス
+    Entity ごとの矩形をハンドルで覚えておき、追加された Entity だけを計算して更新する
+    (BoundingBox が doc をキーにした弱参照の辞書で保持するため、doc 自体は参照しない)
+    '''
+    def __init__( self ):
+        self.bbs = {}       # ハンドル -> 矩形(矩形がない場合は None)
+        self.count = 0      # 計算済みの Entity の数
+        self.bb = None      # 全体の矩形
+        self.cache = bbox.Cache()   # ブロック等の矩形のキャッシュ
+        
+    def update( self, doc : Drawing ):
+        '''
+        doc に前回から追加された Entity の矩形を合わせて、全体の矩形を返す
+        Entity が削除されていた場合は覚えている矩形を使って全体を計算し直す
+        '''
+        msp = doc.modelspace()
+        if len(msp) < self.count:
+            self.count = 0
+            self.bb = None
+        
+        for entity in islice( msp, self.count, None ):
+            self.bb = BoundingBox.Union( self.bb, self.entityBB( entity ) )
+        self.count = len(msp)
+        
+        return None if self.bb is None else list(self.bb)
+    
+    def entityBB( self, entity : DXFGraphic ):
+        '''
+        Entity の矩形(ハンドルごとに1回だけ計算する)
+        '''
+        handle = entity.dxf.handle
+        if handle is not None and handle in self.bbs:
+            return self.bbs[handle]
+        
+        bb = BoundingBox.extentsBB( entity, self.cache )
+        if handle is not None:
+            self.bbs[handle] = bb
+        return bb
+    
+    def clear( self ):
+        '''
+        覚えている矩形を消す(Entity を移動・変更した場合に使う)
+        '''
+        self.bbs.clear()
+        self.count = 0
+        self.bb = None
+        self.cache = bbox.Cache()
+
 
 class BoundingBox:
     
     EntityClasses = [Arc, Circle, Dimension, Insert, Leader, Line, LWPolyline, MText, Point, Text]
     __warning = False
     
+    # Drawing ごとの DrawingExtents
+    __extents = weakref.WeakKeyDictionary()
+    __lock = threading.Lock()
+    
     '''
     Entity からその矩形領域を計算するだけのクラス
     '''
@@ -23,30 +84,76 @@ class BoundingBox:
     def DrawingBB( cls, doc : Drawing ):
         '''
         Drawwing の矩形領域(Left, Bottom, Right, Top)を求める
+        モデルスペースを1回走査し、結果は doc ごとに保持して追加された Entity だけ計算し直す
         '''
-
-        draw_bb = None
-        mds = doc.modelspace()
-        for ec in cls.EntityClasses:
-            for entity in mds.query(ec.__name__ ):
-
-                bb = cls.getBB(entity)
-                if bb is None:
-                    continue
-                
-                elif draw_bb is None:
-                    draw_bb = [ v for v in bb ]
-                    
-                else:
-                    draw_bb[0] = min( draw_bb[0], bb[0] ) # Left
-                    draw_bb[1] = min( draw_bb[1], bb[1] ) # Bottom
-                    draw_bb[2] = max( draw_bb[2], bb[2] ) # Right
-                    draw_bb[3] = max( draw_bb[3], bb[3] ) # Top
-
-        return draw_bb
+        with cls.__lock:
+            return cls.__extentsOf( doc ).update( doc )
+    
+    
+    @classmethod
+    def EntityBBs( cls, doc : Drawing ):
+        '''
+        モデルスペースの Entity とその矩形領域の組のリストを返す
+        矩形は DrawingBB と共有して、計算済みの Entity は計算しなおさない
+        '''
+        with cls.__lock:
+            extents = cls.__extentsOf( doc )
+            extents.update( doc )
+            return [ ( entity, extents.entityBB( entity ) ) for entity in doc.modelspace() ]
+    
+    
+    @classmethod
+    def __extentsOf( cls, doc : Drawing ):
+        '''
+        doc の DrawingExtents (なければ作る)
+        '''
+        extents = cls.__extents.get( doc )
+        if extents is None:
+            extents = DrawingExtents()
+            cls.__extents[doc] = extents
+        return extents
+    
+    
+    @classmethod
+    def Invalidate( cls, doc : Drawing ):
+        '''
+        doc の矩形領域の計算結果を捨てる(Entity を移動・変更した場合に使う)
+        '''
+        with cls.__lock:
+            cls.__extents.pop( doc, None )
+    
+    
+    @classmethod
+    def extentsBB( cls, entity : DXFGraphic, cache = None ):
+        '''
+        Entity の矩形領域を求める
+        個別に計算できない Entity (ブロック挿入、寸法線、文字等)は ezdxf.bbox で求める
+        '''
+        class_name = entity.__class__.__name__
+        if class_name in cls.__simple:
+            return cls.__simple[class_name]( entity )
+        
+        ext = bbox.extents( [entity], fast=True, cache=cache )
+        if not ext.has_data:
+            return None
+        return ext.extmin.x, ext.extmin.y, ext.extmax.x, ext.extmax.y
                 
         
 
+    @staticmethod
+    def Union( *bbs ):
+        '''
+        矩形領域(Left, Bottom, Right, Top)を合わせた矩形を求める
+        None の矩形は無視する
+        '''
+        bbs = [ bb for bb in bbs if bb is not None ]
+        if len(bbs) == 0:
+            return None
+
+        return [ min( bb[0] for bb in bbs ), min( bb[1] for bb in bbs ),
+                 max( bb[2] for bb in bbs ), max( bb[3] for bb in bbs ) ]
+
+
     @classmethod
     def getBB( cls, entity : DXFGraphic ):
         '''
@@ -108,20 +215,23 @@ class BoundingBox:
         if stAdeg > edAdeg:
             edAdeg += 360.0
     
+        # 円弧が角度 deg の点を通るか(360°を超える場合も調べる)
+        passes = lambda deg: stAdeg < deg < edAdeg or stAdeg < deg + 360.0 < edAdeg
+    
         lft = min(stP[0], edP[0])
-        if stAdeg < 180.0 and 180.0 < edAdeg:
+        if passes(180.0):
             lft = cx - r
             
         rgt = max(stP[0], edP[0])
-        if stAdeg < 360.0 and 360.0 < edAdeg:
+        if passes(0.0):
             rgt = cx + r;
         
         top = max(stP[1], edP[1]);
-        if stAdeg < 90.0 and 90.0 < edAdeg:
+        if passes(90.0):
             top = cy + r
             
-        btm = min(stP[0], edP[0]);
-        if stAdeg < 270.0 and 270.0 < edAdeg:
+        btm = min(stP[1], edP[1]);
+        if passes(270.0):
             btm = cy - r;
     
         return lft, btm, rgt, top
@@ -144,28 +254,22 @@ class BoundingBox:
         '''
         Dimension(寸法線)の矩形
         '''
-        # TODO
-        if BoundingBox.__warning:
-            print( "Dimension の Bounding Box 取得は実装されていない")
-        return None
+        return BoundingBox.extentsBB( dimension )
     
     def __getInsertBB( insert: Insert ):
         '''
         Insert(ブロック挿入)の矩形
         '''
-        #TODO
-        if BoundingBox.__warning:
-            print( "Insert の Bounding Box 取得は実装されていない")
-        return None
+        return BoundingBox.extentsBB( insert )
         
     
     def __getLeaderBB( leader: Leader ):
         '''
         Leader(引出線)の矩形
         '''
-        xmin = xmax = leader.dxf.vertices[0][0]
-        ymin = ymax = leader.dxf.vertices[0][1]
-        for v in leader.dxf.vertexes:
+        xmin = xmax = leader.vertices[0][0]
+        ymin = ymax = leader.vertices[0][1]
+        for v in leader.vertices:
             xmin = min(xmin, v[0])
             xmax = max(xmax, v[0])
             ymin = min(ymin, v[1])
@@ -216,11 +320,9 @@ class BoundingBox:
     
     def __getMTextBB( mtext: MText ):
         '''
-        MLine(マルチライン)の矩形
+        MText(マルチテキスト)の矩形
         '''
-        if BoundingBox.__warning:
-            print( "Mline の Bounding Box 取得は実装されていない")
-        return None
+        return BoundingBox.extentsBB( mtext )
     
     
     def __getPointBB( point: Point ):
@@ -236,12 +338,15 @@ class BoundingBox:
         '''
         Text(テキスト)の矩形
         '''
-        if BoundingBox.__warning:
-            print( "Text の Bounding Box 取得は実装されていない")
-        return None
-        
-    
-    
-    
+        return BoundingBox.extentsBB( txt )
+
 
-        
\ No newline at end of file
+    # 個別に計算する Entity (クラス名 -> 矩形を求める関数)
+    __simple = {
+        'Arc': __getArcBB,
+        'Circle': __getCircleBB,
+        'Leader': __getLeaderBB,
+        'Line': __getLineBB,
+        'LWPolyline': __getLWPolylineBB,
+        'Point': __getPointBB,
+        }
@@ -7,10 +7,12 @@ Created on Tue Nov  7 15:42:23 2023.
 import math
 from math import sin, cos
 from ezdxf.document import Drawing
+from ezdxf.math import Vec3
 from typing import Any
 from .check_base import CheckBase
 from .draw_tool import DrawTool
 from .check_result import CheckResult
+from .geometry_snapshot import GeometrySnapshot
 
 
 class CheckArc(CheckBase):
@@ -30,24 +32,21 @@ class CheckArc(CheckBase):
         
         
         # 図面の処理
-        data = [ent.dxfattribs() for ent in doc.modelspace().query('ARC')]
+        geometry = GeometrySnapshot.get(doc, **Option)
+        arcs = geometry.arcs
+        data = [(Vec3(c), r, st, ed) for c, r, st, ed in
+                zip(arcs.center.tolist(), arcs.radius.tolist(),
+                    arcs.start_angle.tolist(), arcs.end_angle.tolist())]
 
         # 図面描画
-        for d in data:
-            c = d['center']
-            r = d['radius']
-            st = d['start_angle']
-            ed = d['end_angle']
-            DrawTool.Arc( draw_doc, c, r, st, ed, color=color, width=1 )
+        with DrawTool.Batch( draw_doc, scale=geometry.scale ) as draw:
+            for c, r, st, ed in data:
+                draw.Arc( c, r, st, ed, color=color, width=1 )
             
         # 結果
         results = []
         num = 1
-        for d in data:
-            c = d['center']
-            r = d['radius']
-            st = d['start_angle']
-            ed = d['end_angle']
+        for c, r, st, ed in data:
             mid = (st+ed)/2 if st<ed else (st+ed+360)/2
             mid *= math.pi/180
             res = CheckResult(
@@ -6,12 +6,30 @@ Created on Tue Oct 31 14:44:32 2023.
 """
 
 import ezdxf
-from typing import Any
+from typing import Any, Iterable, Iterator
 from ezdxf.document import Drawing
 from .check_result import CheckResult
 from .draw_tool import DrawTool
 
 
+class DrawCommand:
+    """検図結果を描画する処理.
+
+    描画用図面を第1引数にとる関数(DrawTool のメソッド等)と残りの引数を保持し,
+    apply で描画用図面に描画する.
+    """
+
+    def __init__(self, func, *args, **kwargs):
+        """イニシャライザ."""
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def apply(self, draw_doc: Drawing):
+        """draw_doc に描画する."""
+        return self.func(draw_doc, *self.args, **self.kwargs)
+
+
 class CheckBase:
     """検図アルゴリズムのベースクラス."""
 
@@ -20,7 +38,49 @@ class CheckBase:
 
     # 処理内容の説明
     inspect_str: str = 'ベースクラスが表示されています.'
-    
+
+    @classmethod
+    def inspect_stream(cls, doc: Drawing,
+                       **Option: dict[str, Any]) -> Iterator[CheckResult | DrawCommand]:
+        """図面docを検図し, 見つかった順に CheckResult と DrawCommand を返す.
+
+        結果を見つけるたびに返す検図はこのメソッドを実装し, inspect_doc は
+        CheckBase.collect で結果をまとめる.
+        実装していない検図は inspect_doc を重ね合わせ用図面に実行し,
+        その図面を取り込む DrawCommand と結果を返す.
+
+        Parameters
+        ----------
+        doc : Drawing
+            検図を行うオリジナル図面.
+        **Option: dict[str, Any]
+            枠線等の追加情報.
+
+        Yields
+        ------
+            CheckResult または DrawCommand
+
+        """
+        overlay = DrawTool.OverlayDoc(doc)
+        overlay, results = cls.inspect_doc(doc, overlay, **Option)
+        yield DrawCommand(DrawTool.MergeOverlay, overlay)
+        yield from results
+
+    @staticmethod
+    def collect(stream: Iterable[CheckResult | DrawCommand], draw_doc: Drawing):
+        """inspect_stream の結果をまとめる.
+
+        DrawCommand は draw_doc に描画し, inspect_doc と同じく draw_doc と
+        CheckResult のリストを返す.
+        """
+        results = []
+        for item in stream:
+            if isinstance(item, DrawCommand):
+                item.apply(draw_doc)
+            else:
+                results.append(item)
+        return draw_doc, results
+
     @staticmethod
     def inspect_doc(doc: Drawing, draw_doc: Drawing, **Option: dict[str, Any]):
         """図面docを検図し，図面draw_docに検図結果を描画し，
@@ -6,10 +6,12 @@ Created on Tue Nov  7 15:41:24 2023.
 """
 
 from ezdxf.document import Drawing
+from ezdxf.math import Vec3
 from typing import Any
 from .check_base import CheckBase
 from .draw_tool import DrawTool
 from .check_result import CheckResult
+from .geometry_snapshot import GeometrySnapshot
 
 
 class CheckCircle(CheckBase):
@@ -28,21 +30,21 @@ class CheckCircle(CheckBase):
         color = 1 # red
 
         # 図面の処理
-        data = [ent.dxfattribs() for ent in doc.modelspace().query('CIRCLE')]
+        geometry = GeometrySnapshot.get(doc, **Option)
+        circles = geometry.circles
+        data = [(Vec3(c), r) for c, r in
+                zip(circles.center.tolist(), circles.radius.tolist())]
 
         # 図面描画
-        for d in data:
-            c = d['center']
-            r = d['radius']
-            DrawTool.Circle( draw_doc, c, r, color=color, width=1 )
+        with DrawTool.Batch( draw_doc, scale=geometry.scale ) as draw:
+            for c, r in data:
+                draw.Circle( c, r, color=color, width=1 )
 
         # 結果
         results = []
         num = 1
         rt2 = 1.41421 # root2
-        for d in data:
-            c = d['center']
-            r = d['radius']
+        for c, r in data:
             res = CheckResult(
                 num = num,
                 checkType = CheckCircle.inspect_name,
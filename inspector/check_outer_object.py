@@ -1,5 +1,6 @@
 import ezdxf
 import math
+import numpy as np
 
 from ezdxf.math import Vec3
 from ezdxf.document import Drawing
@@ -8,6 +9,7 @@ from .check_base import CheckBase
 from .frame_extractor import Frame_extractor_result as FrameResult
 from .check_result import CheckResult
 from .draw_tool import DrawTool
+from .geometry_snapshot import GeometrySnapshot
 
 
 class CheckOuterObject(CheckBase):
@@ -26,7 +28,7 @@ class CheckOuterObject(CheckBase):
         fresult: FrameResult = Option["frameresult"]
 
         # 検出処理
-        detect = Detect(doc, draw_doc, fresult.framePoint)
+        detect = Detect(doc, draw_doc, fresult.framePoint, Option.get("geometry"))
         
         return draw_doc, detect.results
 
@@ -36,12 +38,21 @@ class CheckOuterObject(CheckBase):
 class Detect:
     """枠線検出のアルゴリズムクラス"""
 
-    def __init__(self, doc: Drawing, draw_doc: Drawing, framePoint: list[Vec3]):
+    def __init__(self, doc: Drawing, draw_doc: Drawing, framePoint: list[Vec3],
+                 geometry: GeometrySnapshot | None = None):
         self.doc = doc
 
+        # 図面の形状(検図間で共有されていればそれを使う)
+        if geometry is None:
+            geometry = GeometrySnapshot.from_doc(doc)
+        self.geometry = geometry
+
+        # polylineは図面を変更せずに分解し，分解した線分も検出対象にする
+        virtualEntities = []
         polyLines = self.doc.modelspace().query("LW POLYLINE")
         for polyLine in polyLines:
-            polyLine.explode()
+            virtualEntities.extend(polyLine.virtual_entities())
+        self.virtual = GeometrySnapshot(virtualEntities)
 
         self.framePoint = framePoint
         self.count = 0
@@ -69,6 +80,14 @@ class Detect:
             print("枠線外にオブジェクトが存在しませんでした")
     
 
+    def groups(self, name: str) -> list:
+        """図面のエンティティと分解した線分から種類が一致する配列を返す
+
+        explodeした場合と同じく，分解した線分は図面のエンティティの後ろに並べる
+        """
+        return [getattr(self.geometry, name), getattr(self.virtual, name)]
+
+
     def pointOutOfRange(self, point):
         """ある点が枠線外に存在するか確認"""
         tol = 5
@@ -81,66 +100,50 @@ class Detect:
         return False
 
 
+    def pointsOutOfRange(self, points):
+        """点の配列のうち枠線外に存在するものの添字を返す"""
+        tol = 5
+        out = GeometrySnapshot.out_of_range(points, self.framePoint[0], self.framePoint[1], tol)
+        return np.flatnonzero(out)
+
+
     def detectPoint(self):
         """POINTを検出"""
-        points = self.doc.modelspace().query("POINT")
-
-        if len(points) == 0:
-            return
-        
-        for point in points:
-            location = point.dxf.location
-            if self.pointOutOfRange(location):
-                self.res(location, '点', "点が輪郭線外に存在します")
+        for points in self.groups("points"):
+            for i in self.pointsOutOfRange(points.location):
+                self.res(Vec3(points.location[i].tolist()), '点', "点が輪郭線外に存在します")
 
 
     def detectLines(self):
         """LINEを検出"""
-        lines = self.doc.modelspace().query("LINE")
+        for lines in self.groups("lines"):
+            middles = (lines.start + lines.end) / 2
 
-        if len(lines) == 0: 
-            return 
-
-        for line in lines:
-            start = line.dxf.start
-            end = line.dxf.end
-            middle = (start + end) / 2
-
-            if self.pointOutOfRange(middle):
-                # self.doc.modelspace().add_circle(middle, 20, dxfattribs = None)
-                self.res(middle, '直線', '直線が枠外に存在します')
+            for i in self.pointsOutOfRange(middles):
+                self.res(Vec3(middles[i].tolist()), '直線', '直線が枠外に存在します')
 
    
     def detectCircles(self):
         """CIRCLEを検出"""
-        circles = self.doc.modelspace().query("CIRCLE")
-
-        if len(circles) == 0: 
-            return
-
-        for circle in circles:
-            center = circle.dxf.center
-            r = circle.dxf.radius
-            
-            if self.pointOutOfRange(center):
+        for circles in self.groups("circles"):
+            for i in self.pointsOutOfRange(circles.center):
+                center = Vec3(circles.center[i].tolist())
+                r = float(circles.radius[i])
                 head = center + Vec3(r * math.cos(math.pi / 4), r * math.sin(math.pi / 4), 0)
                 self.res(head, '円', '円が枠外に存在します')
                 
     
     def detectArc(self):
         """ARCを検出"""
-        arcs = self.doc.modelspace().query("ARC")
-
-        if len(arcs) == 0: 
-            return
-        
-        for arc in arcs:
-            center = arc.dxf.center
-            r = arc.dxf.radius
-            if self.pointOutOfRange(center):
-                middle_angle = (arc.dxf.end_angle - arc.dxf.start_angle) / 2
-
-                if arc.dxf.start_angle > arc.dxf.end_angle:
+        for arcs in self.groups("arcs"):
+            for i in self.pointsOutOfRange(arcs.center):
+                center = Vec3(arcs.center[i].tolist())
+                r = float(arcs.radius[i])
+                start_angle = float(arcs.start_angle[i])
+                end_angle = float(arcs.end_angle[i])
+                middle_angle = (end_angle - start_angle) / 2
+
+                if start_angle > end_angle:
                     middle_angle = 0
 
                 head = center + Vec3(r * math.cos(math.radians(middle_angle)), r * math.sin(math.radians(middle_angle)), 0)
@@ -149,25 +152,15 @@ class Detect:
 
     def detectText(self):
         """TEXTを検出"""
-        texts = self.doc.modelspace().query("TEXT")
-
-        if len(texts) == 0:
-            return
-
-        for text in texts:
-            if self.pointOutOfRange(text.get_placement()[1]):
-                self.res(text.get_placement()[1], '文字', "文字が枠外に存在します")
+        for texts in self.groups("texts"):
+            for i in self.pointsOutOfRange(texts.placement):
+                self.res(Vec3(texts.placement[i].tolist()), '文字', "文字が枠外に存在します")
     
     def detectDimension(self):
         """DIMENSIONを検出"""
-        dimensions = self.doc.modelspace().query("DIMENSION")
-        
-        if len(dimensions) == 0:
-            return
-        
-        for dimension in dimensions:
-            if self.pointOutOfRange(dimension.dxf.text_midpoint):
-                self.res(dimension.dxf.text_midpoint, '寸法線', '寸法線が枠外に存在します')
+        for dimensions in self.groups("dimensions"):
+            for i in self.pointsOutOfRange(dimensions.text_midpoint):
+                self.res(Vec3(dimensions.text_midpoint[i].tolist()), '寸法線', '寸法線が枠外に存在します')
 
     def res(self, pos: Vec3, caption: str, desc: str):
         self.count += 1
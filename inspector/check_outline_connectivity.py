@@ -1,6 +1,9 @@
 # import tkinter as tk
 import ezdxf
 import math
+import numpy as np
+
+from itertools import repeat
 
 from ezdxf.math import Vec3
 from ezdxf.entities import Line, Circle, Arc
@@ -22,6 +25,12 @@ class CheckOutlineConnectivity(CheckBase):
     @staticmethod
     def inspect_doc(doc: Drawing, draw_doc: Drawing, **Option: dict[str, Any]):
         """外形線の接続性を確認"""
+        stream = CheckOutlineConnectivity.inspect_stream(doc, **Option)
+        return CheckBase.collect(stream, draw_doc)
+
+    @classmethod
+    def inspect_stream(cls, doc: Drawing, **Option: dict[str, Any]):
+        """外形線の接続性を確認し, 接続性が不足している線を見つけるたびに結果を返す"""
 
         fresult: FrameResult = Option['frameresult']
 
@@ -32,14 +41,12 @@ class CheckOutlineConnectivity(CheckBase):
         continuousLines: list[ezdxf.entities] = ExtractContinuouslines.extract(doc)
         print(f'len(continuous): {continuousLines}')
         
-        # 交点抽出
+        # 交点抽出(左から順に求め，交点の数が確定した外形線から確認する)
         intersections: Intersection = Intersection(continuousLines)
-        print(intersections.outLines.values())
         
         number = 1
         color = 7
-        results = []
-        for entity, cntList in intersections.outLines.items():
+        for entity, cntList in intersections.finished():
             if not CheckOutlineConnectivity.isInFrame(entity, fresult):
                 continue
 
@@ -65,7 +72,7 @@ class CheckOutlineConnectivity(CheckBase):
                         desc = desc,
                         color = color
                     )
-                    results.append(res)
+                    yield res
                     number += 1
                 elif cntList[0] == 0:
                     caption = '余計な線です'
@@ -79,7 +86,7 @@ class CheckOutlineConnectivity(CheckBase):
                         desc = desc,
                         color = color
                     )
-                    results.append(res)
+                    yield res
                     number += 1
             
             elif entity.dxftype() == 'ARC':
@@ -96,7 +103,7 @@ class CheckOutlineConnectivity(CheckBase):
                         desc = desc,
                         color = color
                     )
-                    results.append(res)
+                    yield res
                     number += 1
                 elif cntList[0] == 0:
                     caption = '余計な線です'
@@ -110,7 +117,7 @@ class CheckOutlineConnectivity(CheckBase):
                         desc = desc,
                         color = color
                     )
-                    results.append(res)
+                    yield res
                     number += 1
 
             elif entity.dxftype() == 'CORCLE':
@@ -127,13 +134,11 @@ class CheckOutlineConnectivity(CheckBase):
                         desc = desc,
                         color = color
                     )
-                    results.append(res)
+                    yield res
                     number += 1
 
 
-        print(f'len(reuslts): {len(results)}')
-
-        return draw_doc, results
+        print(f'len(reuslts): {number - 1}')
     
     @staticmethod
     def isInFrame(entity, fresult):
@@ -192,7 +197,26 @@ class ExtractContinuouslines:
 
 
 class Intersection:
-    """図面内の外形線のみの交点を求めるクラス"""
+    """図面内の外形線のみの交点を求めるクラス
+
+    交点は外接矩形の左端の順に CHUNK_SIZE 個ずつ求め，交点の数が確定した外形線から返す(finished)
+    """
+
+    # 一度に掃引するエンティティの数
+    CHUNK_SIZE: int = 256
+
+    # 交点を求める dxftype の順(組 (A, B) の A はこの順で前のもの)
+    DXFTYPES: tuple[str] = ('LINE', 'CIRCLE', 'ARC')
+
+    # dxftype の組ごとの交点計算メソッド
+    INTER_METHODS: dict[tuple[str, str]: str] = {
+        ('LINE', 'LINE'): 'getInterLineAndLine',
+        ('LINE', 'CIRCLE'): 'getInterCircleAndLine',
+        ('LINE', 'ARC'): 'getInterLineAndArc',
+        ('CIRCLE', 'CIRCLE'): 'getInterCircleAndCircle',
+        ('CIRCLE', 'ARC'): 'getInterCircleAndArc',
+        ('ARC', 'ARC'): 'getInterArcAndArc',
+    }
 
     def __init__(self, continuousLines: list[ezdxf.entities]):
         #すべての交点をまとめるリスト
@@ -210,12 +234,104 @@ class Intersection:
             else:
                 self.dict[entity.dxftype()].append(entity)
 
-        self.getInterLineAndLine()
-        self.getInterCircleAndLine()
-        self.getInterLineAndArc()
-        self.getInterCircleAndCircle()
-        self.getInterCircleAndArc()
-        self.getInterArcAndArc()
+        # 交差判定の前に外接矩形で候補を絞り込む(広域判定)
+        self.boxes: dict[ezdxf.entities: tuple[float]] = {}
+        margin = Calculator.TOL * 4
+        for dxftype in Intersection.DXFTYPES:
+            for entity in self.dict.get(dxftype, []):
+                self.boxes[entity] = Intersection.getBoundingBox(entity, margin)
+
+        # 交点計算用の座標配列(BatchCalculator 用)
+        self.lineArray = BatchCalculator.lineArrays(self.dict.get('LINE', []))
+        self.circleArray = BatchCalculator.circleArrays(self.dict.get('CIRCLE', []))
+        self.arcArray = BatchCalculator.arcArrays(self.dict.get('ARC', []))
+
+        # 交点を求める組み合わせのある外形線を，総当たりと同じ順序で登録する
+        lines, circles, arcs = (self.dict.get(dxftype, []) for dxftype in Intersection.DXFTYPES)
+        if len(lines) >= 2:
+            self.registerOutLines(lines)
+        if len(lines) > 0 and len(circles) > 0:
+            self.registerOutLines(lines, circles)
+        if len(lines) > 0 and len(arcs) > 0:
+            self.registerOutLines(lines, arcs)
+        if len(circles) >= 2:
+            self.registerOutLines(circles)
+        if len(circles) > 0 and len(arcs) > 0:
+            self.registerOutLines(circles, arcs)
+        if len(arcs) >= 2:
+            self.registerOutLines(arcs)
+
+        # 掃引するエンティティ(dxftype 順)と，その dxftype ごとのインデックス
+        self.entities: list[ezdxf.entities] = lines + circles + arcs
+        self.index: list[tuple[str, int]] = [(dxftype, i) for dxftype in Intersection.DXFTYPES
+                                             for i in range(len(self.dict.get(dxftype, [])))]
+
+    def finished(self):
+        """交点を左から順に求め，交点の数が確定した外形線とその数 outLines[entity] を返す
+
+        外接矩形が掃引位置より左で終わる外形線は，以降のエンティティと交わらないため数が確定する
+        すべて返し終えると outLines と points は総当たりで求めた場合と同じになる
+        """
+        boxes = [self.boxes[entity] for entity in self.entities]
+        for pairs, closed in SweepAndPrune.sweep(boxes, Intersection.CHUNK_SIZE):
+            self.getInter(pairs)
+            for k in closed:
+                entity = self.entities[k]
+                if entity in self.outLines:
+                    yield entity, self.outLines[entity]
+
+    @staticmethod
+    def getBoundingBox(entity: Union[Line, Circle, Arc], margin: float) -> tuple[float]:
+        """エンティティの外接矩形(left, bottom, right, top)を許容誤差分広げて返す
+
+        円弧は円として扱う(交点は必ずこの矩形内にある)
+        """
+        if entity.dxftype() == 'LINE':
+            start: Vec3 = entity.dxf.start
+            end: Vec3 = entity.dxf.end
+            return (min(start.x, end.x) - margin, min(start.y, end.y) - margin,
+                    max(start.x, end.x) + margin, max(start.y, end.y) + margin)
+
+        center: Vec3 = entity.dxf.center
+        r: float = abs(entity.dxf.radius) + margin
+        return (center.x - r, center.y - r, center.x + r, center.y + r)
+
+    def getInter(self, pairs: list[tuple[int, int]]):
+        """掃引で見つかった組(self.entities のインデックス)の交点を dxftype の組ごとにまとめて求める"""
+        groups: dict[tuple[str, str]: list[tuple[int, int]]] = {}
+        for i, j in pairs:
+            typeA, a = self.index[i]
+            typeB, b = self.index[j]
+            groups.setdefault((typeA, typeB), []).append((a, b))
+
+        for types, group in groups.items():
+            getattr(self, Intersection.INTER_METHODS[types])(group)
+
+    def countBatchInter(self, entitiesA: list, entitiesB: list, pairs: list[tuple[int, int]], mask: np.ndarray, points: np.ndarray, circleMask: np.ndarray = None):
+        """BatchCalculator の結果を組ごとの交点の集合にして数える
+
+        交点のない組は countInter で何も数えないため飛ばす
+        円弧を含む組は circleMask (円としての交点)を指定し，Calculator と同じく円としての交点の集合から
+        円弧上の点を選び直して集合を作る(countInter は集合の先頭の点を使うため，集合の順序も合わせる)
+        """
+        for k in np.flatnonzero(mask.any(axis=1)):
+            i, j = pairs[k]
+            pointSet = {Vec3(points[k, m]) for m in np.flatnonzero(mask[k])}
+            if circleMask is not None:
+                circleSet = {Vec3(points[k, m]) for m in np.flatnonzero(circleMask[k])}
+                pointSet = {point for point in circleSet if point in pointSet}
+            self.countInter(entitiesA[i], entitiesB[j], pointSet)
+            self.points.update(pointSet)
+
+    def registerOutLines(self, *entityLists: list):
+        """総当たりで比較していたエンティティを，総当たりと同じ順序で登録する
+
+        交点を持たないエンティティも [0, 0] として outLines に残すため
+        """
+        for entities in entityLists:
+            for entity in entities:
+                if not entity in self.outLines.keys():
+                    self.outLines[entity] = [0, 0]
 
     def countInter(self, A: Union[Line, Circle, Arc], B: Union[Line, Circle, Arc], pointSet: set):
         def isRange(endpoint, pointVec, v):
@@ -301,101 +417,105 @@ class Intersection:
 
 
     
-    def getInterLineAndLine(self):
-        """図面内の直線同士の交点を求める"""
-        try:
-            lines: list[Line] = self.dict.get('LINE')
-            print(len(lines))
-            for i in range(len(lines)):
-                for j in range(i + 1, len(lines)):
-                    pointSet = Calculator.calInterLineAndLine(lines[i], lines[j])
-                    self.countInter(lines[i], lines[j], pointSet)
-                    self.points.update(pointSet)
-        except KeyError as e:
-            print(f'{e}: 直線が存在しません')
-        except IndexError as e:
-            print(f'{e}: 直線が一本しかありません')
+    def getInterLineAndLine(self, pairs: list[tuple[int, int]]):
+        """直線同士の組 pairs の交点を求める"""
+        lines: list[Line] = self.dict['LINE']
+        I, J = BatchCalculator.pairIndices(pairs)
+        starts, ends = self.lineArray
+        mask, points = BatchCalculator.calInterLineAndLine(starts[I], ends[I], starts[J], ends[J])
+        self.countBatchInter(lines, lines, pairs, mask, points)
         
         
-    def getInterCircleAndLine(self):
-        """図面内の直線と円の交点を求める"""
-        try:
-            lines: list[Line] = self.dict.get('LINE')
-            circles: list[Circle] = self.dict.get('CIRCLE')
-
-            for line in lines:
-                for circle in circles:
-                    pointSet = Calculator.calInterCircleAndLine(line, circle)
-                    self.countInter(line, circle, pointSet)
-                    self.points.update(pointSet)
-        except KeyError as e:
-            print(f'{e}: 直線または円が存在しません')
+    def getInterCircleAndLine(self, pairs: list[tuple[int, int]]):
+        """直線と円の組 pairs の交点を求める"""
+        lines: list[Line] = self.dict['LINE']
+        circles: list[Circle] = self.dict['CIRCLE']
+        I, J = BatchCalculator.pairIndices(pairs)
+        starts, ends = self.lineArray
+        centers, radii = self.circleArray
+        mask, points = BatchCalculator.calInterCircleAndLine(starts[I], ends[I], centers[J], radii[J])
+        self.countBatchInter(lines, circles, pairs, mask, points)
 
     
-    def getInterLineAndArc(self):
-        """図面内の直線と円弧の交点を求める"""
-        try:
-            lines: list[Line] = self.dict.get('LINE')
-            arcs: list[Arc] = self.dict.get('ARC')
-        
-            for line in lines:
-                for arc in arcs:
-                    pointSet = Calculator.calInterArcAndLine(line, arc)
-                    self.countInter(line, arc, pointSet)
-                    self.points.update(pointSet)
-        except KeyError as e:
-            print(f'{e}: 直線または円弧が存在しません')
+    def getInterLineAndArc(self, pairs: list[tuple[int, int]]):
+        """直線と円弧の組 pairs の交点を求める"""
+        lines: list[Line] = self.dict['LINE']
+        arcs: list[Arc] = self.dict['ARC']
+        I, J = BatchCalculator.pairIndices(pairs)
+        starts, ends = self.lineArray
+        mask, points, circleMask = BatchCalculator.calInterArcAndLine(starts[I], ends[I], *(a[J] for a in self.arcArray))
+        self.countBatchInter(lines, arcs, pairs, mask, points, circleMask)
 
     
-    def getInterCircleAndCircle(self):
-        """図面内の円同士の交点を求める"""
-        try:
-            circles: list[Circle] = self.dict.get('CIRCLE')
-
-            for i in range(len(circles)):
-                for j in range(i + 1, len(circles)):
-                    pointSet = Calculator.calInterCircleAndCircle(circles[i], circles[j])
-                    self.countInter(circles[i], circles[j], pointSet)
-                    self.points.update(pointSet)
-        except KeyError as e:
-            print(f'{e}: 円が存在しません')
-        except IndexError as e:
-            print(f'{e}: 円が１つしかありません')
-
-
-    def getInterCircleAndArc(self):
-        """図面内の円と円弧の交点を求める"""
-        try:
-            circles: list[Circle] = self.dict.get('CIRCLE')
-            arcs: list[Arc] = self.dict.get('ARC')
-
-            for circle in circles:
-                for arc in arcs:
-                    pointSet = Calculator.calInterCircleAndArc(circle, arc)
-                    self.countInter(circle, arc, pointSet)
-                    self.points.update(pointSet)
-        except KeyError as e:
-            print(f'{e}: 円または円弧が存在しません')
+    def getInterCircleAndCircle(self, pairs: list[tuple[int, int]]):
+        """円同士の組 pairs の交点を求める"""
+        circles: list[Circle] = self.dict['CIRCLE']
+        I, J = BatchCalculator.pairIndices(pairs)
+        centers, radii = self.circleArray
+        mask, points = BatchCalculator.calInterCircleAndCircle(centers[I], radii[I], centers[J], radii[J])
+        self.countBatchInter(circles, circles, pairs, mask, points)
+
+
+    def getInterCircleAndArc(self, pairs: list[tuple[int, int]]):
+        """円と円弧の組 pairs の交点を求める"""
+        circles: list[Circle] = self.dict['CIRCLE']
+        arcs: list[Arc] = self.dict['ARC']
+        I, J = BatchCalculator.pairIndices(pairs)
+        centers, radii = self.circleArray
+        mask, points, circleMask = BatchCalculator.calInterCircleAndArc(centers[I], radii[I], *(a[J] for a in self.arcArray))
+        self.countBatchInter(circles, arcs, pairs, mask, points, circleMask)
             
     
-    def getInterArcAndArc(self):
-        """図面内の円弧同士の交点を求める"""
-        try:
-            arcs: list[Arc] = self.dict.get('ARC')
-
-            for i in range(len(arcs)):
-                for j in range(i + 1, len(arcs)):
-                    pointSet = Calculator.calInterArcAndArc(arcs[i], arcs[j])
-                    self.countInter(arcs[i], arcs[j], pointSet)
-                    self.points.update(pointSet)
-        except KeyError as e:
-            print(f'{e}: 円弧が存在しません')
-        except IndexError as e:
-            print(f'{e}: 円弧が１つしかありません')
+    def getInterArcAndArc(self, pairs: list[tuple[int, int]]):
+        """円弧同士の組 pairs の交点を求める"""
+        arcs: list[Arc] = self.dict['ARC']
+        I, J = BatchCalculator.pairIndices(pairs)
+        mask, points, circleMask = BatchCalculator.calInterArcAndArc(*(a[I] for a in self.arcArray), *(a[J] for a in self.arcArray))
+        self.countBatchInter(arcs, arcs, pairs, mask, points, circleMask)
             
 
 
 
+class SweepAndPrune:
+    """外接矩形の重なりをx軸方向の掃引で求めるクラス(交点計算の広域判定)"""
+
+    @staticmethod
+    def sweep(boxes: list[tuple[float]], chunkSize: int):
+        """矩形(left, bottom, right, top)を左端の順に chunkSize 個ずつ掃引する
+
+        chunkSize 個ごとに (新たに見つかった重なる組 (i, j) (i < j) のリスト,
+        以降のどの矩形とも重ならなくなった矩形のインデックスのリスト) を返す
+        最後にまだ掃引中の矩形を返すため，すべての矩形はちょうど1回ずつ返る
+        """
+        order = sorted(range(len(boxes)), key=lambda i: (boxes[i][0], i))
+
+        active = []
+        for start in range(0, len(order), chunkSize):
+            pairs = []
+            closed = []
+            for index in order[start:start + chunkSize]:
+                box = boxes[index]
+                left = box[0]
+
+                # 右端が現在の左端より左にある矩形は，以降の矩形とも重ならない
+                remain = []
+                for k in active:
+                    (remain if boxes[k][2] >= left else closed).append(k)
+                active = remain
+
+                for k in active:
+                    target = boxes[k]
+                    if target[1] <= box[3] and box[1] <= target[3]:
+                        pairs.append((min(index, k), max(index, k)))
+
+                active.append(index)
+
+            yield pairs, closed
+
+        yield [], active
+
+
+
 class DummyCircle:
     """ダミー円を作成するクラス"""
     def __init__(self, center: Vec3, radius: float):
@@ -679,6 +799,266 @@ class Calculator:
             
 
 
+class BatchCalculator:
+    """交点をまとめて求める計算処理クラス(Calculator の NumPy 版)
+
+    座標は (n, 3) の配列，半径と角度は (n,) の配列で受け取り，
+    引数の同じ行同士を1組として n 組をまとめて計算する
+    交点は (n, m, 3) の配列，交点の有無は (n, m) のマスクで返す(m は組あたりの最大交点数)
+    許容誤差は Calculator.TOL を用い，判定は Calculator の各メソッドと同じ
+    """
+
+    @staticmethod
+    def lineArrays(lines: list[Line]) -> tuple[np.ndarray, np.ndarray]:
+        """直線のリストから始点と終点の配列を作る"""
+        starts = np.array([tuple(line.dxf.start) for line in lines], dtype=float).reshape(-1, 3)
+        ends = np.array([tuple(line.dxf.end) for line in lines], dtype=float).reshape(-1, 3)
+        return starts, ends
+
+    @staticmethod
+    def circleArrays(circles: list[Union[Circle, DummyCircle]]) -> tuple[np.ndarray, np.ndarray]:
+        """円のリストから中心と半径の配列を作る"""
+        centers = [c.center if isinstance(c, DummyCircle) else c.dxf.center for c in circles]
+        radii = [c.radius if isinstance(c, DummyCircle) else c.dxf.radius for c in circles]
+        return np.array([tuple(c) for c in centers], dtype=float).reshape(-1, 3), np.array(radii, dtype=float)
+
+    @staticmethod
+    def arcArrays(arcs: list[Arc]) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """円弧のリストから中心，半径，開始角，終了角の配列を作る"""
+        centers, radii = BatchCalculator.circleArrays(arcs)
+        startAngles = np.array([arc.dxf.start_angle for arc in arcs], dtype=float)
+        endAngles = np.array([arc.dxf.end_angle for arc in arcs], dtype=float)
+        return centers, radii, startAngles, endAngles
+
+    @staticmethod
+    def pairIndices(pairs: list[tuple[int, int]]) -> tuple[np.ndarray, np.ndarray]:
+        """組み合わせのリストをインデックスの配列2つに分ける"""
+        indices = np.array(pairs, dtype=np.intp).reshape(-1, 2)
+        return indices[:, 0], indices[:, 1]
+
+    @staticmethod
+    def magnitude(v: np.ndarray) -> np.ndarray:
+        """ベクトルの長さ"""
+        return np.sqrt(v[:, 0] * v[:, 0] + v[:, 1] * v[:, 1] + v[:, 2] * v[:, 2])
+
+    @staticmethod
+    def crossZ(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """外積のz成分"""
+        return a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]
+
+    @staticmethod
+    def atan2(y: np.ndarray, x: np.ndarray) -> np.ndarray:
+        """math.atan2 と同じ値の角度(rad)
+
+        np.arctan2 は最下位ビットが math.atan2 と異なることがあり，
+        交点の集合や角度の境界の判定が Calculator と変わるため使わない
+        """
+        return np.fromiter(map(math.atan2, y.tolist(), x.tolist()), dtype=float, count=len(y))
+
+    @staticmethod
+    def pow2(x: np.ndarray) -> np.ndarray:
+        """math.pow(x, 2) と同じ値の2乗
+
+        math.pow は x * x と最下位ビットが異なることがあるため，Calculator に合わせる
+        """
+        return np.fromiter(map(math.pow, x.tolist(), repeat(2)), dtype=float, count=len(x))
+
+    @staticmethod
+    def isClose(a: np.ndarray, b: np.ndarray, rel_tol: float, abs_tol: float = 1e-12) -> np.ndarray:
+        """全成分が math.isclose と同じ判定で近いか"""
+        close = np.abs(a - b) <= np.maximum(rel_tol * np.maximum(np.abs(a), np.abs(b)), abs_tol)
+        return close.all(axis=1)
+
+    @staticmethod
+    def isParallel(va: np.ndarray, vb: np.ndarray, rel_tol: float) -> np.ndarray:
+        """Vec3.is_parallel と同じ判定"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            v1 = va * (1.0 / BatchCalculator.magnitude(va))[:, None]
+            v2 = vb * (1.0 / BatchCalculator.magnitude(vb))[:, None]
+        return BatchCalculator.isClose(v1, v2, rel_tol) | BatchCalculator.isClose(v1, -v2, rel_tol)
+
+    @staticmethod
+    def calRangePointAndLine(points: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """点と直線の距離"""
+        va = ends - starts
+        vAsP = points - starts
+        with np.errstate(divide='ignore', invalid='ignore'):
+            d = BatchCalculator.crossZ(va, vAsP) / BatchCalculator.magnitude(va)
+        return np.abs(d)
+
+    @staticmethod
+    def isOnLine(points: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """点が直線上にあるかどうか"""
+        tol = Calculator.TOL
+        distance = BatchCalculator.calRangePointAndLine(points, starts, ends)
+        lower = np.minimum(starts, ends) - tol
+        upper = np.maximum(starts, ends) + tol
+        inRange = (lower[:, :2] <= points[:, :2]) & (points[:, :2] <= upper[:, :2])
+        return (distance <= tol) & inRange.all(axis=1)
+
+    @staticmethod
+    def isOnArc(points: np.ndarray, centers: np.ndarray, radii: np.ndarray, startAngles: np.ndarray, endAngles: np.ndarray) -> np.ndarray:
+        """点が円弧上にあるかどうか"""
+        vcp = points - centers
+        avcp = np.degrees(BatchCalculator.atan2(vcp[:, 1], vcp[:, 0]))
+        onCircle = ~(BatchCalculator.magnitude(vcp) - radii > Calculator.TOL)
+
+        # 角度がマイナスの時プラスに変換
+        avcp = np.where(avcp < 0, avcp + 360, avcp)
+
+        # 円弧が360°をまたがっているとき
+        across = startAngles >= endAngles
+        inAcross = (startAngles <= avcp) & (avcp <= 360) | (0 <= avcp) & (avcp <= endAngles)
+        inArc = (startAngles <= avcp) & (avcp <= endAngles)
+
+        return onCircle & np.where(across, inAcross, inArc)
+
+    @staticmethod
+    def areOverlapped(centers1: np.ndarray, radii1: np.ndarray, centers2: np.ndarray, radii2: np.ndarray) -> np.ndarray:
+        """円同士(または円と円弧)が重複しているか"""
+        isConcentricCircle = BatchCalculator.magnitude(centers1 - centers2) <= Calculator.TOL
+        isOmetric = np.abs(radii1 - radii2) <= Calculator.TOL
+        return isConcentricCircle & isOmetric
+
+    @staticmethod
+    def areOverlappedArcAndArc(centers1, radii1, startAngles1, endAngles1, centers2, radii2, startAngles2, endAngles2) -> np.ndarray:
+        """円弧同士が重複しているか"""
+        def isIn(angle):
+            across = (startAngles1 <= angle) & (angle <= 360) | (0 <= angle) & (angle <= endAngles1)
+            inside = (startAngles1 <= angle) & (angle <= endAngles1)
+            return np.where(startAngles1 > endAngles1, across, inside)
+
+        overlapped = BatchCalculator.areOverlapped(centers1, radii1, centers2, radii2)
+        return overlapped & (isIn(startAngles2) | isIn(endAngles2))
+
+    @staticmethod
+    def calInterLineAndLine(startsA: np.ndarray, endsA: np.ndarray, startsB: np.ndarray, endsB: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """直線同士の交点(組あたり最大1点)"""
+        va = endsA - startsA
+        vb = endsB - startsB
+        vba = -(startsB - startsA)
+        bxa = BatchCalculator.crossZ(vb, va)
+
+        valid = (BatchCalculator.magnitude(va) != 0) & (BatchCalculator.magnitude(vb) != 0)
+        valid &= ~BatchCalculator.isParallel(va, vb, Calculator.TOL)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ta = BatchCalculator.crossZ(vba, vb) / bxa
+            vt = ta[:, None] * va + startsA
+
+        mask = valid & BatchCalculator.isOnLine(vt, startsA, endsA) & BatchCalculator.isOnLine(vt, startsB, endsB)
+        return mask[:, None], vt[:, None, :]
+
+    @staticmethod
+    def calInterCircleAndLine(starts: np.ndarray, ends: np.ndarray, centers: np.ndarray, radii: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """円と直線の交点(組あたり最大2点)"""
+        vL = ends - starts
+        vLsC = centers - starts
+        lenvL = BatchCalculator.magnitude(vL)
+        lenvLsC = BatchCalculator.magnitude(vLsC)
+
+        # 二次方程式のパラメータと判別式
+        pow2 = BatchCalculator.pow2
+        a = pow2(lenvL)
+        b = -2 * (vL[:, 0] * vLsC[:, 0] + vL[:, 1] * vLsC[:, 1] + vL[:, 2] * vLsC[:, 2])
+        c = pow2(lenvLsC) - pow2(radii)
+        D = pow2(b) - 4 * a * c
+
+        # 直線と円の中心の距離で交点の数を算出(重解なら1点)
+        distance = BatchCalculator.calRangePointAndLine(centers, starts, ends)
+        isTangent = np.abs(distance - radii) < Calculator.TOL
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sqrtD = np.sqrt(np.where(D > 0, D, 0))
+            t = np.stack([np.where(isTangent, -b / (2 * a), (-b + sqrtD) / (2 * a)),
+                          (-b - sqrtD) / (2 * a)], axis=1)
+        candidate = np.stack([isTangent | (D > 0), ~isTangent & (D > 0)], axis=1)
+        candidate &= (lenvL != 0)[:, None]
+
+        # 交点の位置を確認
+        points = t[:, :, None] * vL[:, None, :] + starts[:, None, :]
+        mask = np.zeros(candidate.shape, dtype=bool)
+        for m in range(2):
+            mask[:, m] = candidate[:, m] & BatchCalculator.isOnLine(points[:, m], starts, ends)
+
+        return mask, points
+
+    @staticmethod
+    def calInterCircleAndCircle(centers1: np.ndarray, radii1: np.ndarray, centers2: np.ndarray, radii2: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """円と円の交点(組あたり最大2点)"""
+        tol = Calculator.TOL
+        overlapped = BatchCalculator.areOverlapped(centers1, radii1, centers2, radii2)
+
+        # 中心同士を結ぶベクトル
+        vC1C2 = centers2 - centers1
+        lenvC1C2 = BatchCalculator.magnitude(vC1C2)
+
+        # 中心間の距離で場合分け
+        deltaR = lenvC1C2 - (radii1 + radii2)
+        deltaG = lenvC1C2 - np.abs(radii1 - radii2)
+        apart = (deltaR > 2 * tol) | (deltaG < 2 * tol)
+        touch = ~apart & ((np.abs(deltaR) <= 2 * tol) | (np.abs(deltaG) <= 2 * tol))
+        cross = ~apart & ~touch
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Vec3 の除算は逆数の乗算
+            e1 = vC1C2 * (1.0 / lenvC1C2)[:, None]
+
+            # 円同士が接しているとき
+            inter = centers1 + e1 * (radii1 + tol)[:, None]
+
+            # 円同士が２点で交わっているとき(余弦定理)
+            pow2 = BatchCalculator.pow2
+            costheta = (pow2(radii1) + pow2(lenvC1C2) - pow2(radii2)) / (2 * radii1 * lenvC1C2)
+            rc = radii1 * costheta
+            rs = np.sqrt(pow2(radii1) - pow2(rc))
+
+        # e1を90°反時計回りに回転したベクトル
+        angle = BatchCalculator.atan2(e1[:, 1], e1[:, 0]) + math.radians(90)
+        length = np.hypot(e1[:, 0], e1[:, 1])
+        e2 = np.stack([np.cos(angle) * length, np.sin(angle) * length, e1[:, 2]], axis=1)
+
+        base = centers1 + rc[:, None] * e1
+        points = np.stack([np.where(touch[:, None], inter, base + rs[:, None] * e2),
+                           base - rs[:, None] * e2], axis=1)
+        mask = np.stack([touch | cross, cross], axis=1) & ~overlapped[:, None]
+
+        return mask, points
+
+    @staticmethod
+    def calInterArcAndLine(starts, ends, centers, radii, startAngles, endAngles) -> tuple[np.ndarray, np.ndarray]:
+        """円弧と直線の交点(円弧を円として計算し，円弧上の点だけ残す)
+
+        円としての交点のマスクも返す
+        """
+        circleMask, points = BatchCalculator.calInterCircleAndLine(starts, ends, centers, radii)
+        mask = circleMask.copy()
+        for m in range(mask.shape[1]):
+            mask[:, m] &= BatchCalculator.isOnArc(points[:, m], centers, radii, startAngles, endAngles)
+        return mask, points, circleMask
+
+    @staticmethod
+    def calInterCircleAndArc(centers1, radii1, centers2, radii2, startAngles, endAngles) -> tuple[np.ndarray, np.ndarray]:
+        """円と円弧の交点(円としての交点のマスクも返す)"""
+        circleMask, points = BatchCalculator.calInterCircleAndCircle(centers1, radii1, centers2, radii2)
+        mask = circleMask.copy()
+        for m in range(mask.shape[1]):
+            mask[:, m] &= BatchCalculator.isOnArc(points[:, m], centers2, radii2, startAngles, endAngles)
+        return mask, points, circleMask
+
+    @staticmethod
+    def calInterArcAndArc(centers1, radii1, startAngles1, endAngles1, centers2, radii2, startAngles2, endAngles2) -> tuple[np.ndarray, np.ndarray]:
+        """円弧同士の交点(円としての交点のマスクも返す)"""
+        overlapped = BatchCalculator.areOverlappedArcAndArc(centers1, radii1, startAngles1, endAngles1,
+                                                            centers2, radii2, startAngles2, endAngles2)
+        circleMask, points = BatchCalculator.calInterCircleAndCircle(centers1, radii1, centers2, radii2)
+        mask = circleMask.copy()
+        for m in range(mask.shape[1]):
+            mask[:, m] &= BatchCalculator.isOnArc(points[:, m], centers1, radii1, startAngles1, endAngles1)
+            mask[:, m] &= BatchCalculator.isOnArc(points[:, m], centers2, radii2, startAngles2, endAngles2)
+        mask &= ~overlapped[:, None]
+        return mask, points, circleMask
+
+
 
 
 def test():
@@ -688,6 +1068,8 @@ def test():
     continuous = ExtractContinuouslines.extract(doc)
     
     intersections = Intersection(continuous)
+    for _ in intersections.finished():
+        pass
 
     print(intersections.outLines)
 
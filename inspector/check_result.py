@@ -11,6 +11,9 @@ class CheckResult:
 
     columns = ( 'No', '検査項目', 'エラー', '位置', '見出し', '説明', '色')
     
+    # 結果が多い場合のメモリを減らすため属性を固定する
+    __slots__ = ( 'num', 'checkType', 'error', 'pos', 'caption', 'desc', 'color' )
+    
     def __init__(self, num:int, checkType:str, error: bool, pos=None, caption:str = '', desc : str = '', color=7 ):
         '''
         チェックした結果クラスのコンストラクタ
@@ -7,11 +7,14 @@ Created on Fri Dec  7 15:44:13 2023.
 
 """
 from ezdxf.document import Drawing
+from ezdxf.math import Vec3
 from typing import Any
 import types
+import numpy as np
 from .check_base import CheckBase
 from .draw_tool import DrawTool
 from .check_result import CheckResult
+from .geometry_snapshot import GeometrySnapshot
 
 
 class CheckTitleBlock(CheckBase):
@@ -41,11 +44,12 @@ class CheckTitleBlock(CheckBase):
         try:
             # 表題欄の領域を見つける. 
             frm = Option['frameresult'].framePoint
-            tb_area = cls.__FindTitleBlockArea( doc, frm, cls.__eps1 )
+            geometry = GeometrySnapshot.get(doc, **Option)
+            tb_area = cls.__FindTitleBlockArea( geometry, frm, cls.__eps1 )
 
             # 表題欄内の水平・垂直線を見つける．精度(eps)をゆるくした場合と違いがない確認．
-            lines1 = cls.__ExtractLinesInTitleBlock(doc, tb_area, CheckTitleBlock.__eps1 )
-            lines2 = cls.__ExtractLinesInTitleBlock(doc, tb_area, CheckTitleBlock.__eps2 )
+            lines1 = cls.__ExtractLinesInTitleBlock(geometry, tb_area, CheckTitleBlock.__eps1 )
+            lines2 = cls.__ExtractLinesInTitleBlock(geometry, tb_area, CheckTitleBlock.__eps2 )
             if len(lines1) < len(lines2) :
                 error_lines = CheckTitleBlock.__ExtractErrorLines(lines1, lines2)
             else:
@@ -87,7 +91,7 @@ class CheckTitleBlock(CheckBase):
             results = []            
             try:
                 # 条件をゆるくしてもう一度表題欄を
-                tb_area2 = cls.__FindTitleBlockArea( doc, frm, CheckTitleBlock.__eps2 )
+                tb_area2 = cls.__FindTitleBlockArea( geometry, frm, CheckTitleBlock.__eps2 )
                 
                 # 誤った表題欄の描画
                 cls.__DrawTitleBlock(draw_doc, tb_area2, lines=[], error_lines=[], color=1, hatch=False)
@@ -127,7 +131,7 @@ class CheckTitleBlock(CheckBase):
         
     
     @classmethod
-    def __FindTitleBlockArea( cls, doc, framePoint, eps ):
+    def __FindTitleBlockArea( cls, geometry, framePoint, eps ):
         
         """
         表題欄の位置を見つける
@@ -139,8 +143,11 @@ class CheckTitleBlock(CheckBase):
         frm.t = max( framePoint[0][1], framePoint[1][1] )
         frm.b = min( framePoint[0][1], framePoint[1][1] )
         
-        # 直線抽出
-        lines = [ent.dxfattribs() for ent in doc.modelspace().query('LINE')]
+        # 直線抽出(水平線か鉛直線のみ)
+        st = geometry.lines.start
+        ed = geometry.lines.end
+        mask = (np.abs(st[:,1] - ed[:,1]) < eps) | (np.abs(st[:,0] - ed[:,0]) < eps)
+        lines = CheckTitleBlock.__LineDicts( geometry, mask )
         
         # 枠の右に接する水平線抽出(ついでに左端が start に変更され、上から順になっている)
         h_lines = cls.__ExtractRightTouchHorizontalLine(frm, lines, eps)
@@ -287,7 +294,7 @@ class CheckTitleBlock(CheckBase):
         return touch_lines
 
     @staticmethod
-    def __ExtractLinesInTitleBlock( doc, titleblock_area, eps ):
+    def __ExtractLinesInTitleBlock( geometry, titleblock_area, eps ):
         
         """
         表題欄内に含まれるすべての水平・垂直線を見つける
@@ -299,15 +306,17 @@ class CheckTitleBlock(CheckBase):
         lft = titleblock_area.left
 
         # 水平、垂直で枠内の直線を抽出
-        c1 = lambda l: abs(l['start'][1] - l['end'][1]) < eps  # 水平線
-        c2 = lambda l: abs(l['start'][0] - l['end'][0]) < eps  # 垂直線
-        c3 = lambda l: abs(lft-eps < l['start'][0] < rgt+eps ) # 開始点の x 座標
-        c4 = lambda l: abs(btm-eps < l['start'][1] < top+eps ) # 開始点の y 座標
-        c5 = lambda l: abs(lft-eps < l['end'][0] < rgt+eps )   # 終了点の x 座標
-        c6 = lambda l: abs(btm-eps < l['end'][1] < top+eps )   # 終了点の y 座標
-        cond = lambda l: (c1(l) or c2(l)) and (c3(l) and c4(l) and c5(l) and c6(l) )
-        lines = [ent.dxfattribs() for ent in doc.modelspace().query('LINE')]
-        lines = list(filter( cond, lines ))
+        st = geometry.lines.start
+        ed = geometry.lines.end
+        inside = lambda v, lo, hi: (lo-eps < v) & (v < hi+eps)
+        c1 = np.abs(st[:,1] - ed[:,1]) < eps  # 水平線
+        c2 = np.abs(st[:,0] - ed[:,0]) < eps  # 垂直線
+        c3 = inside(st[:,0], lft, rgt) # 開始点の x 座標
+        c4 = inside(st[:,1], btm, top) # 開始点の y 座標
+        c5 = inside(ed[:,0], lft, rgt) # 終了点の x 座標
+        c6 = inside(ed[:,1], btm, top) # 終了点の y 座標
+        cond = (c1 | c2) & (c3 & c4 & c5 & c6)
+        lines = CheckTitleBlock.__LineDicts( geometry, cond )
         
         # 表題欄枠に繋がっている線だけを抽出（主に第三角法の中の直線を排除するため）
         lines = CheckTitleBlock.__ExtractTitleBlockLines( titleblock_area, lines, eps)
@@ -316,6 +325,18 @@ class CheckTitleBlock(CheckBase):
         return lines
     
     
+    @staticmethod
+    def __LineDicts( geometry, mask ):
+
+        """
+        mask で選んだ直線を start, end の辞書にする
+        """
+        idx = np.flatnonzero(mask)
+        starts = geometry.lines.start[idx].tolist()
+        ends = geometry.lines.end[idx].tolist()
+        return [ {'start':Vec3(st), 'end':Vec3(ed)} for st, ed in zip(starts, ends) ]
+
+
     @classmethod
     def __ExtractTitleBlockLines( cls, titleblock_area, lines, eps ):
         
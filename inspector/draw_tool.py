@@ -13,11 +13,31 @@ from math import sin, cos
 import io
 from ezdxf.document import Drawing
 from ezdxf.entities import MText
+from ezdxf.addons import Importer
 
 class DrawTool:
 
     DefaultLayer = "inspection"
 
+    # 円・円弧を折れ線にするときの許容誤差(スケールファクター 1 のときの図面上の長さ)
+    ArcTolerance = 0.5
+
+    # スケールファクターの基準の用紙
+    PaperSize = (420.0, 297.0)  # A3 Size (w, h)
+
+    @staticmethod
+    def ScaleFactor( doc_bb ):
+        '''
+        図面の矩形領域(Left, Bottom, Right, Top)から用紙に対するスケールファクターを計算
+        矩形領域がない場合は 1
+        '''
+        if doc_bb is None:
+            return 1.0
+
+        lft, btm, rgt, top = doc_bb
+        paper_w, paper_h = DrawTool.PaperSize
+        return max( (rgt - lft)/paper_w, (top - btm)/paper_h )
+
     @staticmethod
     def Rectangle( doc: Drawing, p1, p2, color, width=1, layer=None):
         '''
@@ -89,9 +109,10 @@ class DrawTool:
         DrawTool.Line(doc, p, tail, color=color, width=line_width, layer=layer)
 
     @staticmethod
-    def Circle( doc: Drawing, cent, radius, color, width=1, layer=None ):
+    def Circle( doc: Drawing, cent, radius, color, width=1, layer=None, n=24 ):
         '''
         円を描画
+        n は折れ線の辺の数
         '''
 
         # 画層
@@ -99,7 +120,6 @@ class DrawTool:
             layer = DrawTool.DefaultLayer
 
         # LWPolyLineで描く（ add_circle だと太さの変更が難しいため)
-        n = 24
         pts = []
         for i in range(n):
             p = ( cent[0]+radius * cos(2*math.pi*i/n), cent[1]+radius * sin(2*math.pi*i/n) )
@@ -110,9 +130,11 @@ class DrawTool:
         att = {'layer': layer, 'color' : color, 'linetype' : 'Continuous','const_width' : width}
         msp.add_lwpolyline( pts, format='xy', close=True, dxfattribs=att)
 
-    def Arc( doc: Drawing, cent, radius, stdeg, eddeg, color, width=1, layer=None ):
+    @staticmethod
+    def Arc( doc: Drawing, cent, radius, stdeg, eddeg, color, width=1, layer=None, n=None ):
         '''
         円弧を描画
+        n は折れ線の辺の数(省略した場合は180度で12辺程度)
         '''
 
         # 画層
@@ -127,7 +149,8 @@ class DrawTool:
         ag = ed - st
 
         # LWPolyLine
-        n = int(ag / math.pi * 12) + 1  # 180度で12辺程度
+        if n is None:
+            n = int(ag / math.pi * 12) + 1  # 180度で12辺程度
         pts = []
         for i in range(n+1):
             theta = st+i*ag/n
@@ -149,7 +172,7 @@ class DrawTool:
             layer = DrawTool.DefaultLayer
 
         # matplotlib で表示させるために、ms-gothic 追加
-        doc.styles.add("MS Gothic", font="c:/windows/font/msgothic.ttc")
+        DrawTool.AddGothicStyle(doc)
 
         msp = doc.modelspace()
 
@@ -161,6 +184,36 @@ class DrawTool:
         mtext.dxf.attachment_point = ezdxf.lldxf.const.MTEXT_BOTTOM_LEFT
 
 
+    @staticmethod
+    def AddGothicStyle( doc: Drawing ):
+        '''
+        MS Gothic の文字スタイルを追加(登録済みの場合は何もしない)
+        '''
+        if "MS Gothic" not in doc.styles:
+            doc.styles.add("MS Gothic", font="c:/windows/font/msgothic.ttc")
+
+    @staticmethod
+    def Segments( radius, angle, scale=1.0 ):
+        '''
+        半径 radius, 角度 angle(rad) の円弧を折れ線にするときの辺の数
+        弦と円弧の距離が ArcTolerance * scale 以下になるようにする
+        '''
+        tol = DrawTool.ArcTolerance * scale
+        if radius <= tol:
+            step = math.pi / 2
+        else:
+            step = 2 * math.acos(1 - tol / radius)
+        n = math.ceil(abs(angle) / step)
+        return min( max( n, math.ceil(abs(angle) / (math.pi / 4)), 1 ), 180 )
+
+    @staticmethod
+    def Batch( doc: Drawing, scale=1.0, layer=None ):
+        '''
+        まとめて描画するための DrawBatch を返す
+        with DrawTool.Batch(doc) as draw: として使い、終了時に書き込まれる
+        '''
+        return DrawBatch( doc, scale=scale, layer=layer )
+
     @staticmethod
     def CopyDoc( doc: Drawing ) -> Drawing:
         '''
@@ -173,6 +226,27 @@ class DrawTool:
         stream.close()
         return newdoc
 
+    @staticmethod
+    def OverlayDoc( doc: Drawing ) -> Drawing:
+        '''
+        検図結果を描画するための重ね合わせ用ドキュメントを作成
+        元の図面はコピーせず、inspection 画層だけを持つ空の図面を返す
+        '''
+        overlay = ezdxf.new( doc.dxfversion )
+        overlay.layers.add( DrawTool.DefaultLayer )
+        return overlay
+
+    @staticmethod
+    def MergeOverlay( doc: Drawing, overlay: Drawing ) -> Drawing:
+        '''
+        重ね合わせ用ドキュメントの内容を図面に取り込む(ファイル出力用)
+        doc は変更される
+        '''
+        importer = Importer( overlay, doc )
+        importer.import_modelspace()
+        importer.finalize()
+        return doc
+
     @staticmethod
     def ResolveFont( doc : Drawing ) -> Drawing:
         '''
@@ -190,6 +264,122 @@ class DrawTool:
         return doc
 
 
+class DrawBatch:
+
+    '''
+    DrawTool と同じ描画をまとめて行うクラス
+    - 文字スタイルは最初に１回だけ登録する
+    - 矢印のヘッドは画層・色ごとに１つのハッチにまとめる
+    - 線は画層・色・太さが同じで端点がつながるものを１本の折れ線にまとめる
+    - 円・円弧の辺の数はスケールファクターから決める
+    '''
+
+    def __init__( self, doc: Drawing, scale=1.0, layer=None ):
+        self.doc = doc
+        self.scale = scale
+        self.layer = DrawTool.DefaultLayer if layer is None else layer
+        self.lines = []     # (画層, 色, 太さ, 始点, 終点)
+        self.heads = {}     # (画層, 色) -> ヘッドの三角形のリスト
+        DrawTool.AddGothicStyle(doc)
+
+    def __enter__( self ):
+        return self
+
+    def __exit__( self, exc_type, exc_value, traceback ):
+        self.flush()
+        return False
+
+    def Line( self, p1, p2, color, width=1, layer=None ):
+        '''
+        直線を描画(flush で書き込む)
+        '''
+        layer = self.layer if layer is None else layer
+        self.lines.append( (layer, color, width, (p1[0], p1[1]), (p2[0], p2[1])) )
+
+    def Arrow( self, head, tail, color, head_size=5, line_width=1, layer=None ):
+        '''
+        矢印を描画(flush で書き込む)
+        '''
+        layer = self.layer if layer is None else layer
+
+        # ヘッドの座標(DrawTool.Arrow と同じ)
+        angle = math.atan2(tail[1] - head[1], tail[0] - head[0])
+        y = math.sin(math.pi * 20/180) # sin(20deg)
+        points = [ (0,0), ( head_size, head_size*y), ( head_size, -head_size*y) ]
+        sina = math.sin(angle)
+        cosa = math.cos(angle)
+        trans = lambda p : (p[0]*cosa-p[1]*sina + head[0], p[0]*sina+p[1]*cosa + head[1])
+        points = list( map( trans, points ) )
+        self.heads.setdefault( (layer, color), [] ).append( points )
+
+        # 線部分
+        p = ( (points[1][0]+points[2][0])/2, (points[1][1]+points[2][1])/2 )
+        self.Line( p, tail, color, width=line_width, layer=layer )
+
+    def Text( self, txt, pos, color, height=15, layer=None ):
+        '''
+        テキストを描画(文字スタイルは登録済み)
+        '''
+        layer = self.layer if layer is None else layer
+        DrawTool.Text( self.doc, txt, pos, color, height=height, layer=layer )
+
+    def Circle( self, cent, radius, color, width=1, layer=None ):
+        '''
+        円を描画(辺の数はスケールファクターから決める)
+        '''
+        layer = self.layer if layer is None else layer
+        n = max( DrawTool.Segments(radius, 2*math.pi, self.scale), 8 )
+        DrawTool.Circle( self.doc, cent, radius, color, width=width, layer=layer, n=n )
+
+    def Arc( self, cent, radius, stdeg, eddeg, color, width=1, layer=None ):
+        '''
+        円弧を描画(辺の数はスケールファクターから決める)
+        '''
+        layer = self.layer if layer is None else layer
+        ag = (eddeg + 360 if eddeg < stdeg else eddeg) - stdeg
+        n = DrawTool.Segments(radius, ag * math.pi / 180, self.scale)
+        DrawTool.Arc( self.doc, cent, radius, stdeg, eddeg, color, width=width, layer=layer, n=n )
+
+    def Rectangle( self, p1, p2, color, width=1, layer=None ):
+        '''
+        四角形を描画
+        '''
+        layer = self.layer if layer is None else layer
+        DrawTool.Rectangle( self.doc, p1, p2, color, width=width, layer=layer )
+
+    def flush( self ):
+        '''
+        まとめていた線と矢印のヘッドを書き込む
+        '''
+        msp = self.doc.modelspace()
+
+        # 端点がつながる線を１本の折れ線にする
+        chains = {}     # (画層, 色, 太さ) -> 点列のリスト
+        for layer, color, width, p1, p2 in self.lines:
+            chain = chains.setdefault( (layer, color, width), [] )
+            last = chain[-1] if len(chain) > 0 else None
+            if last is not None and last[-1] == p1:
+                last.append( p2 )
+            elif last is not None and last[-1] == p2:
+                last.append( p1 )
+            else:
+                chain.append( [p1, p2] )
+
+        for (layer, color, width), chain in chains.items():
+            att = {'layer': layer, 'color' : color, 'linetype' : 'Continuous','const_width' : width}
+            for points in chain:
+                msp.add_lwpolyline( points, format='xy', close=False, dxfattribs=att )
+
+        # ヘッドは色ごとに１つのハッチにする
+        for (layer, color), heads in self.heads.items():
+            hatch = msp.add_hatch(color=color, dxfattribs={'layer': layer})
+            for points in heads:
+                hatch.paths.add_polyline_path( points, is_closed=True)
+
+        self.lines = []
+        self.heads = {}
+
+
 # テスト
 if __name__ == '__main__':
     from ezdxf.addons.drawing import RenderContext, Frontend
@@ -1,20 +1,33 @@
 import ezdxf
 import math as Math
 import glob
+import os
+import threading
 
+from collections import OrderedDict
+from types import SimpleNamespace
 from ezdxf.math import Vec3
 
 
+# 図面に追加せずに保持する直線
+# LINE と同じく dxf.start, dxf.end, dxf.layer を持つ
+class VirtualLine:
+    def __init__(self, start, end, layer):
+        self.dxf = SimpleNamespace(start=Vec3(start), end=Vec3(end), layer=layer)
+
+    def dxftype(self):
+        return "LINE"
+
+
 # layerごとに合成済みの水平線、垂直線のリストを取得する
+# linesは図面のLINEとpolylineを分解した線分を合わせたリストを想定(図面は変更しない)
 class CombinedLine:
-    def __init__(self, doc, layer):
+    def __init__(self, lines, layer):
         self.combinedLines = []
-        self.getCombinedLines(doc, layer)
-
-    def getCombinedLines(self, doc, layer):
-        msp = doc.modelspace()
+        self.getCombinedLines(lines, layer)
 
-        linesInLay = msp.query(f'LINE[layer == "{layer.dxf.name}"]')
+    def getCombinedLines(self, lines, layer):
+        linesInLay = [line for line in lines if line.dxf.layer == layer.dxf.name]
         if len(linesInLay) == 0: return
         # 水平線と垂直線をそれぞれ取得
         horizontal = []
@@ -30,116 +43,71 @@ class CombinedLine:
                 vertical.append(line)
 
         if len(horizontal) != 0:
-            self.getCombinedHorizontalLine(msp, layer, horizontal)
+            self.getCombinedHorizontalLine(layer, horizontal)
 
         if len(vertical) != 0:
-            self.getCombinedVerticalLine(msp, layer, vertical)
+            self.getCombinedVerticalLine(layer, vertical)
 
 
 
 
     # 重複している水平線を結合したリストを取得
-    def getCombinedHorizontalLine(self, msp, layer, horizontalLines):
-        # 水平線をy軸ごとに分類する　辞書で分類
+    def getCombinedHorizontalLine(self, layer, horizontalLines):
+        # 水平線をy座標ごとに分類する
         # 最も長い直線の傾き±1°を許容する誤差とする
-        horizontalGroup = {}
         tol = 1
 
-        for line in horizontalLines:
-            if len(horizontalGroup) == 0:
-                horizontalGroup[line.dxf.start.y] = [l for l in horizontalLines if line.dxf.start.y - tol <= l.dxf.start.y and l.dxf.start.y <= line.dxf.start.y + tol]
-
-            flag = False
-            for lineList in horizontalGroup.values():
-                if line in lineList:
-                    flag = True
-                    break
-
-            if not flag:
-                horizontalGroup[line.dxf.start.y] = [l for l in horizontalLines if line.dxf.start.y - tol <= l.dxf.start.y and l.dxf.start.y <= line.dxf.start.y + tol]
-
-        # 分類した直線をそれぞれ走査して重複している直線の座標を合成する
-        combinedLinePositions = []
-        judgeSet = set()
-        for list in horizontalGroup.values():
-            for i, baseLine in enumerate(list):
-                if baseLine in judgeSet:
-                    continue
-
-                judgeSet.add(baseLine)
-                basePosition = sorted([baseLine.dxf.start, baseLine.dxf.end], key = lambda x: x.x)
-
-                for line in list[i:]:
-                    position = sorted([line.dxf.start, line.dxf.end], key = lambda x: x.x)
-                    if (basePosition[0].x <= position[0].x and position[0].x <= basePosition[1].x) or (basePosition[0].x <= position[1].x and position[1].x <= basePosition[1].x):
-                        basePosition[0] = min([basePosition[0], position[0]], key = lambda pos: pos.x)
-                        basePosition[1] = max([basePosition[1], position[1]], key = lambda pos: pos.x)
-                        judgeSet.add(line)
-
-                combinedLinePositions.append(basePosition)
-
-        # 既存の水平線を削除
-        for line in horizontalLines:
-            msp.delete_entity(line)
-
-        # 結合済みのラインをオブジェクトのリストとして取得
-        # 結合済み水平線を書く
-        for position in combinedLinePositions:
-            self.combinedLines.append(msp.add_line(position[0], position[1], dxfattribs = {"layer": f"{layer.dxf.name}"}))
-
+        self.appendMergedLines(layer, horizontalLines, tol, lambda p: p.y, lambda p: p.x)
 
 
     # 重複している垂直線を結合したリストを取得
-    def getCombinedVerticalLine(self, msp, layer, verticalLines):
+    def getCombinedVerticalLine(self, layer, verticalLines):
         # 垂直線をｘ座標ごとに分類する
         # 最も長い直線の許容傾き誤差±1°座標を許容する
-        verticalGroup = {}
         maxLengthLine = max(verticalLines, key = lambda line: (line.dxf.end - line.dxf.start).magnitude)
         tol = (maxLengthLine.dxf.end - maxLengthLine.dxf.start).magnitude * Math.cos(89 * Math.pi / 180)
 
-
-        for line in verticalLines:
-            if len(verticalGroup) == 0:
-                verticalGroup[line.dxf.start.x] = [l for l in verticalLines if line.dxf.start.x - tol <= l.dxf.start.x and l.dxf.start.x <= line.dxf.start.x + tol]
-
-            flag = False
-            for lineList in verticalGroup.values():
-                if line in lineList:
-                    flag = True
-                    break
-
-            if not flag:
-                verticalGroup[line.dxf.start.x] = [l for l in verticalLines if line.dxf.start.x - tol <= l.dxf.start.x and l.dxf.start.x <= line.dxf.start.x + tol]
-
-
-        # 分類した直線をそれぞれ走査して重複している直線の座標を合成する
-        combinedLinePositions = []
-        judgeSet = set()
-        for list in verticalGroup.values():
-            for baseLine in list:
-                if baseLine in judgeSet:
-                    continue
-
-                judgeSet.add(baseLine)
-                basePosition = sorted([baseLine.dxf.start, baseLine.dxf.end], key = lambda y: y.y)
-
-                for line in list[1:]:
-                    position = sorted([line.dxf.start, line.dxf.end], key = lambda y: y.y)
-                    if (basePosition[0].y <= position[0].y and position[0].y <= basePosition[1].y) or (basePosition[0].y <= position[1].y and position[1].y <= basePosition[1].y):
-                        basePosition[0] = min([basePosition[0], position[0]], key = lambda pos: pos.y)
-                        basePosition[1] = max([basePosition[1], position[1]], key = lambda pos: pos.y)
-                        judgeSet.add(line)
-
-                combinedLinePositions.append(basePosition)
-
-        # 既存の水平線を削除
-        for line in verticalLines:
-            msp.delete_entity(line)
-
-        # 結合済みのラインをオブジェクトのリストとして取得
-        # 結合済み水平線を書く
-        for position in combinedLinePositions:
-            self.combinedLines.append(msp.add_line(position[0], position[1], dxfattribs = {"layer": f"{layer.dxf.name}"}))
+        self.appendMergedLines(layer, verticalLines, tol, lambda p: p.x, lambda p: p.y)
+
+
+    # 同じ座標にある直線の重複部分を結合して combinedLines に追加する
+    # offset: 直線を分類する座標(水平線はy, 垂直線はx), along: 直線方向の座標
+    # 分類、結合ともに座標でソートしてから1回の走査で行う
+    def appendMergedLines(self, layer, lines, tol, offset, along):
+        # 始点の座標でソートし、最初の直線から tol 以内の直線を同じグループにする
+        order = sorted(range(len(lines)), key = lambda i: offset(lines[i].dxf.start))
+        groups = []
+        for i in order:
+            if len(groups) == 0 or offset(lines[i].dxf.start) > groups[-1][0] + tol:
+                groups.append((offset(lines[i].dxf.start), []))
+            groups[-1][1].append(i)
+
+        # グループ内の直線を区間の小さい順に走査し、重なっている区間を結合する
+        # (開始側の端点, 終了側の端点, 元の順番の最小値)
+        merged = []
+        for _, group in groups:
+            positions = []
+            for i in group:
+                line = lines[i]
+                positions.append(sorted([line.dxf.start, line.dxf.end], key = along) + [i])
+            positions.sort(key = lambda pos: (along(pos[0]), pos[2]))
+
+            base = positions[0]
+            for position in positions[1:]:
+                if along(position[0]) <= along(base[1]):
+                    if along(position[1]) > along(base[1]):
+                        base[1] = position[1]
+                    base[2] = min(base[2], position[2])
+                else:
+                    merged.append(base)
+                    base = position
+            merged.append(base)
+
+        # 元の直線の順番に並べる
+        # 図面には書かずに保持する
+        merged.sort(key = lambda pos: pos[2])
+        for position in merged:
+            self.combinedLines.append(VirtualLine(position[0], position[1], layer.dxf.name))
 
 
 
@@ -307,19 +275,37 @@ class FrameField:
 
 
 
+# checkを指定した場合は処理の区切りごとに呼び出す(中止する場合は例外を送出する関数)
 class Frame_extractor:
-    def __init__(self, doc):
+    def __init__(self, doc, check=None):
         self.doc = doc
-        self.disassembly_Poly()
+        self.check = check if check is not None else (lambda: None)
+        self.lines = self.disassembly_Poly()
+        self.linesByLayer = self.partition_by_layer(self.lines)
         self.pointAndMessage = self.detect_frame()
 
-    # docの内部のpolylineを分解する
+    # docの内部のLINEと、polylineを分解した線分のリストを返す
+    # 分解は virtual_entities で行い、図面は変更しない
+    # (explodeした場合と同じく、分解した線分は元のLINEの後ろに並べる)
     def disassembly_Poly(self):
         msp = self.doc.modelspace()
+        lines = list(msp.query("LINE"))
 
         polyLines = msp.query("LW POLYLINE")
         for polyLine in polyLines:
-            polyLine.explode()
+            self.check()
+            lines.extend(e for e in polyLine.virtual_entities() if e.dxftype() == "LINE")
+
+        return lines
+
+    # 直線をlayer名ごとに分けた辞書を返す(図面を1回走査するだけで済ませる)
+    @staticmethod
+    def partition_by_layer(lines):
+        linesByLayer = {}
+        for line in lines:
+            linesByLayer.setdefault(line.dxf.layer, []).append(line)
+
+        return linesByLayer
 
     # 全体の枠線を検出するメソッド
     def detect_frame(self):
@@ -330,8 +316,18 @@ class Frame_extractor:
         # layerごとにFrameFeildクラスのリスト
         frameInLayers = []
         for layer in layers:
-            lineList = CombinedLine(self.doc, layer)
+            # 直線のないlayerは飛ばす
+            lines = self.linesByLayer.get(layer.dxf.name)
+            if lines is None:
+                continue
+            self.check()
+
+            lineList = CombinedLine(lines, layer)
             linesInlayer.append(lineList.combinedLines)
+
+            # 候補となる直線が6本未満のlayerには枠線がない
+            if len(lineList.combinedLines) < 6:
+                continue
             frameInLayers.append(FrameField(lineList.combinedLines))
 
         # 全体の水平線、垂直線のリスト
@@ -359,12 +355,60 @@ class Frame_extractor:
 
 
 class Frame_extractor_result:
-    def __init__(self, doc):
-        frame_extractor = Frame_extractor(doc)
+    def __init__(self, doc, check=None):
+        frame_extractor = Frame_extractor(doc, check)
         self.framePoint = frame_extractor.pointAndMessage[0]
         self.message = frame_extractor.pointAndMessage[1]
 
 
+# 図面ごとの枠線抽出結果のキャッシュ
+# ファイルのパス、更新日時、サイズをキーとして Frame_extractor_result を保持する
+# 同じファイルに別の検図を行う場合は枠線抽出をやり直さない
+class FrameResultCache:
+    maxSize = 8
+    results = OrderedDict()
+    lock = threading.Lock()
+
+    # ファイルの識別子を返す(ファイルが存在しない場合はNone)
+    @staticmethod
+    def fingerprint(filepath):
+        if not filepath:
+            return None
+        try:
+            st = os.stat(filepath)
+        except (OSError, ValueError):
+            return None
+        return (os.path.abspath(filepath), st.st_mtime_ns, st.st_size)
+
+    # 枠線抽出結果を返す
+    # filepathを省略した場合はdoc.filenameを使う
+    # checkは枠線抽出の途中で呼び出す(中止した場合は結果を保持しない)
+    @classmethod
+    def get(cls, doc, filepath=None, check=None):
+        key = cls.fingerprint(filepath if filepath is not None else doc.filename)
+        if key is None:
+            return Frame_extractor_result(doc, check)
+
+        with cls.lock:
+            if key in cls.results:
+                cls.results.move_to_end(key)
+                return cls.results[key]
+
+        result = Frame_extractor_result(doc, check)
+
+        with cls.lock:
+            cls.results[key] = result
+            while len(cls.results) > cls.maxSize:
+                cls.results.popitem(last=False)
+
+        return result
+
+    @classmethod
+    def clear(cls):
+        with cls.lock:
+            cls.results.clear()
+
+
 
 if __name__ == "__main__":
     filePaths = glob.glob('../dxf/*.dxf')
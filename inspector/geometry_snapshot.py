@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""図面の形状をNumPy配列にまとめるモジュール.
+
+各検図がモデルスペースを何度も query して dxfattribs() の辞書を作る代わりに,
+LINE/ARC/CIRCLE/POINT/TEXT/DIMENSION の形状を1回の走査で配列に取り出し,
+全ての検図で共有する.
+"""
+
+import numpy as np
+
+from typing import Any, Callable, Iterable
+from ezdxf.document import Drawing
+from ezdxf.entities.dxfgfx import DXFGraphic
+from .bounding_box import BoundingBox
+from .draw_tool import DrawTool
+
+
+class GeometryGroup:
+    """1種類のエンティティの形状をまとめた配列.
+
+    全ての種類で共通して以下を持つ. 行の順序はモデルスペースの順序と同じ.
+
+    handles : list[str]
+        エンティティのハンドル
+    layers : np.ndarray
+        画層番号 (GeometrySnapshot.layer_names の添字)
+    linetypes : np.ndarray
+        線種番号 (GeometrySnapshot.linetype_names の添字)
+    bbox : np.ndarray
+        矩形領域 (n, 4) の (Left, Bottom, Right, Top)
+    """
+
+    def __init__(self, dxftype: str, columns: dict[str, np.ndarray]):
+        """イニシャライザ."""
+        self.dxftype = dxftype
+        self.handles: list[str] = []
+        self.layers = np.zeros(0, dtype=np.int32)
+        self.linetypes = np.zeros(0, dtype=np.int32)
+        self.bbox = np.zeros((0, 4))
+        for name, value in columns.items():
+            setattr(self, name, value)
+
+    def __len__(self) -> int:
+        """エンティティの数."""
+        return len(self.handles)
+
+
+class GeometrySnapshot:
+    """図面の形状のスナップショット.
+
+    Attributes
+    ----------
+    lines : GeometryGroup
+        start, end (n, 3), length (n,), direction (n, 3) 単位ベクトル
+    arcs : GeometryGroup
+        center (n, 3), radius, start_angle, end_angle (n,)
+    circles : GeometryGroup
+        center (n, 3), radius (n,)
+    points : GeometryGroup
+        location (n, 3)
+    texts : GeometryGroup
+        placement (n, 3) (get_placement() の位置), height (n,), text (list[str])
+    dimensions : GeometryGroup
+        text_midpoint (n, 3)
+    extents : list[float] | None
+        図面の矩形領域 (Left, Bottom, Right, Top). from_doc で作った場合のみ.
+    scale : float
+        結果を描画する際のスケールファクター(DrawTool.ScaleFactor).
+        検図ごとに図面全体の矩形を求めないように1回だけ計算する.
+    """
+
+    DXFTYPES = ('LINE', 'ARC', 'CIRCLE', 'POINT', 'TEXT', 'DIMENSION')
+
+    # check を呼び出すエンティティの間隔
+    CHECK_INTERVAL = 1000
+
+    def __init__(self, entities: Iterable[DXFGraphic],
+                 extents: list[float] | None = None,
+                 check: Callable[[], None] | None = None):
+        """エンティティを1回走査して配列を作る.
+
+        check を指定した場合は CHECK_INTERVAL 個ごとに呼び出す
+        (中止する場合は check が例外を送出する).
+        """
+        self.extents = extents
+        self.scale = DrawTool.ScaleFactor(extents)
+        self.layer_names: list[str] = []
+        self.linetype_names: list[str] = []
+        self.__layer_ids: dict[str, int] = {}
+        self.__linetype_ids: dict[str, int] = {}
+
+        # 種類ごとに値を集める
+        rows = {dxftype: [] for dxftype in self.DXFTYPES}
+        for i, entity in enumerate(entities):
+            if check is not None and i % self.CHECK_INTERVAL == 0:
+                check()
+            dxftype = entity.dxftype()
+            if dxftype in rows:
+                rows[dxftype].append(entity)
+
+        self.lines = self.__lines(rows['LINE'])
+        self.arcs = self.__arcs(rows['ARC'])
+        self.circles = self.__circles(rows['CIRCLE'])
+        self.points = self.__points(rows['POINT'])
+        self.texts = self.__texts(rows['TEXT'])
+        self.dimensions = self.__dimensions(rows['DIMENSION'])
+
+    @classmethod
+    def from_doc(cls, doc: Drawing,
+                 check: Callable[[], None] | None = None) -> 'GeometrySnapshot':
+        """図面のモデルスペースからスナップショットを作る."""
+        return cls(doc.modelspace(), BoundingBox.DrawingBB(doc), check)
+
+    @classmethod
+    def get(cls, doc: Drawing, **Option: dict[str, Any]) -> 'GeometrySnapshot':
+        """検図のオプションで共有されたスナップショットを返す.
+
+        Option に 'geometry' がない場合は doc から作る.
+        """
+        geometry = Option.get('geometry')
+        if geometry is None:
+            geometry = cls.from_doc(doc)
+        return geometry
+
+    def __id(self, names: list[str], ids: dict[str, int], name: str) -> int:
+        """名前の番号を返す(初めての名前は追加する)."""
+        if name not in ids:
+            ids[name] = len(names)
+            names.append(name)
+        return ids[name]
+
+    def __group(self, dxftype: str, entities: list,
+                columns: dict[str, np.ndarray]) -> GeometryGroup:
+        """共通の列を設定したグループを作る."""
+        group = GeometryGroup(dxftype, columns)
+        group.handles = [e.dxf.handle for e in entities]
+        group.layers = np.array(
+            [self.__id(self.layer_names, self.__layer_ids, e.dxf.layer)
+             for e in entities], dtype=np.int32)
+        group.linetypes = np.array(
+            [self.__id(self.linetype_names, self.__linetype_ids,
+                       e.dxf.linetype) for e in entities], dtype=np.int32)
+        return group
+
+    @staticmethod
+    def __vectors(values: list, n: int) -> np.ndarray:
+        """座標のリストを (n, 3) の配列にする."""
+        return np.array(values, dtype=float).reshape(n, 3)
+
+    @staticmethod
+    def __point_bbox(points: np.ndarray) -> np.ndarray:
+        """点の矩形領域."""
+        return np.column_stack([points[:, 0], points[:, 1],
+                                points[:, 0], points[:, 1]])
+
+    def __lines(self, entities: list) -> GeometryGroup:
+        n = len(entities)
+        start = self.__vectors([e.dxf.start for e in entities], n)
+        end = self.__vectors([e.dxf.end for e in entities], n)
+        vec = end - start
+        length = np.sqrt(np.sum(vec * vec, axis=1))
+        direction = np.divide(vec, length[:, None], out=np.zeros_like(vec),
+                              where=length[:, None] > 0)
+        bbox = np.column_stack([np.minimum(start[:, 0], end[:, 0]),
+                                np.minimum(start[:, 1], end[:, 1]),
+                                np.maximum(start[:, 0], end[:, 0]),
+                                np.maximum(start[:, 1], end[:, 1])])
+        group = self.__group('LINE', entities, {
+            'start': start, 'end': end, 'length': length,
+            'direction': direction})
+        group.bbox = bbox.reshape(n, 4)
+        return group
+
+    def __circles(self, entities: list) -> GeometryGroup:
+        n = len(entities)
+        center = self.__vectors([e.dxf.center for e in entities], n)
+        radius = np.array([e.dxf.radius for e in entities], dtype=float)
+        group = self.__group('CIRCLE', entities, {
+            'center': center, 'radius': radius})
+        group.bbox = np.column_stack([center[:, 0] - radius,
+                                      center[:, 1] - radius,
+                                      center[:, 0] + radius,
+                                      center[:, 1] + radius]).reshape(n, 4)
+        return group
+
+    def __arcs(self, entities: list) -> GeometryGroup:
+        n = len(entities)
+        center = self.__vectors([e.dxf.center for e in entities], n)
+        radius = np.array([e.dxf.radius for e in entities], dtype=float)
+        start_angle = np.array([e.dxf.start_angle for e in entities],
+                               dtype=float)
+        end_angle = np.array([e.dxf.end_angle for e in entities], dtype=float)
+        group = self.__group('ARC', entities, {
+            'center': center, 'radius': radius,
+            'start_angle': start_angle, 'end_angle': end_angle})
+        group.bbox = self.arc_bbox(center, radius, start_angle,
+                                   end_angle).reshape(n, 4)
+        return group
+
+    def __points(self, entities: list) -> GeometryGroup:
+        n = len(entities)
+        location = self.__vectors([e.dxf.location for e in entities], n)
+        group = self.__group('POINT', entities, {'location': location})
+        group.bbox = self.__point_bbox(location).reshape(n, 4)
+        return group
+
+    def __texts(self, entities: list) -> GeometryGroup:
+        n = len(entities)
+        placement = self.__vectors([e.get_placement()[1] for e in entities], n)
+        height = np.array([e.dxf.height for e in entities], dtype=float)
+        group = self.__group('TEXT', entities, {
+            'placement': placement, 'height': height,
+            'text': [e.dxf.text for e in entities]})
+        group.bbox = self.__point_bbox(placement).reshape(n, 4)
+        return group
+
+    def __dimensions(self, entities: list) -> GeometryGroup:
+        n = len(entities)
+        text_midpoint = self.__vectors(
+            [e.dxf.text_midpoint for e in entities], n)
+        group = self.__group('DIMENSION', entities,
+                             {'text_midpoint': text_midpoint})
+        group.bbox = self.__point_bbox(text_midpoint).reshape(n, 4)
+        return group
+
+    @staticmethod
+    def arc_bbox(center: np.ndarray, radius: np.ndarray,
+                 start_angle: np.ndarray, end_angle: np.ndarray) -> np.ndarray:
+        """円弧の矩形領域 (n, 4) を求める.
+
+        端点と, 円弧が通過する 0°/90°/180°/270° の点から求める.
+        """
+        st = np.radians(start_angle)
+        ed = np.radians(end_angle)
+        cx, cy = center[:, 0], center[:, 1]
+        stx, sty = cx + radius * np.cos(st), cy + radius * np.sin(st)
+        edx, edy = cx + radius * np.cos(ed), cy + radius * np.sin(ed)
+
+        # 終了角が開始角より小さい場合は360°を足す
+        sweep_end = np.where(start_angle > end_angle, end_angle + 360.0,
+                             end_angle)
+
+        def passes(angle):
+            return ((start_angle < angle) & (angle < sweep_end)) \
+                | ((start_angle < angle + 360.0) & (angle + 360.0 < sweep_end))
+
+        lft = np.where(passes(180.0), cx - radius, np.minimum(stx, edx))
+        rgt = np.where(passes(0.0), cx + radius, np.maximum(stx, edx))
+        btm = np.where(passes(270.0), cy - radius, np.minimum(sty, edy))
+        top = np.where(passes(90.0), cy + radius, np.maximum(sty, edy))
+        return np.column_stack([lft, btm, rgt, top])
+
+    @staticmethod
+    def out_of_range(points: np.ndarray, bottom_left, top_right,
+                     tol: float = 0) -> np.ndarray:
+        """点 (n, 3) が矩形(許容差tol)の外にあるかを返す."""
+        x, y = points[:, 0], points[:, 1]
+        return (x < bottom_left[0] - tol) | (top_right[0] + tol < x) \
+            | (y < bottom_left[1] - tol) | (top_right[1] + tol < y)
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+結果のキャプションを図面の周囲に配置する LabelLayout クラス
+
+近い位置の結果を１つにまとめ、図面の矩形の上下左右に振り分けて配置する
+"""
+
+import math
+from types import SimpleNamespace
+from .check_result import CheckResult
+from .non_cross_lines import NonCrossLines
+
+
+class LabelLayout:
+
+    # 配置する辺(同じ距離の場合はこの順で選ぶ)
+    SIDES = ('right', 'top', 'left', 'bottom')
+
+    # 辺ごとの項目数がこれ以下の場合は矢印が交わらないように組み合わせを求める
+    MATCH_LIMIT = 100
+
+    # 上下の辺に並べる行数の上限(図面の高さに対する割合)
+    ROW_RATIO = 0.25
+
+    @staticmethod
+    def cluster( results: list[CheckResult], radius ):
+        '''
+        位置が radius 以内の結果を１つのグループにまとめる
+        格子状に分けた辞書で近くのグループだけを調べる
+        グループは結果の順、グループ内も結果の順に並ぶ
+        '''
+        if radius <= 0:
+            return [ [r] for r in results ]
+
+        clusters = []   # [代表の位置, 結果のリスト]
+        cells = {}      # 格子 -> グループの番号のリスト
+        for r in results:
+            x, y = r.pos[0], r.pos[1]
+            ix, iy = math.floor(x / radius), math.floor(y / radius)
+
+            # 周囲の格子から近いグループを探す
+            found = None
+            for cx in (ix-1, ix, ix+1):
+                for cy in (iy-1, iy, iy+1):
+                    for k in cells.get( (cx, cy), [] ):
+                        ax, ay = clusters[k][0]
+                        if math.hypot( x-ax, y-ay ) <= radius:
+                            found = k if found is None else min( found, k )
+
+            if found is None:
+                cells.setdefault( (ix, iy), [] ).append( len(clusters) )
+                clusters.append( [ (x, y), [r] ] )
+            else:
+                clusters[found][1].append( r )
+
+        return [ c[1] for c in clusters ]
+
+
+    @staticmethod
+    def caption( cluster: list[CheckResult] ):
+        '''
+        グループのキャプション
+        '''
+        r = cluster[0]
+        caption = str(r.num) + '.' + r.caption
+        if len(cluster) > 1:
+            caption += ' 他{0}件'.format( len(cluster) - 1 )
+        return caption
+
+
+    @classmethod
+    def layout( cls, draw_bb, clusters: list[list[CheckResult]], line_space, font_size ):
+        '''
+        グループのキャプションを矩形 draw_bb の上下左右に配置する
+        各グループに最も近い辺に入るだけ配置し、入らない場合は次に近い辺に配置する
+
+        返すラベルは以下を持つ
+            result   : 代表の結果(色などに使う)
+            caption  : キャプション
+            head     : 矢印の先(結果の位置)
+            tail     : 矢印の根元
+            text_pos : キャプションの左下
+            line_end : キャプションの下線の終点
+        '''
+        lft, btm, rgt, top = draw_bb
+        w, h = rgt - lft, top - btm
+        ls = line_space
+
+        labels = []
+        for c in clusters:
+            caption = cls.caption( c )
+            labels.append( SimpleNamespace( result=c[0], caption=caption,
+                                            head=c[0].pos, width=len(caption)*font_size ) )
+        if len(labels) == 0:
+            return []
+
+        # 辺ごとに入る数
+        cw = max( l.width for l in labels ) + ls
+        cols = max( 1, int( w // cw ) )
+        rows = max( 1, int( h * cls.ROW_RATIO // ls ) )
+        capacity = { 'right' : max( 1, int( h // ls ) ),
+                     'left'  : max( 1, int( h // ls ) ),
+                     'top'   : cols * rows,
+                     'bottom': cols * rows }
+
+        # 辺までの距離が近いものから振り分ける
+        def distances( l ):
+            x, y = l.head[0], l.head[1]
+            return { 'right': rgt - x, 'top': top - y, 'left': x - lft, 'bottom': y - btm }
+
+        sides = { s : [] for s in cls.SIDES }
+        order = sorted( labels, key = lambda l: min( distances(l).values() ) )
+        for l in order:
+            d = distances( l )
+            near = sorted( cls.SIDES, key = lambda s: d[s] )
+            side = next( (s for s in near if len(sides[s]) < capacity[s]), near[0] )
+            sides[side].append( l )
+
+        # 辺ごとに配置
+        cls.__place_right( sides['right'], rgt + ls, top, ls )
+        cls.__place_left( sides['left'], lft - ls, top, ls )
+        cls.__place_grid( sides['top'], lft, top, ls, cw, cols, upward=True )
+        cls.__place_grid( sides['bottom'], lft, btm, ls, cw, cols, upward=False )
+
+        return [ l for s in cls.SIDES for l in sides[s] ]
+
+
+    @classmethod
+    def grid_rows( cls, count, cols ):
+        '''
+        count 個を cols 列に並べるときの行数
+        '''
+        return max( 1, math.ceil( count / cols ) )
+
+
+    @classmethod
+    def __place_right( cls, labels, x, top, ls ):
+        '''
+        右側に上から縦に並べる(矢印はキャプションの左端につなぐ)
+        '''
+        labels.sort( key = lambda l: -l.head[1] )
+        tails = [ (x, top - (i+1)*ls) for i in range(len(labels)) ]
+        for l, tail in zip( labels, cls.__match( labels, tails ) ):
+            l.tail = tail
+            l.text_pos = tail
+            l.line_end = ( tail[0] + l.width, tail[1] )
+
+
+    @classmethod
+    def __place_left( cls, labels, x, top, ls ):
+        '''
+        左側に上から縦に並べる(矢印はキャプションの右端につなぐ)
+        '''
+        labels.sort( key = lambda l: -l.head[1] )
+        tails = [ (x, top - (i+1)*ls) for i in range(len(labels)) ]
+        for l, tail in zip( labels, cls.__match( labels, tails ) ):
+            l.tail = tail
+            l.text_pos = ( tail[0] - l.width, tail[1] )
+            l.line_end = tail
+
+
+    @classmethod
+    def __place_grid( cls, labels, lft, y0, ls, cw, cols, upward ):
+        '''
+        上側(upward)または下側に cols 列で並べる
+        左から列ごとに埋めるため、x 座標の順に並べると矢印が交わりにくい
+        '''
+        labels.sort( key = lambda l: l.head[0] )
+        rows = cls.grid_rows( len(labels), cols )
+        sign = 1 if upward else -1
+        tails = [ ( lft + (i // rows)*cw, y0 + sign*((i % rows)+1)*ls ) for i in range(len(labels)) ]
+        for l, tail in zip( labels, cls.__match( labels, tails ) ):
+            l.tail = tail
+            l.text_pos = tail
+            l.line_end = ( tail[0] + l.width, tail[1] )
+
+
+    @classmethod
+    def __match( cls, labels, tails ):
+        '''
+        ラベルの順に対応する矢印の根元を返す
+        数が少ない場合は交わらない組み合わせにする
+        '''
+        if len(labels) <= 1 or len(labels) > cls.MATCH_LIMIT:
+            return tails
+        idx = NonCrossLines.analyze( [ l.head for l in labels ], tails )
+        return [ tails[i] for i in idx ]
+
+
+    @classmethod
+    def place_list( cls, captions, lft, y0, ls, font_size, cols_width ):
+        '''
+        矢印なしのキャプションを y0 の下に cols_width の幅で列に分けて並べる
+        キャプションの左下の位置のリストを返す
+        '''
+        if len(captions) == 0:
+            return []
+        cw = max( len(c)*font_size for c in captions ) + ls
+        cols = max( 1, int( cols_width // cw ) )
+        rows = cls.grid_rows( len(captions), cols )
+        return [ ( lft + (i // rows)*cw, y0 - ((i % rows)+1)*ls ) for i in range(len(captions)) ]
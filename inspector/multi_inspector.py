@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""複数の検図をまとめて実行するモジュール.
+
+図面の読み込みと枠線抽出は1回だけ行い, 選択された検図を順に実行して
+結果を1つの描画用図面と CheckResult のリストにまとめる.
+"""
+
+from itertools import chain
+from typing import Any, Iterator
+from ezdxf.document import Drawing
+from .check_base import CheckBase, DrawCommand
+from .check_result import CheckResult
+
+
+class MultiInspector:
+    """複数の検図をまとめて実行するクラス.
+
+    AlgorithmSelector に表示されないように CheckBase は継承しない.
+    """
+
+    # 検図項目の名前
+    inspect_name: str = '一括検図'
+
+    @staticmethod
+    def inspect_doc(doc: Drawing, draw_doc: Drawing, inspectors: list[type],
+                    **Option: dict[str, Any]):
+        """図面docを選択された検図で検図し，図面draw_docに結果を描画し，
+        結果として draw_doc と CheckResult のリストを返す
+
+        Parameters
+        ----------
+        doc : Drawing
+            検図を行うオリジナル図面(各検図で共有するため変更しない).
+        draw_doc: Drawing
+            結果を描画するための図面
+        inspectors: list[type]
+            実行する CheckBase のサブクラスのリスト
+        **Option: dict[str, Any]
+            枠線等の追加情報(全ての検図に渡す).
+
+        Returns
+        -------
+            描画した draw_doc
+            検図結果の CheckResult のリスト(通し番号を振り直したもの)
+
+        """
+        stream = MultiInspector.inspect_stream(doc, inspectors, **Option)
+        return CheckBase.collect(stream, draw_doc)
+
+    @staticmethod
+    def inspect_stream(doc: Drawing, inspectors: list[type],
+                       **Option: dict[str, Any]) -> Iterator[CheckResult | DrawCommand]:
+        """選択された検図の CheckResult と DrawCommand を見つかった順に返す.
+
+        検図は選択順に1つずつ実行する(検図は Python の処理で GIL により
+        スレッドでは速くならず, ezdxf の図面もスレッドセーフでないため).
+        CheckResult には返す順に通し番号を振り直す.
+        パラメータは inspect_doc と同じ.
+        """
+        items = chain.from_iterable(
+            inspector.inspect_stream(doc, **Option)
+            for inspector in inspectors)
+
+        num = 0
+        for item in items:
+            if isinstance(item, CheckResult):
+                num += 1
+                item.num = num
+            yield item
+
+    @staticmethod
+    def renumber(results: list[CheckResult]) -> list[CheckResult]:
+        """検図結果に通し番号を振り直す."""
+        for i, r in enumerate(results):
+            r.num = i + 1
+        return results
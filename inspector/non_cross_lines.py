@@ -7,6 +7,10 @@ Created on Wed Dec 27 16:34:17 2023
 ２次元上で、２つの点群の各点同士を交わらないように結ぶ組み合わせを求めるクラス
 """
 
+import math
+import numpy as np
+
+
 class NonCrossLines :
     
     @classmethod
@@ -14,58 +18,97 @@ class NonCrossLines :
         '''
         点群ps1と点群ps2の点を交わらないように直線でつながる組み合わせを見つける
         ps1に対応するps2のインデックスのリストが返される
-        全探索に近いことをしているため、点の数が１０を超えると遅くなる場合がる
-        深さ探索で探索
+        線の長さの合計が最小になる組み合わせは交わらない(交わる２本を繋ぎ変えると短くなる)ため、
+        最小の組み合わせを割当問題として O(n^3) で求める
+        計算誤差で交わりが残った場合は、交わる２本を繋ぎ変えて解消する
         '''
         assert len(ps1) == len(ps2), '点群 ps1 と点群 ps2 の点の数が異なります'
         cnt = len(ps1)
         if cnt==0: return []
-        baselist = lambda: list(range(cnt))
         
-        x = [baselist()]
-        depth = 0
-        lines = []
-        index = []
-        while True:
-            #print(x) # printするとアルゴリズムの動きがわかりやすい
-            new_p_index = x[-1][0]
-            new_line = (ps1[depth], ps2[new_p_index])
-            
-            check = True # 次の深さへ行けるかフラグ
-            if depth != 0:
-                # 前の線と交わるかチェック
-                for l in lines:
-                    if cls.is_cross( l, new_line ):
-                        check = False
-                        break
-
-            if check:
-                # 直線を追加できれば次の深さへ
-                lines.append( new_line )
-                index.append( new_p_index )
-                next_list = baselist()
-                for l in x:
-                    next_list.remove(l[0])
-                x.append(next_list)
-                depth += 1
+        # 各点の間の距離
+        p1 = np.array([(p[0], p[1]) for p in ps1], dtype=float)
+        p2 = np.array([(p[0], p[1]) for p in ps2], dtype=float)
+        cost = np.hypot(p1[:, None, 0] - p2[None, :, 0], p1[:, None, 1] - p2[None, :, 1])
+        
+        # 長さの合計が最小の組み合わせ
+        index = cls.min_assignment( cost )
+        
+        # 交わりが残っていれば繋ぎ変える
+        return cls.uncross( ps1, ps2, index )
+        
+        
+    @staticmethod
+    def min_assignment( cost ):
+        '''
+        コスト行列 cost (n, n) の合計が最小になる割当を求める(ハンガリアン法)
+        行 i に対応する列のインデックスのリストが返される
+        '''
+        n = cost.shape[0]
+        u = np.zeros(n+1)               # 行のポテンシャル
+        v = np.zeros(n+1)               # 列のポテンシャル
+        p = np.zeros(n+1, dtype=int)    # 列に割り当てた行(1始まり, 0は未割当)
+        way = np.zeros(n+1, dtype=int)  # 増加路の一つ前の列
+        
+        for i in range(1, n+1):
+            p[0] = i
+            j0 = 0
+            minv = np.full(n+1, math.inf)
+            used = np.zeros(n+1, dtype=bool)
             
-            else:
-                # 直線を追加できなければ次の候補にする
-                x[-1].pop(0)
-                while depth >= 0 and len(x[-1])==0:
-                    x.pop(-1)
-                    lines.pop(-1)
-                    index.pop(-1)
-                    x[-1].pop(0)
-                    depth -= 1
+            # 未割当の列に着くまで最短の増加路を伸ばす
+            while True:
+                used[j0] = True
+                i0 = p[j0]
+                free = ~used
+                cur = cost[i0-1] - u[i0] - v[1:]
+                upd = free[1:] & (cur < minv[1:])
+                minv[1:][upd] = cur[upd]
+                way[1:][upd] = j0
+                
+                cand = np.where(free[1:], minv[1:], math.inf)
+                j1 = int(np.argmin(cand)) + 1
+                delta = cand[j1-1]
+                
+                u[p[used]] += delta
+                v[used] -= delta
+                minv[free] -= delta
+                
+                j0 = j1
+                if p[j0] == 0:
+                    break
             
-            if depth == cnt:
-                # 交わらない組み合わせが見つかった
-                return index
-
-            if depth < 0:
-                # 見つからなかった
-                return None
+            # 増加路に沿って割当を更新
+            while j0:
+                j1 = way[j0]
+                p[j0] = p[j1]
+                j0 = j1
+        
+        index = [0] * n
+        for j in range(1, n+1):
+            index[p[j]-1] = j-1
+        return index
+    
+    
+    @classmethod
+    def uncross( cls, ps1, ps2, index ):
+        '''
+        交わっている２本の線を繋ぎ変えることを交わりがなくなるまで繰り返す
+        繋ぎ変えるたびに線の長さの合計が短くなるため必ず終わる
+        '''
+        cnt = len(index)
+        index = list(index)
+        changed = True
+        while changed:
+            changed = False
+            for i in range(cnt):
+                for j in range(i+1, cnt):
+                    line1 = (ps1[i], ps2[index[i]])
+                    line2 = (ps1[j], ps2[index[j]])
+                    if cls.is_cross( line1, line2 ):
+                        index[i], index[j] = index[j], index[i]
+                        changed = True
+        return index
         
         
     def is_cross( line1, line2 ):
@@ -96,7 +139,7 @@ if __name__ == '__main__':
     import random
     import matplotlib.pyplot as plt
     
-    cnt = 10
+    cnt = 100
     rnd = lambda: random.uniform(-10, 10)
     
     # 適当な点群を２つ
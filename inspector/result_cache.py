@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""検図結果を SQLite に保存しておくモジュール.
+
+図面ファイルの内容のハッシュ, 検図クラス, 検図の版をキーとして,
+検図結果(CheckResult)と結果を描画した重ね合わせ用図面を保存する.
+同じ図面を同じ検図で再び検図する場合は保存した結果を使う.
+検図の版は検図クラスのパッケージ(inspector)全体のソースコードから求めるため,
+コードを変更すると自動的に再検図される.
+"""
+
+import glob
+import hashlib
+import io
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+
+import ezdxf
+from ezdxf.document import Drawing
+
+from .check_result import CheckResult
+from .result_set import ResultSet
+
+
+class ResultCache:
+    """検図結果のキャッシュ.
+
+    複数のプロセスから同じファイルを使えるように, 検図1つの結果ごとに
+    コミットする(一括検図が中断しても終わった検図の結果は残る).
+
+    Parameters
+    ----------
+    path : str
+        SQLite のデータベースファイルのパス
+    timeout : float
+        他のプロセスが書き込み中の場合に待つ時間(秒)
+    """
+
+    SCHEMA = (
+        '''CREATE TABLE IF NOT EXISTS entries (
+            id INTEGER PRIMARY KEY,
+            file_hash TEXT NOT NULL,
+            inspector TEXT NOT NULL,
+            version TEXT NOT NULL,
+            time REAL NOT NULL,
+            created REAL NOT NULL,
+            overlay BLOB,
+            UNIQUE (file_hash, inspector, version))''',
+        '''CREATE TABLE IF NOT EXISTS findings (
+            entry_id INTEGER NOT NULL
+                REFERENCES entries (id) ON DELETE CASCADE,
+            num INTEGER, check_type TEXT, error INTEGER,
+            x REAL, y REAL, caption TEXT, description TEXT, color INTEGER)''',
+        '''CREATE INDEX IF NOT EXISTS findings_entry
+            ON findings (entry_id)''',
+    )
+
+    # 検図クラス -> 版 (プロセス内で1回だけ計算する)
+    __versions: dict[type, str] = {}
+    __lock = threading.Lock()
+
+    def __init__(self, path: str, timeout: float = 60.0):
+        """イニシャライザ."""
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=timeout)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA foreign_keys=ON')
+        with self.connection:
+            for sql in self.SCHEMA:
+                self.connection.execute(sql)
+
+    def __enter__(self):
+        """with 文で使う."""
+        return self
+
+    def __exit__(self, *exc):
+        """with 文の終了で閉じる."""
+        self.close()
+
+    def close(self):
+        """データベースを閉じる."""
+        self.connection.close()
+
+    @staticmethod
+    def file_hash(path: str) -> str:
+        """ファイルの内容のハッシュ値を返す."""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @classmethod
+    def inspector_version(cls, inspector: type) -> str:
+        """検図の版を返す.
+
+        検図クラスの inspect_version (あれば)と, 検図クラスのパッケージの
+        ソースコードのハッシュ値.
+        """
+        with cls.__lock:
+            version = cls.__versions.get(inspector)
+            if version is None:
+                digest = hashlib.sha256()
+                digest.update(str(getattr(inspector, 'inspect_version', ''))
+                              .encode('utf-8'))
+                for path, name in cls.sources(inspector):
+                    digest.update(name.encode('utf-8'))
+                    with open(path, 'rb') as file:
+                        digest.update(file.read())
+                version = digest.hexdigest()
+                cls.__versions[inspector] = version
+        return version
+
+    @staticmethod
+    def sources(inspector: type) -> list[tuple[str, str]]:
+        """検図クラスのパッケージのソースファイルのパスと名前を名前順で返す.
+
+        検図クラスのモジュールから使われていなくても, 枠線抽出の結果や
+        図形データのように Option で渡されるモジュールがあるため,
+        パッケージ全体を対象にする. パッケージに含まれない検図クラスは
+        そのモジュールのファイルのみ.
+        """
+        module = sys.modules[inspector.__module__]
+        package = sys.modules[module.__name__.split('.')[0]]
+        if not hasattr(package, '__path__'):
+            path = module.__file__
+            return [(path, os.path.basename(path))]
+
+        found = []
+        for dirpath in package.__path__:
+            for path in glob.glob(os.path.join(dirpath, '**', '*.py'),
+                                  recursive=True):
+                name = os.path.relpath(path, dirpath).replace(os.sep, '/')
+                found.append((path, name))
+        return sorted(found, key=lambda item: item[1])
+
+    def get(self, file_hash: str, inspector: type) -> tuple[ResultSet, Drawing, float] | None:
+        """保存された結果を返す.
+
+        Returns
+        -------
+        tuple[ResultSet, Drawing, float] | None
+            検図結果, 結果を描画した重ね合わせ用図面, 検図にかかった時間(秒).
+            保存されていない場合は None.
+        """
+        row = self.connection.execute(
+            'SELECT id, time, overlay FROM entries '
+            'WHERE file_hash=? AND inspector=? AND version=?',
+            (file_hash, inspector.__name__,
+             self.inspector_version(inspector))).fetchone()
+        if row is None:
+            return None
+
+        entry_id, elapsed, overlay = row
+        results = ResultSet()
+        for num, check_type, error, x, y, caption, desc, color in \
+                self.connection.execute(
+                    'SELECT num, check_type, error, x, y, caption, '
+                    'description, color FROM findings WHERE entry_id=? '
+                    'ORDER BY rowid', (entry_id,)):
+            pos = None if x is None else (x, y)
+            results.append(CheckResult(num, check_type, bool(error), pos,
+                                       caption, desc, color))
+
+        text = zlib.decompress(overlay).decode('utf-8')
+        return results, ezdxf.read(io.StringIO(text)), elapsed
+
+    def put(self, file_hash: str, inspector: type, results,
+            overlay: Drawing, elapsed: float) -> None:
+        """検図結果を保存する(同じキーの結果は置き換える)."""
+        stream = io.StringIO()
+        overlay.write(stream)
+        blob = zlib.compress(stream.getvalue().encode('utf-8'))
+
+        rows = []
+        for r in results:
+            pos = (None, None) if r.pos is None else r.pos
+            rows.append((r.num, r.checkType, int(bool(r.error)),
+                         pos[0], pos[1], r.caption, r.desc, r.color))
+
+        with self.connection:
+            self.connection.execute(
+                'DELETE FROM entries '
+                'WHERE file_hash=? AND inspector=? AND version=?',
+                (file_hash, inspector.__name__,
+                 self.inspector_version(inspector)))
+            cursor = self.connection.execute(
+                'INSERT INTO entries (file_hash, inspector, version, time, '
+                'created, overlay) VALUES (?, ?, ?, ?, ?, ?)',
+                (file_hash, inspector.__name__,
+                 self.inspector_version(inspector), elapsed, time.time(),
+                 blob))
+            self.connection.executemany(
+                'INSERT INTO findings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(cursor.lastrowid,) + row for row in rows])
+
+    def prune(self, inspectors: list[type]) -> int:
+        """検図のコードが変わって使われなくなった結果を削除し, 削除した数を返す."""
+        removed = 0
+        with self.connection:
+            for inspector in inspectors:
+                cursor = self.connection.execute(
+                    'DELETE FROM entries WHERE inspector=? AND version<>?',
+                    (inspector.__name__, self.inspector_version(inspector)))
+                removed += cursor.rowcount
+        return removed
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""検図結果を列ごとの配列で保持するモジュール.
+
+CheckResult のリストの代わりに, 番号・位置・色などを NumPy の配列,
+検査項目と見出しを文字列の一覧とその番号で保持する.
+結果が多い場合も1件あたりのメモリが少なく, 連結や絞り込みを配列の操作で行える.
+"""
+
+import numpy as np
+
+from typing import Callable, Iterable, Iterator
+from .check_result import CheckResult
+
+
+class ResultSet:
+    """検図結果の列形式のコンテナ.
+
+    添字で取り出すと CheckResult を作って返すため, CheckResult のリストの
+    代わりに使える(取り出した CheckResult を変更しても ResultSet は変わらない).
+
+    Attributes
+    ----------
+    NUMERIC : dict[str, type]
+        数値の列と型. 位置がない結果の x, y は NaN.
+    LABELS : tuple[str]
+        同じ値が多い文字列の列(値の一覧の番号で保持する).
+    """
+
+    NUMERIC = {'num': np.int64, 'error': np.bool_, 'x': np.float64,
+               'y': np.float64, 'color': np.int32,
+               'checkType': np.int32, 'caption': np.int32}
+    LABELS = ('checkType', 'caption')
+
+    def __init__(self, results: Iterable[CheckResult] | None = None,
+                 capacity: int = 16):
+        """イニシャライザ."""
+        self.size = 0
+        self.__data = {name: np.zeros(capacity, dtype=dtype)
+                       for name, dtype in self.NUMERIC.items()}
+        self.__labels = {name: [] for name in self.LABELS}
+        self.__codes = {name: {} for name in self.LABELS}
+        self.desc: list[str] = []
+        if results is not None:
+            self.extend(results)
+
+    def __len__(self) -> int:
+        """結果の数."""
+        return self.size
+
+    def __getitem__(self, index: int | slice) -> 'CheckResult | ResultSet':
+        """index番目の結果(スライスの場合は ResultSet)."""
+        if isinstance(index, slice):
+            return self.take(np.arange(self.size)[index])
+
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError('ResultSet index out of range')
+
+        data = self.__data
+        x, y = data['x'][index], data['y'][index]
+        return CheckResult(
+            num=int(data['num'][index]),
+            checkType=self.__labels['checkType'][data['checkType'][index]],
+            error=bool(data['error'][index]),
+            pos=None if np.isnan(x) else (float(x), float(y)),
+            caption=self.__labels['caption'][data['caption'][index]],
+            desc=self.desc[index],
+            color=int(data['color'][index]))
+
+    def __iter__(self) -> Iterator[CheckResult]:
+        """結果を順に CheckResult として返す."""
+        return (self[i] for i in range(self.size))
+
+    def __reserve(self, size: int) -> None:
+        """size件を保持できるように配列を大きくする(倍々に確保する)."""
+        capacity = len(self.__data['num'])
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2)
+        for name, column in self.__data.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.__data[name] = grown
+
+    def __code(self, name: str, value: str) -> int:
+        """文字列の列の値の番号(初めての値は追加する)."""
+        codes = self.__codes[name]
+        code = codes.get(value)
+        if code is None:
+            code = len(self.__labels[name])
+            codes[value] = code
+            self.__labels[name].append(value)
+        return code
+
+    def append(self, result: CheckResult) -> None:
+        """結果を1件追加する."""
+        self.__reserve(self.size + 1)
+        i = self.size
+        data = self.__data
+        data['num'][i] = result.num
+        data['error'][i] = bool(result.error)
+        if result.pos is None:
+            data['x'][i] = data['y'][i] = np.nan
+        else:
+            data['x'][i], data['y'][i] = result.pos[0], result.pos[1]
+        data['color'][i] = result.color
+        data['checkType'][i] = self.__code('checkType', result.checkType)
+        data['caption'][i] = self.__code('caption', result.caption)
+        self.desc.append(result.desc)
+        self.size += 1
+
+    def extend(self, results: Iterable[CheckResult]) -> None:
+        """結果を追加する(ResultSet の場合は配列のまま連結する)."""
+        if isinstance(results, ResultSet):
+            self.__extend_set(results)
+            return
+        for r in results:
+            self.append(r)
+
+    def __extend_set(self, other: 'ResultSet') -> None:
+        """ResultSet の結果を追加する."""
+        start, n = self.size, other.size
+        self.__reserve(start + n)
+        for name in self.NUMERIC:
+            self.__data[name][start:start + n] = other.column(name)
+
+        # 文字列の番号は追加先の一覧の番号に付け替える
+        for name in self.LABELS:
+            remap = np.array([self.__code(name, v) for v in other.labels(name)],
+                             dtype=np.int32)
+            if n > 0:
+                self.__data[name][start:start + n] = remap[other.column(name)]
+        self.desc.extend(other.desc)
+        self.size += n
+
+    @classmethod
+    def concat(cls, *sets: 'ResultSet') -> 'ResultSet':
+        """複数の ResultSet を順に連結した ResultSet を返す."""
+        merged = cls(capacity=max(1, sum(len(s) for s in sets)))
+        for s in sets:
+            merged.extend(s)
+        return merged
+
+    def column(self, name: str) -> np.ndarray:
+        """数値の列の配列(コピーしないビュー).
+
+        checkType と caption は labels(name) の番号. 結果を追加すると
+        配列を作り直す場合があるため, ビューは追加前の内容のままになる.
+        """
+        return self.__data[name][:self.size]
+
+    def labels(self, name: str) -> list[str]:
+        """文字列の列の値の一覧."""
+        return self.__labels[name]
+
+    def values(self, name: str) -> list:
+        """列の値のリスト(文字列の列は文字列に戻す)."""
+        if name == 'desc':
+            return list(self.desc)
+        if name in self.LABELS:
+            labels = self.__labels[name]
+            return [labels[c] for c in self.column(name).tolist()]
+        return self.column(name).tolist()
+
+    def take(self, indices: np.ndarray) -> 'ResultSet':
+        """indices番目の結果を選んだ ResultSet を返す."""
+        indices = np.asarray(indices, dtype=np.int64)
+        taken = ResultSet(capacity=max(1, len(indices)))
+        for name in self.NUMERIC:
+            taken.__data[name][:len(indices)] = self.column(name)[indices]
+        for name in self.LABELS:
+            taken.__labels[name] = list(self.__labels[name])
+            taken.__codes[name] = dict(self.__codes[name])
+        taken.desc = [self.desc[i] for i in indices.tolist()]
+        taken.size = len(indices)
+        return taken
+
+    def filter(self, condition: np.ndarray | Callable[[CheckResult], bool]) -> 'ResultSet':
+        """条件に合う結果の ResultSet を返す.
+
+        condition は列から作った真偽値の配列
+        (例: rs.column('error'), rs.column('color') == 1) または
+        CheckResult を受け取って真偽を返す関数.
+        """
+        if callable(condition):
+            mask = np.fromiter((bool(condition(r)) for r in self),
+                               dtype=bool, count=self.size)
+        else:
+            mask = np.asarray(condition, dtype=bool)
+        return self.take(np.flatnonzero(mask))
+
+    def renumber(self) -> 'ResultSet':
+        """通し番号を振り直す."""
+        self.column('num')[:] = np.arange(1, self.size + 1)
+        return self
+
+    def to_columns(self) -> dict[str, np.ndarray | list]:
+        """全ての列を返す.
+
+        数値の列はコピーしないビュー, checkType と caption は番号の配列と
+        '<列名>_labels' の値の一覧, desc は文字列のリスト.
+        """
+        columns = {name: self.column(name) for name in self.NUMERIC}
+        for name in self.LABELS:
+            columns[name + '_labels'] = self.labels(name)
+        columns['desc'] = self.desc
+        return columns
+
+    @property
+    def nbytes(self) -> int:
+        """配列と文字列が使うおおよそのバイト数."""
+        numeric = sum(self.column(name).nbytes for name in self.NUMERIC)
+        texts = sum(len(s.encode('utf-8')) for s in self.desc)
+        labels = sum(len(s.encode('utf-8'))
+                     for name in self.LABELS for s in self.__labels[name])
+        return numeric + texts + labels + 8 * len(self.desc)
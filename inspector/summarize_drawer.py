@@ -11,21 +11,28 @@ from ezdxf.document import Drawing
 from .check_result import CheckResult
 from .bounding_box import BoundingBox
 from .draw_tool import DrawTool
-from .non_cross_lines import NonCrossLines
+from .label_layout import LabelLayout
 
 
 class SummarizeDrawer:
     
-    PAPER_SIZE = (420.0, 297.0)  # A3 Size (w, h)
+    PAPER_SIZE = DrawTool.PaperSize  # A3 Size (w, h)
     BASE_FONT_SIZE = 6
     BASE_LINE_SPACE = 14
     BASE_LINE_WIDTH = 0.8
 
     @classmethod
-    def summarize( cls, doc: Drawing, results: list[CheckResult], max_items=-1 ):
+    def summarize( cls, doc: Drawing, results: list[CheckResult], max_items=-1, base_doc: Drawing = None ):
+        '''
+        結果のキャプションと矢印を doc に描画する
+        doc が重ね合わせ用ドキュメントの場合は、元の図面を base_doc に指定する
+        (配置は両方を合わせた矩形領域から決める)
+        '''
         
         cls.__drawdoc = doc
         cls.__bb = BoundingBox.DrawingBB(doc)
+        if base_doc is not None:
+            cls.__bb = BoundingBox.Union(BoundingBox.DrawingBB(base_doc), cls.__bb)
         cls.__sf = cls.__scale_factor(cls.__bb)
         cls.__font_size = cls.BASE_FONT_SIZE * cls.__sf
         cls.__line_space= cls.BASE_LINE_SPACE * cls.__sf
@@ -38,116 +45,43 @@ class SummarizeDrawer:
             ck = CheckResult( 0, "System", False, caption='他{0}項目あり'.format(non_view_items))
             results.append(ck)
         
-        # リストをUpperとRight領域に分割
-        up_rslts, rt_rslts, non_rslts = cls.__split_to_upper_right_non(cls.__bb, results)
+        # 位置のある結果は近いものをまとめて上下左右に配置し、位置のない結果は下側に並べる
+        pos_rslts = [ r for r in results if r.pos is not None ]
+        non_rslts = [ r for r in results if r.pos is None ]
+        clusters = LabelLayout.cluster( pos_rslts, cls.__line_space )
+        labels = LabelLayout.layout( cls.__bb, clusters, cls.__line_space, cls.__font_size )
 
-        # 上側描画
-        cls.__draw_upper_area( cls.__drawdoc, up_rslts )
-        
-        # 右側描画
-        cls.__draw_right_area( cls.__drawdoc, rt_rslts)
+        # 矢印&キャプション描画
+        cls.__draw_labels( cls.__drawdoc, labels )
         
         # 下側描画
-        cls.__draw_bottom_area( cls.__drawdoc, non_rslts)
-
-
-    @staticmethod
-    def __split_to_upper_right_non( draw_bb, results: list[CheckResult]):
-        l, b, r, t = draw_bb  # left, bottom, right, top
-        center_x = (l+r)/2
-        center_y = (b+t)/2
-        
-        
-        upper, right, non = [], [], []
-        for r in results:
-            if r.pos is None:
-                non.append(r)
-            elif r.pos[0] < center_x and r.pos[1] > center_y:
-                upper.append(r)
-            else:
-                right.append(r)
-                
-        return upper, right, non
-        
-
-    @classmethod
-    def __draw_upper_area( cls, doc: Drawing, results:list[CheckResult], maxCount=None ):
-        
-        # 描画する数
-        if maxCount is None:
-            maxCount = len(results)
-        count = min( maxCount, len(results) )
-        if count == 0: return
-        
-        # 行間
-        ls = cls.__line_space
-        
-        # 矢印線を引く
-        lft, btm, rgt, top = cls.__bb
-        st_x = (2*lft+3*rgt)/5.0
-        tails = [ (st_x, top+(i+1)*ls ) for i in range(count) ]
-        heads = [ results[i].pos for i in range(count) ]
+        y0 = min( [ cls.__bb[1] ] + [ l.tail[1] for l in labels ] )
+        cls.__draw_bottom_area( cls.__drawdoc, non_rslts, y0 )
 
-        # 接続関係を求める
-        idx = NonCrossLines.analyze(heads, tails)
-        
-        # 矢印&キャプション描画
-        for i in range(count):
-            caption = str(results[i].num) + '.' + results[i].caption
-            DrawTool.Text(cls.__drawdoc, caption, tails[idx[i]], results[i].color, height=cls.__font_size)    
-            DrawTool.Arrow(cls.__drawdoc, heads[i], tails[idx[i]], results[i].color, line_width=cls.__line_width)
-            lineend = (tails[idx[i]][0] + len(caption)*cls.__font_size, tails[idx[i]][1] )
-            DrawTool.Line(cls.__drawdoc, tails[idx[i]], lineend, results[i].color, width=cls.__line_width)
-        
 
     @classmethod
-    def __draw_right_area( cls, doc: Drawing, results:list[CheckResult], maxCount=None ):
-
-        # 描画する数
-        if maxCount is None:
-            maxCount = len(results)
-        count = min( maxCount, len(results) )
-        if count == 0: return
-        
-        # 行間
-        ls = cls.__line_space
-        
-        # 矢印線を引く
-        lft, btm, rgt, top = cls.__bb
-        st_x = rgt + ls
-        tails = [ (st_x, top-(i+1)*ls ) for i in range(count) ]
-        heads = [ results[i].pos for i in range(count) ]
+    def __draw_labels( cls, doc: Drawing, labels ):
 
-        # 接続関係を求める
-        idx = NonCrossLines.analyze(heads, tails)
-        
-        for i in range(count):
-            caption = str(results[i].num) + '.' + results[i].caption
-            DrawTool.Text(cls.__drawdoc, caption, tails[idx[i]], results[i].color, height=cls.__font_size)    
-            DrawTool.Arrow(cls.__drawdoc, heads[i], tails[idx[i]], results[i].color, line_width=cls.__line_width)
-            lineend = (tails[idx[i]][0] + len(caption)*cls.__font_size, tails[idx[i]][1] )
-            DrawTool.Line(cls.__drawdoc, tails[idx[i]], lineend, results[i].color, width=cls.__line_width)
+        # 矢印と下線は色ごとにまとめて描画する
+        with DrawTool.Batch(doc, scale=cls.__sf) as draw:
+            for l in labels:
+                color = l.result.color
+                draw.Text(l.caption, l.text_pos, color, height=cls.__font_size)
+                draw.Arrow(l.head, l.tail, color, line_width=cls.__line_width)
+                draw.Line(l.text_pos, l.line_end, color, width=cls.__line_width)
 
 
     @classmethod
-    def __draw_bottom_area( cls, doc: Drawing, results:list[CheckResult], maxCount=None):
+    def __draw_bottom_area( cls, doc: Drawing, results:list[CheckResult], y0 ):
 
-        # 描画する数
-        if maxCount is None:
-            maxCount = len(results)
-        count = min( maxCount, len(results) )
-        if count == 0: return
-        
-        # 行間
-        ls = cls.__line_space
+        if len(results) == 0: return
         
         # 描画
         lft, btm, rgt, top = cls.__bb
-        st_x = lft
-        pts = [ (st_x, btm - (i+1)*ls) for i in range(count)]
-        for i in range(count):
-            caption = str(results[i].num) + '.' + results[i].caption
-            DrawTool.Text(cls.__drawdoc, caption, pts[i], results[i].color, height=cls.__font_size)
+        captions = [ str(r.num) + '.' + r.caption for r in results ]
+        pts = LabelLayout.place_list( captions, lft, y0, cls.__line_space, cls.__font_size, rgt - lft )
+        for r, caption, pt in zip( results, captions, pts ):
+            DrawTool.Text(doc, caption, pt, r.color, height=cls.__font_size)
 
 
     @staticmethod
@@ -156,16 +90,5 @@ class SummarizeDrawer:
         '''
         図面の矩形領域からスケールファクターを計算
         '''
-        
-        # 図面の矩形領域
-        if doc_bb is None:
-            return 1.0
-        
-        # スケールファクター計算
-        lft, btm, rgt, top = doc_bb
-        w, h = rgt - lft, top - btm
-        paper_w, paper_h = SummarizeDrawer.PAPER_SIZE
-        scale_factor = max( w/paper_w, h/paper_h )
-        
-        return scale_factor
+        return DrawTool.ScaleFactor( doc_bb )
     
@@ -9,27 +9,36 @@ import tkinter as tk
 import tkinter.ttk as ttk
 import traceback
 import sys
+import time
 
 # import frames
 from frames.frame_constants import Fontsize
 from frames.dxfplot_frame import DxfPlotFrame
-from frames.table_frame import TableFrame
+from frames.table_frame import TableFrame, LazyRows
 from frames.menubar import SimpleViewMenu
 from frames.viewer_conf import ViewerConf
 from frames.footer import Footer
 from frames.file_reader import FileReader
 from frames.algorithm_selector import AlgorithmSelector
+from frames.inspection_worker import InspectionWorker
 
 from inspector import *
-from inspector.check_base import CheckBase
-from inspector.frame_extractor import Frame_extractor_result
+from inspector.check_base import CheckBase, DrawCommand
+from inspector.check_result import CheckResult
+from inspector.result_set import ResultSet
+from inspector.frame_extractor import FrameResultCache
 from inspector.summarize_drawer import SummarizeDrawer
 from inspector.draw_tool import DrawTool
+from inspector.multi_inspector import MultiInspector
+from inspector.geometry_snapshot import GeometrySnapshot
 
 
 class SimpleViewer():
     """表，図面のみ."""
 
+    # 検図中に結果を表に追加する間隔(秒)
+    REPORT_INTERVAL = 0.2
+
     def __init__(self, master: tk.Tk, error_to_console=False):
         """イニシャライザ.
 
@@ -64,6 +73,13 @@ class SimpleViewer():
         self.execution_button = ttk.Button(
             self.header, text='検図', style='ececution.TButton',
             command=lambda: self.process_doc(error_console=error_to_console))
+        self.cancel_button = ttk.Button(
+            self.header, text='中止', style='ececution.TButton',
+            command=self.cancel_process, state='disabled')
+
+        # 検図は別スレッドで実行する
+        self.error_console = error_to_console
+        self.worker = InspectionWorker(self.master, self.on_worker)
 
         # メニューバー
         _ = SimpleViewMenu(master=self.master,
@@ -75,6 +91,7 @@ class SimpleViewer():
         self.readpath_frame.pack(side=tk.LEFT)
         self.selector.pack(side=tk.LEFT)
         self.execution_button.pack(side=tk.LEFT)
+        self.cancel_button.pack(side=tk.LEFT)
 
         self.footer.pack(side=tk.BOTTOM, fill=tk.X)
 
@@ -85,48 +102,150 @@ class SimpleViewer():
         self.master.protocol('WM_DELETE_WINDOW', self.quit)
 
     def process_doc(self, error_console):
-        """図面の読み込みと処理を行う."""
-        doc, msg = self.readpath_frame.read_file()
+        """図面の読み込みと処理を別スレッドで開始する.
 
-        self.table_frame.print_message(msg)
-        if doc is not None:
-            self.footer.set_filename(self.readpath_frame.file_path)
-            inspector = self.selector.get_val()
+        読み込んだ図面を先に表示し, 検図の結果は終わってから重ねて表示する.
+        処理中の段階はフッターに表示し, 中止ボタンで中止できる.
+        """
+        self.error_console = error_console
+        filepath = self.readpath_frame.file_path
+        inspectors = self.selector.get_vals()
+        is_multi = self.selector.is_multi
 
-            try:
-                # 枠線抽出
-                copy_doc = DrawTool.CopyDoc(doc)
-                frame = Frame_extractor_result(copy_doc)
+        self.execution_button.config(state='disabled')
+        self.cancel_button.config(state='normal')
+        self.worker.start(lambda job: self.run_pipeline(
+            job, filepath, inspectors, is_multi))
 
-                # 検図
-                draw_doc = DrawTool.CopyDoc(doc)
-                draw_doc, results = inspector.inspect_doc(doc, draw_doc,
-                                                          frameresult=frame)
+    def run_pipeline(self, job, filepath, inspectors, is_multi):
+        """図面の読み込みと検図(別スレッドで実行する).
 
+        Tkのウィジェットは操作せず, 進捗と結果は job.report で通知する.
+        """
+        job.report('stage', '読み込み')
+        doc, msg = self.readpath_frame.read_file(filepath)
+        if doc is not None:
+            # 表示できるフォントに変更(検図には影響しない)
+            doc = DrawTool.ResolveFont(doc)
+        job.report('loaded', doc, msg, filepath)
+        if doc is None:
+            return
+
+        # 枠線抽出(図面は変更しない)
+        # 同じファイルの場合は前回の結果を使う
+        job.report('stage', '枠線抽出')
+        frame = FrameResultCache.get(doc, filepath, check=job.check)
+
+        # 図形の配列(全ての検図で共有する)
+        job.report('stage', '図形の取得')
+        geometry = GeometrySnapshot.from_doc(doc, check=job.check)
+
+        # 検図(結果は重ね合わせ用の図面に描画する)
+        job.report('stage', '検図')
+        if is_multi:
+            # 複数の検図をまとめて実行し, 結果を1つにまとめる
+            stream = MultiInspector.inspect_stream(
+                doc, inspectors, frameresult=frame, geometry=geometry)
+            inspect_name = '{}({}項目)'.format(
+                MultiInspector.inspect_name, len(inspectors))
+        else:
+            inspector = inspectors[0]
+            stream = inspector.inspect_stream(
+                doc, frameresult=frame, geometry=geometry)
+            inspect_name = inspector.inspect_name
+
+        # 見つかった結果は少しずつ表に追加する
+        job.report('table', inspect_name)
+        draw_doc = DrawTool.OverlayDoc(doc)
+        results = ResultSet()
+        chunk = []
+        last = time.perf_counter()
+        for item in stream:
+            # 中止された場合は次の結果を待たずに終了する
+            job.check()
+            if isinstance(item, DrawCommand):
+                item.apply(draw_doc)
+                continue
+            results.append(item)
+            chunk.append(item)
+            if time.perf_counter() - last > self.REPORT_INTERVAL:
+                job.report('results', chunk)
+                chunk = []
+                last = time.perf_counter()
+        job.report('results', chunk)
+
+        # キャプション等描画
+        job.report('stage', '結果の描画')
+        SummarizeDrawer.summarize(draw_doc, results, base_doc=doc)
+        draw_doc = DrawTool.ResolveFont(draw_doc)
+
+        job.report('inspected', doc, draw_doc, results, inspect_name)
+
+    def on_worker(self, kind, *args):
+        """別スレッドからの通知を表示に反映する."""
+        try:
+            if kind == 'stage':
+                self.footer.set_progress(args[0])
+
+            elif kind == 'loaded':
+                # 検図の前に図面だけを表示する
+                doc, msg, filepath = args
+                self.table_frame.print_message(msg)
+                if doc is not None:
+                    self.footer.set_filename(filepath)
+                    self.plot_frame.update_plot(doc=doc)
+
+            elif kind == 'table':
                 # フッター
-                self.footer.set_algoname(inspector.inspect_name)
-
-                # キャプション等描画
-                SummarizeDrawer.summarize(draw_doc, results, max_items=16)
-
-                # 図面表示
-                draw_doc = DrawTool.ResolveFont(draw_doc)
-                self.plot_frame.update_plot(doc=draw_doc)
+                self.footer.set_algoname(args[0])
 
-                # 表の作成
+                # 表の作成(行の辞書は表示するときに作る)
                 cols = ('No', '見出し', '検査項目', '説明')
-                data = [r.toColumnData() for r in results]
+                data = LazyRows(ResultSet(), CheckResult.toColumnData)
                 self.table_frame.create_table(columns=cols, data=data)
 
-            except Exception:
-                error = traceback.format_exc()
-                if error_console:
-                    print(error, file=sys.stderr)
-                else:
-                    self.table_frame.add_message(error, True)
+            elif kind == 'results':
+                self.table_frame.append_rows(args[0])
+
+            elif kind == 'inspected':
+                doc, draw_doc, results, inspect_name = args
+
+                # 図面表示(元の図面に結果を重ねる)
+                self.plot_frame.update_plot(doc=doc, overlay=draw_doc)
+
+            elif kind == 'error':
+                self.show_error(args[0])
+
+        except Exception:
+            self.worker.cancel()
+            self.show_error(traceback.format_exc())
+
+        if not self.worker.is_running:
+            self.finish_process()
+
+    def cancel_process(self):
+        """処理を中止する(別スレッドも次の区切りで終了する)."""
+        if self.worker.is_running:
+            self.worker.cancel()
+            self.table_frame.add_message('検図を中止しました.')
+        self.finish_process()
+
+    def finish_process(self):
+        """処理の終了後にボタンとフッターを戻す."""
+        self.footer.set_progress()
+        self.execution_button.config(state='normal')
+        self.cancel_button.config(state='disabled')
+
+    def show_error(self, error):
+        """エラーを表示する."""
+        if self.error_console:
+            print(error, file=sys.stderr)
+        else:
+            self.table_frame.add_message(error, True)
 
     def quit(self):
         """終了用関数."""
+        self.worker.cancel()
         self.master.quit()
         self.master.destroy()
         print('Quit')
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""BoundingBoxのテスト."""
+
+import sys
+import gc
+import weakref
+import os.path as path
+
+import ezdxf
+
+sys.path.append(path.join(path.dirname(__file__), '../..'))
+from inspector.bounding_box import BoundingBox
+
+
+def make_doc(n: int):
+    """直線が n 本ある図面."""
+    doc = ezdxf.new()
+    msp = doc.modelspace()
+    for i in range(n):
+        msp.add_line((0, i), (10, i))
+    return doc
+
+
+def test_drawing_bb_updates():
+    """追加した Entity を含めた矩形を返す."""
+    doc = make_doc(3)
+    assert BoundingBox.DrawingBB(doc) == [0, 0, 10, 2]
+
+    doc.modelspace().add_line((-5, 0), (0, 8))
+    assert BoundingBox.DrawingBB(doc) == [-5, 0, 10, 8]
+    assert len(BoundingBox.EntityBBs(doc)) == 4
+
+
+def test_released_with_doc():
+    """図面を削除すると保持していた矩形も削除する."""
+    docs = [make_doc(i + 1) for i in range(5)]
+    for doc in docs:
+        BoundingBox.DrawingBB(doc)
+    BoundingBox.EntityBBs(docs[0])
+    refs = [weakref.ref(doc) for doc in docs]
+
+    del doc, docs
+    gc.collect()
+    assert [ref() for ref in refs] == [None] * 5
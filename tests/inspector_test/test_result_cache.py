@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""ResultCacheのテスト."""
+
+import sys
+import os.path as path
+
+import ezdxf
+
+sys.path.append(path.join(path.dirname(__file__), '../..'))
+from inspector.check_circle import CheckCircle
+from inspector.check_titleblock import CheckTitleBlock
+from inspector.check_result import CheckResult
+from inspector.draw_tool import DrawTool
+from inspector.result_cache import ResultCache
+from batch_inspection import inspect_drawing
+
+
+class CheckCircleV2(CheckCircle):
+    """コードを変更した CheckCircle の代わり(同じクラス名で版だけ異なる)."""
+
+    inspect_version = 2
+
+
+CheckCircleV2.__name__ = CheckCircle.__name__
+
+
+def as_tuple(r: CheckResult) -> tuple:
+    """比較用に CheckResult の内容をタプルにする."""
+    return (r.num, r.checkType, r.error, r.pos, r.caption, r.desc, r.color)
+
+
+def make_doc():
+    """円が2つある図面."""
+    doc = ezdxf.new()
+    msp = doc.modelspace()
+    msp.add_circle((0, 0), 5)
+    msp.add_circle((20, 10), 3)
+    return doc
+
+
+def test_round_trip(tmp_path):
+    """保存した結果と重ね合わせ用図面をそのまま返す."""
+    results = [CheckResult(1, '円抽出', False, (1.5, -2.0), '円です', 'c1', 1),
+               CheckResult(2, '円抽出', True, None, 'サンプル', 'c2', 3)]
+    overlay = DrawTool.OverlayDoc(make_doc())
+    overlay.modelspace().add_line((0, 0), (10, 10))
+
+    with ResultCache(str(tmp_path / 'cache.sqlite3')) as cache:
+        assert cache.get('hash', CheckCircle) is None
+        cache.put('hash', CheckCircle, results, overlay, 0.25)
+        res, doc, elapsed = cache.get('hash', CheckCircle)
+
+        assert [as_tuple(r) for r in res] == [as_tuple(r) for r in results]
+        assert len(doc.modelspace().query('LINE')) == 1
+        assert elapsed == 0.25
+
+        # 別の図面と別の検図の結果ではない
+        assert cache.get('other', CheckCircle) is None
+        assert cache.get('hash', CheckTitleBlock) is None
+
+        # 同じキーで保存すると置き換える
+        cache.put('hash', CheckCircle, results[:1], overlay, 0.5)
+        res, _, elapsed = cache.get('hash', CheckCircle)
+        assert len(res) == 1 and elapsed == 0.5
+
+
+def test_version_change_and_prune(tmp_path):
+    """版が変わると保存した結果を使わず, prune で古い版を削除する."""
+    overlay = DrawTool.OverlayDoc(make_doc())
+    results = [CheckResult(1, '円抽出', False, None, '円です')]
+    assert ResultCache.inspector_version(CheckCircle) != \
+        ResultCache.inspector_version(CheckCircleV2)
+
+    with ResultCache(str(tmp_path / 'cache.sqlite3')) as cache:
+        cache.put('hash', CheckCircle, results, overlay, 0.1)
+        cache.put('hash', CheckTitleBlock, results, overlay, 0.1)
+        assert cache.get('hash', CheckCircleV2) is None
+
+        assert cache.prune([CheckCircleV2, CheckTitleBlock]) == 1
+        assert cache.get('hash', CheckCircle) is None
+        assert cache.get('hash', CheckTitleBlock) is not None
+        assert cache.prune([CheckCircleV2, CheckTitleBlock]) == 0
+
+
+def test_sources_cover_package():
+    """Option で渡されるモジュールも版に含める."""
+    names = [name for _, name in ResultCache.sources(CheckTitleBlock)]
+    assert 'check_titleblock.py' in names
+    assert 'frame_extractor.py' in names
+    assert 'geometry_snapshot.py' in names
+    assert names == sorted(names)
+
+
+def test_inspect_drawing_uses_cache(tmp_path):
+    """保存した結果を使い, 読み込めない結果は検図し直す."""
+    doc = make_doc()
+    with ResultCache(str(tmp_path / 'cache.sqlite3')) as cache:
+        records = []
+        _, first = inspect_drawing(doc, [CheckCircle], records=records,
+                                   cache=cache, file_hash='hash')
+        _, second = inspect_drawing(doc, [CheckCircle], records=records,
+                                    cache=cache, file_hash='hash')
+        assert [r['cached'] for r in records] == [False, True]
+        assert [as_tuple(r) for r in second] == [as_tuple(r) for r in first]
+
+        # 壊れた結果は保存されていない場合と同じ
+        with cache.connection:
+            cache.connection.execute("UPDATE entries SET overlay=x'00'")
+        records = []
+        _, third = inspect_drawing(doc, [CheckCircle], records=records,
+                                   cache=cache, file_hash='hash')
+        assert [r['cached'] for r in records] == [False]
+        assert [as_tuple(r) for r in third] == [as_tuple(r) for r in first]
+        assert cache.get('hash', CheckCircle) is not None
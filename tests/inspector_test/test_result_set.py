@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""ResultSetのテスト."""
+
+import sys
+import os.path as path
+
+import numpy as np
+
+sys.path.append(path.join(path.dirname(__file__), '../..'))
+from inspector.check_result import CheckResult
+from inspector.result_set import ResultSet
+
+
+def as_tuple(r: CheckResult) -> tuple:
+    """比較用に CheckResult の内容をタプルにする."""
+    return (r.num, r.checkType, r.error, r.pos, r.caption, r.desc, r.color)
+
+
+def make_results(check_type: str, captions: list[str]) -> list[CheckResult]:
+    """見出しごとに1件の結果(偶数番目は位置なし)."""
+    return [CheckResult(i + 1, check_type, i % 3 == 0,
+                        None if i % 2 == 0 else (float(i), -float(i)),
+                        caption, 'desc {}'.format(i), color=i + 1)
+            for i, caption in enumerate(captions)]
+
+
+def test_round_trip():
+    """CheckResult のリストと同じ内容を返す(追加で配列を確保し直す場合も)."""
+    results = make_results('円抽出', ['円です'] * 20)
+    rs = ResultSet(results, capacity=2)
+
+    assert len(rs) == 20
+    assert [as_tuple(r) for r in rs] == [as_tuple(r) for r in results]
+    assert as_tuple(rs[-1]) == as_tuple(results[-1])
+    assert [as_tuple(r) for r in rs[2:5]] == \
+        [as_tuple(r) for r in results[2:5]]
+    assert rs.labels('caption') == ['円です']
+
+
+def test_concat_remaps_labels():
+    """連結すると文字列の番号を連結先の一覧の番号に付け替える."""
+    a = make_results('円抽出', ['円です', '円検出サンプル'])
+    b = make_results('円弧抽出', ['円弧です', '円です', '円弧です'])
+    rs_a, rs_b = ResultSet(a), ResultSet(b)
+    merged = ResultSet.concat(rs_a, rs_b)
+
+    assert [as_tuple(r) for r in merged] == [as_tuple(r) for r in a + b]
+    assert merged.labels('caption') == ['円です', '円検出サンプル', '円弧です']
+    assert merged.values('caption') == \
+        ['円です', '円検出サンプル', '円弧です', '円です', '円弧です']
+    assert merged.values('checkType') == ['円抽出'] * 2 + ['円弧抽出'] * 3
+
+    # 元の ResultSet は変わらない
+    assert [as_tuple(r) for r in rs_b] == [as_tuple(r) for r in b]
+    assert rs_b.labels('caption') == ['円弧です', '円です']
+
+
+def test_concat_empty():
+    """空の ResultSet を含めて連結できる."""
+    a = make_results('円抽出', ['円です'])
+    merged = ResultSet.concat(ResultSet(), ResultSet(a), ResultSet())
+
+    assert [as_tuple(r) for r in merged] == [as_tuple(r) for r in a]
+    assert len(ResultSet.concat()) == 0
+
+
+def test_filter():
+    """配列の条件と関数の条件で同じ結果を選ぶ."""
+    results = make_results('円抽出', ['a', 'b', 'c', 'd', 'e', 'f', 'g'])
+    rs = ResultSet(results)
+    expected = [as_tuple(r) for r in results if r.error]
+
+    by_mask = rs.filter(rs.column('error'))
+    by_func = rs.filter(lambda r: r.error)
+    assert [as_tuple(r) for r in by_mask] == expected
+    assert [as_tuple(r) for r in by_func] == expected
+
+    # 位置のない結果は x が NaN
+    no_pos = rs.filter(np.isnan(rs.column('x')))
+    assert [r.pos for r in no_pos] == [None] * 4
+
+    # 選んだ結果に追加しても元の ResultSet は変わらない
+    by_mask.append(results[1])
+    assert len(rs) == len(results)
+    assert len(by_mask) == len(expected) + 1
+
+
+def test_renumber():
+    """選んだ結果の番号を振り直す."""
+    rs = ResultSet(make_results('円抽出', ['a', 'b', 'c', 'd']))
+    picked = rs.filter(rs.column('color') > 2).renumber()
+
+    assert picked.values('num') == [1, 2]
+    assert picked.values('caption') == ['c', 'd']
+    assert rs.values('num') == [1, 2, 3, 4]
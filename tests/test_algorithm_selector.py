@@ -35,4 +35,8 @@ if __name__ == '__main__':
                        print(algo.get_val().inspect_str))
     button.pack()
 
+    button2 = tk.Button(root, text='まとめて読み取り', command=lambda:
+                        print([v.inspect_name for v in algo.get_vals()]))
+    button2.pack()
+
     root.mainloop()
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""一括検図の図面の検索と結果ファイルの名前のテスト."""
+
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from batch_inspection import find_drawings, result_path
+
+
+def touch(dirpath, *names: str) -> None:
+    """空のファイルを作る."""
+    for name in names:
+        open(os.path.join(dirpath, name), 'w').close()
+
+
+def test_find_drawings_skips_results(tmp_path):
+    """結果ファイルは除き, 名前が _result で終わる提出図面は残す."""
+    touch(tmp_path, 'a.dxf', 'B.DWG', 'kadai_result.dxf', 'memo.txt')
+    for name in ('a.dxf', 'B.DWG'):
+        dxf = result_path(str(tmp_path / name), str(tmp_path)) + '.dxf'
+        touch(tmp_path, os.path.basename(dxf))
+
+    names = [os.path.basename(p) for p in find_drawings(str(tmp_path))]
+    assert names == ['B.DWG', 'a.dxf', 'kadai_result.dxf']
+
+
+def test_find_drawings_recursive(tmp_path):
+    """サブフォルダは recursive の場合だけ探す."""
+    os.makedirs(tmp_path / 'sub')
+    touch(tmp_path, 'a.dxf')
+    touch(tmp_path / 'sub', 'b.dxf', 'b.dxf_result.dxf')
+
+    assert find_drawings(str(tmp_path)) == [str(tmp_path / 'a.dxf')]
+    assert find_drawings(str(tmp_path), recursive=True) == \
+        [str(tmp_path / 'a.dxf'), str(tmp_path / 'sub' / 'b.dxf')]
+
+
+def test_result_path_keeps_folders(tmp_path):
+    """結果ファイルは入力フォルダからの相対パスと拡張子を残す."""
+    src = str(tmp_path / 'in' / 'sub' / 'a.dwg')
+    assert result_path(src, str(tmp_path / 'out'), str(tmp_path / 'in')) == \
+        str(tmp_path / 'out' / 'sub' / 'a.dwg_result')
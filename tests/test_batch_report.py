@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""一括検図のレポート(ReportWriter)のテスト."""
+
+import sys
+import os
+import csv
+import json
+import codecs
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from inspector.check_result import CheckResult
+from inspector.result_set import ResultSet
+from batch_inspection import ReportWriter, open_report
+
+
+def summary(name: str, n: int = 2, cached: bool = False) -> dict:
+    """検図1つで n 件の結果があった図面の結果."""
+    results = ResultSet(CheckResult(i + 1, '円抽出', False, (i, i), '円です',
+                                    'desc', 1) for i in range(n))
+    return {'file': name, 'time': 1.5, 'error': '',
+            'inspectors': [{'inspector': 'CheckCircle', 'time': 0.5,
+                            'cached': cached, 'error': '',
+                            'results': results}]}
+
+
+def failed_summary(name: str) -> dict:
+    """読み込みに失敗した図面の結果(検図の記録なし)."""
+    error = ('Traceback (most recent call last):\n'
+             '  File "x.py", line 1, in <module>\n'
+             'OSError: cannot read\n')
+    return {'file': name, 'time': 0.1, 'error': error, 'inspectors': []}
+
+
+def read_csv(path) -> list[list[str]]:
+    """BOM付きのCSVを読む."""
+    with open(path, encoding='utf_8_sig', newline='') as file:
+        return list(csv.reader(file))
+
+
+def test_csv_bom_and_header(tmp_path):
+    """CSVはBOMと列名の行から始まり, 結果ごとに1行."""
+    path = tmp_path / 'report.csv'
+    with open_report(str(path)) as report:
+        report.write(summary('a.dxf'))
+
+    assert path.read_bytes().startswith(codecs.BOM_UTF8)
+    rows = read_csv(path)
+    assert rows[0] == list(ReportWriter.FIELDS)
+    assert [row[0] for row in rows[1:]] == ['a.dxf', 'a.dxf']
+    assert rows[-1][ReportWriter.FIELDS.index('cached')] == 'False'
+
+
+def test_csv_append(tmp_path):
+    """追記では列名とBOMを繰り返さない. 追記しない場合は作り直す."""
+    path = tmp_path / 'report.csv'
+    with open_report(str(path)) as report:
+        report.write(summary('a.dxf'))
+    with open_report(str(path), append=True) as report:
+        report.write(summary('b.dxf', cached=True))
+
+    data = path.read_bytes()
+    assert data.count(codecs.BOM_UTF8) == 1
+    rows = read_csv(path)
+    assert rows[0] == list(ReportWriter.FIELDS)
+    assert [row[0] for row in rows[1:]] == ['a.dxf'] * 2 + ['b.dxf'] * 2
+    assert rows[-1][ReportWriter.FIELDS.index('cached')] == 'True'
+
+    with open_report(str(path)) as report:
+        report.write(summary('c.dxf', n=1))
+    assert [row[0] for row in read_csv(path)[1:]] == ['c.dxf']
+
+
+def test_csv_append_refuses_other_header(tmp_path):
+    """列名が異なるCSVには追記しない(ファイルは変更しない)."""
+    path = tmp_path / 'report.csv'
+    old = ','.join(f for f in ReportWriter.FIELDS if f != 'cached') + '\r\n'
+    path.write_bytes(codecs.BOM_UTF8 + old.encode('utf-8'))
+
+    with pytest.raises(ValueError):
+        open_report(str(path), append=True)
+    assert path.read_bytes() == codecs.BOM_UTF8 + old.encode('utf-8')
+
+
+def test_failed_drawing_rows(tmp_path):
+    """検図の前に失敗した図面は例外の内容を1行で書き出す."""
+    path = tmp_path / 'report.jsonl'
+    with open_report(str(path)) as report:
+        report.write(failed_summary('broken.dxf'))
+        report.write(summary('a.dxf', n=0))
+
+    records = [json.loads(line)
+               for line in path.read_text(encoding='utf-8').splitlines()]
+    assert len(records) == 2
+    assert set(records[0]) == set(ReportWriter.FIELDS)
+    assert records[0]['file'] == 'broken.dxf'
+    assert records[0]['inspector'] == ''
+    assert records[0]['error'] == 'OSError: cannot read'
+    assert records[0]['num'] is None
+
+    # 結果のない検図は検図ごとに1行
+    assert records[1]['inspector'] == 'CheckCircle'
+    assert records[1]['error'] == ''
+    assert records[1]['num'] is None
+
+
+def test_unknown_extension(tmp_path):
+    """レポートの拡張子は .jsonl と .csv のみ."""
+    with pytest.raises(ValueError):
+        open_report(str(tmp_path / 'report.txt'))
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""ConversionCacheのテスト.
+
+test_dwg_converter と同じく, ODA File Converter の代わりに *.dwg を *.dxf
+としてコピーするだけのスクリプトを使って確認する(Linux用).
+"""
+
+import sys
+import os
+import stat
+
+import ezdxf
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from frames.conversion_cache import ConversionCache
+from frames.dwg_converter import DwgConverter, DXF_VERSION
+from batch_inspection import convert_drawings, run_batch
+
+# ODAFileConverter "入力フォルダ" "出力フォルダ" version type recurse audit filter
+STAND_IN = """#!{python}
+import os, shutil, sys
+in_dir, out_dir = sys.argv[1], sys.argv[2]
+for name in os.listdir(in_dir):
+    if name.lower().endswith('.dwg'):
+        dest = os.path.join(out_dir, os.path.splitext(name)[0] + '.dxf')
+        shutil.copyfile(os.path.join(in_dir, name), dest)
+"""
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32',
+                                reason='変換の代わりのスクリプトはLinux用')
+
+
+@pytest.fixture
+def exec_path(tmp_path):
+    """変換の代わりのスクリプト."""
+    path = tmp_path / 'ODAFileConverter'
+    path.write_text(STAND_IN.format(python=sys.executable))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+def make_drawings(dirpath, n: int) -> list[str]:
+    """中身がDXFの「DWG」ファイルを n 個作る(内容はそれぞれ異なる)."""
+    os.makedirs(dirpath, exist_ok=True)
+    paths = []
+    for i in range(n):
+        doc = ezdxf.new()
+        msp = doc.modelspace()
+        for j in range(50):
+            msp.add_line((0, j), (i + 1, j))
+        path = os.path.join(dirpath, 'd{}.dwg'.format(i))
+        doc.saveas(path)
+        paths.append(path)
+    return paths
+
+
+def cache_size(cachedir: str) -> int:
+    """保存されたDXFの合計サイズ."""
+    return sum(entry.stat().st_size for entry in os.scandir(cachedir)
+               if entry.name.endswith(ConversionCache.suffix))
+
+
+def test_put_evicts_oldest(tmp_path, exec_path):
+    """上限を超えると古いものから削除し, 保存したファイルは残す."""
+    paths = make_drawings(tmp_path / 'src', 3)
+    size = os.path.getsize(paths[0])
+    cache = ConversionCache(str(tmp_path / 'cache'), exec_path,
+                            max_bytes=size * 2)
+    stored = []
+    for i, path in enumerate(paths):
+        stored.append(cache.put(path, path))
+        os.utime(stored[-1], (i, i))
+
+    assert not os.path.exists(stored[0])
+    assert cache.get(paths[1]) == stored[1]
+    assert cache.get(paths[2]) == stored[2]
+
+
+def test_batch_beyond_max_bytes(tmp_path, exec_path):
+    """1回の一括検図で上限を超えても, 検図中の変換結果は削除されない."""
+    paths = make_drawings(tmp_path / 'src', 6)
+    size = os.path.getsize(paths[0])
+    cachedir = str(tmp_path / 'cache')
+    converter = DwgConverter(exec_path, shards=2, timeout=30)
+    cache = ConversionCache(cachedir, exec_path, converter.version,
+                            max_bytes=size * 2)
+
+    # 半分は変換済みにしておく
+    convert_drawings(paths[:3], converter, str(tmp_path / 'tmp1'), cache)
+
+    converted, failed = convert_drawings(paths, converter,
+                                         str(tmp_path / 'tmp2'), cache)
+    assert failed == []
+    assert sorted(converted) == sorted(paths)
+    assert cache_size(cachedir) > cache.max_bytes
+
+    summaries = run_batch(paths, ['CheckCircle'], str(tmp_path / 'out'),
+                          jobs=2, readpaths=converted)
+    assert [s['error'] for s in summaries] == [''] * len(paths)
+
+    # 検図が終わってから上限まで削除する
+    cache.evict()
+    assert cache_size(cachedir) <= cache.max_bytes
+
+
+def test_shared_with_viewer(tmp_path, exec_path):
+    """一括検図の変換結果をビューア(FileReader.read_dwg)と同じキーで保存する."""
+    paths = make_drawings(tmp_path / 'src', 2)
+    cachedir = str(tmp_path / 'cache')
+    converter = DwgConverter(exec_path, shards=1, timeout=30)
+    batch = ConversionCache(cachedir, exec_path, converter.version)
+    convert_drawings(paths, converter, str(tmp_path / 'tmp'), batch)
+
+    # FileReader.read_dwg と同じ作り方
+    viewer = ConversionCache(cachedir, exec_path, DXF_VERSION)
+    assert converter.version == DXF_VERSION
+    for path in paths:
+        assert viewer.get(path) == batch.get(path) is not None
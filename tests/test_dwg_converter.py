@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""DwgConverterのテスト.
+
+ODA File Converter の代わりに, 入力フォルダの *.dwg を *.dxf として
+コピーするだけのスクリプトを使って確認する(Linux用).
+"""
+
+import sys
+import os
+import stat
+import tempfile
+
+import ezdxf
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from frames.dwg_converter import DwgConverter
+
+# ODAFileConverter "入力フォルダ" "出力フォルダ" version type recurse audit filter
+STAND_IN = """#!{python}
+import os, shutil, sys, time
+in_dir, out_dir = sys.argv[1], sys.argv[2]
+for name in os.listdir(in_dir):
+    if 'slow' in name:
+        time.sleep(10)
+    if name.lower().endswith('.dwg') and 'broken' not in name:
+        dest = os.path.join(out_dir, os.path.splitext(name)[0] + '.dxf')
+        shutil.copyfile(os.path.join(in_dir, name), dest)
+"""
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # 変換の代わりのスクリプト
+        exec_path = os.path.join(tmp_dir, 'ODAFileConverter')
+        with open(exec_path, 'w') as file:
+            file.write(STAND_IN.format(python=sys.executable))
+        os.chmod(exec_path, os.stat(exec_path).st_mode | stat.S_IEXEC)
+
+        # 中身がDXFの「DWG」ファイル
+        src_dir = os.path.join(tmp_dir, 'src')
+        os.makedirs(os.path.join(src_dir, 'sub'))
+        names = ['a.dwg', 'b.dwg', 'c.dwg', 'broken.dwg', 'sub/a.dwg']
+        paths = [os.path.join(src_dir, name) for name in names]
+        for i, path in enumerate(paths):
+            doc = ezdxf.new()
+            doc.modelspace().add_line((0, 0), (i, i))
+            doc.saveas(path)
+
+        converter = DwgConverter(exec_path, shards=2, timeout=5)
+        converted, errors = converter.convert(paths,
+                                              os.path.join(tmp_dir, 'out'))
+        print('converted:', len(converted), 'errors:', len(errors))
+        for path, dxf in converted.items():
+            line = ezdxf.readfile(dxf).modelspace().query('LINE')[0]
+            print(os.path.relpath(path, src_dir), '->',
+                  os.path.basename(dxf), line.dxf.end)
+        for path, error in errors.items():
+            print(os.path.relpath(path, src_dir), 'error:', error)
+
+        # 制限時間を超えたシャードは失敗になる
+        slow = os.path.join(src_dir, 'slow.dwg')
+        ezdxf.new().saveas(slow)
+        converter = DwgConverter(exec_path, shards=1, timeout=1)
+        converted, errors = converter.convert([slow],
+                                              os.path.join(tmp_dir, 'out2'))
+        print('timeout:', errors)